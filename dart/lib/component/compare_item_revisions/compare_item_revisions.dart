@@ -24,7 +24,13 @@ class CompareItemRevisions {
     item_ids.remove(base_item_id);
     compare_item_revisions = new List<ItemRevisionTuple>();
 
-    this.store.one(Item, base_item_id).then((item) {
+    this.store.customQueryOne(Item,
+      new CustomRequestParams(
+          method: "GET",
+          url:"$API_HOST/items/$base_item_id?revision_limit=1&include_configs=true",
+          withCredentials: true
+      ))
+    .then((item) {
       this.base_item = item;
       this.base_revision = item.revisions.first;
 
@@ -32,7 +38,13 @@ class CompareItemRevisions {
         if (item_id == "") {
           break;
         }
-        this.store.one(Item, item_id).then((item) {
+        this.store.customQueryOne(Item,
+          new CustomRequestParams(
+              method: "GET",
+              url:"$API_HOST/items/$item_id?revision_limit=1",
+              withCredentials: true
+          ))
+        .then((item) {
           var revision_id = item.revisions.first.id;
           store.customQueryOne(Revision,
             new CustomRequestParams(
@@ -33,7 +33,13 @@ class ItemDetailsComponent implements ScopeAware { // extends ShadowRootAware
 
     Future _load_item(item_id) {
         is_loading = true;
-        return store.one(Item, item_id).then((returned_item) {
+        // The revisions are shown with their configs, which the API leaves out by default.
+        return store.customQueryOne(Item,
+            new CustomRequestParams(
+                method: "GET",
+                url: "$API_HOST/items/$item_id?include_configs=true",
+                withCredentials: true
+            )).then((returned_item) {
             is_loading = false;
             is_error = false;
 
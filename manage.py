@@ -11,7 +11,7 @@
 #     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #     See the License for the specific language governing permissions and
 #     limitations under the License.
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
 
 from flask.ext.script import Manager, Command, Option, prompt_pass
@@ -27,6 +27,9 @@ from security_monkey.scheduler import run_change_reporter as sm_run_change_repor
 from security_monkey.scheduler import find_changes as sm_find_changes
 from security_monkey.scheduler import audit_changes as sm_audit_changes
 from security_monkey.backup import backup_config_to_json as sm_backup_config_to_json
+from security_monkey.export.snapshot import export_snapshot as sm_export_snapshot
+from security_monkey.cloudtrail import process_cloudtrail_events as sm_process_cloudtrail_events
+from security_monkey.common.region_catalog import refresh_regions as sm_refresh_regions
 from security_monkey.common.utils import find_modules
 from security_monkey.datastore import Account
 from security_monkey.watcher import watcher_registry
@@ -74,11 +77,57 @@ def audit_changes(accounts, monitors, send_report):
 @manager.option('-a', '--accounts', dest='accounts', type=unicode, default=u'all')
 @manager.option('-m', '--monitors', dest='monitors', type=unicode, default=u'all')
 @manager.option('-o', '--outputfolder', dest='outputfolder', type=unicode, default=u'backups')
-def backup_config_to_json(accounts, monitors, outputfolder):
-    """ Saves the most current item revisions to a json file. """
+@manager.option('-z', '--archive', dest='archive', type=unicode, default=None)
+def backup_config_to_json(accounts, monitors, outputfolder, archive):
+    """ Saves the most current item revisions to json files, or to a tar or zip archive. """
     monitor_names = _parse_tech_names(monitors)
     account_names = _parse_accounts(accounts)
-    sm_backup_config_to_json(account_names, monitor_names, outputfolder)
+    try:
+        sm_backup_config_to_json(account_names, monitor_names, outputfolder, archive)
+    except ValueError as e:
+        app.logger.error(str(e))
+        sys.exit(1)
+
+
+@manager.option('-a', '--accounts', dest='accounts', type=unicode, default=u'all')
+@manager.option('-m', '--monitors', dest='monitors', type=unicode, default=u'all')
+@manager.option('-o', '--outputfolder', dest='outputfolder', type=unicode, default=u'snapshot')
+@manager.option('-f', '--format', dest='fmt', type=unicode, default=u'ndjson')
+def export_snapshot(accounts, monitors, outputfolder, fmt):
+    """ Exports the latest revision of every item to part files. Run again to resume. """
+    monitor_names = _parse_tech_names(monitors) if monitors != 'all' else None
+    account_names = _parse_accounts(accounts) if accounts != 'all' else None
+    try:
+        manifest = sm_export_snapshot(outputfolder, account_names, monitor_names, fmt)
+    except ValueError as e:
+        app.logger.error(str(e))
+        sys.exit(1)
+    app.logger.info("{} records in {} parts in {}".format(
+        manifest['records'], len(manifest['parts']), outputfolder))
+
+
+@manager.option('-s', '--source', dest='source', type=unicode, required=True)
+@manager.option('-a', '--accounts', dest='accounts', type=unicode, default=u'all')
+@manager.option('-l', '--lookback', dest='lookback', type=int, default=None)
+def process_cloudtrail(source, accounts, lookback):
+    """ Re-slurps only the items modified by CloudTrail events in a file, directory or s3://bucket/prefix. """
+    account_names = _parse_accounts(accounts)
+    since = None
+    if lookback:
+        since = datetime.utcnow() - timedelta(minutes=lookback)
+    sm_process_cloudtrail_events(source, account_names=account_names, since=since)
+
+
+@manager.option('-a', '--accounts', dest='accounts', type=unicode, default=u'all')
+def refresh_regions(accounts):
+    """ Rediscovers the regions enabled in each account. """
+    account_names = _parse_accounts(accounts)
+    for account_name in account_names:
+        try:
+            regions = sm_refresh_regions(account_name)
+            app.logger.info("{}: {}".format(account_name, ", ".join(regions)))
+        except Exception as e:
+            app.logger.error("Couldn't refresh the regions of {}: {}".format(account_name, e))
 
 
 @manager.command
@@ -116,7 +165,7 @@ def amazon_accounts():
     """ Pre-populates standard AWS owned accounts """
     import os
     import json
-    from security_monkey.datastore import Account
+    from security_monkey.datastore import Account, bump_data_version
 
     data_file = os.path.join(os.path.dirname(__file__), "data", "aws_accounts.json")
     data = json.load(open(data_file, 'r'))
@@ -142,6 +191,7 @@ def amazon_accounts():
                 db.session.add(account)
 
         db.session.commit()
+        bump_data_version()
         app.logger.info('Finished adding Amazon owned accounts')
     except Exception as e:
         app.logger.exception("An error occured while adding accounts")
@@ -0,0 +1,24 @@
+"""Stores itemrevision.config as jsonb, with a GIN index for containment queries
+
+Revision ID: a37c3e1f6d54
+Revises: 8d1e4c7a2b90
+Create Date: 2016-09-19 11:05:37.621944
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'a37c3e1f6d54'
+down_revision = '8d1e4c7a2b90'
+
+from alembic import op
+
+
+def upgrade():
+    # Rewrites the table; expect this to take a while on large installations.
+    op.execute("ALTER TABLE itemrevision ALTER COLUMN config TYPE JSONB USING config::jsonb")
+    op.execute("CREATE INDEX ix_itemrevision_config ON itemrevision USING gin (config jsonb_path_ops)")
+
+
+def downgrade():
+    op.drop_index('ix_itemrevision_config', table_name='itemrevision')
+    op.execute("ALTER TABLE itemrevision ALTER COLUMN config TYPE JSON USING config::json")
@@ -0,0 +1,22 @@
+"""Adds data_version_seq, which tells the API response cache that the data has changed
+
+Revision ID: c5e1f0a94b27
+Revises: a37c3e1f6d54
+Create Date: 2016-09-21 15:42:10.183265
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'c5e1f0a94b27'
+down_revision = 'a37c3e1f6d54'
+
+from alembic import op
+from sqlalchemy.schema import Sequence, CreateSequence, DropSequence
+
+
+def upgrade():
+    op.execute(CreateSequence(Sequence('data_version_seq')))
+
+
+def downgrade():
+    op.execute(DropSequence(Sequence('data_version_seq')))
@@ -130,6 +130,9 @@ api.add_resource(JustifyPostDelete, '/api/1/issues/<int:audit_id>/justification'
 from security_monkey.views.logout import Logout
 api.add_resource(Logout, '/api/1/logout')
 
+from security_monkey.views.query import ConfigQuery
+api.add_resource(ConfigQuery, '/api/1/query')
+
 from security_monkey.views.revision import RevisionList
 from security_monkey.views.revision import RevisionGet
 api.add_resource(RevisionList, '/api/1/revisions')
@@ -26,7 +26,8 @@ import datastore
 from security_monkey import app, db
 from security_monkey.watcher import ChangeItem
 from security_monkey.common.jinja import get_jinja_env
-from security_monkey.datastore import User, AuditorSettings, Item, ItemAudit, Technology, Account
+from security_monkey.datastore import User, AuditorSettings, Item, ItemAudit, Technology, Account, update_item_summary
+from security_monkey.datastore import bump_data_version
 from security_monkey.common.utils import send_email
 
 from sqlalchemy import and_
@@ -214,8 +215,16 @@ class Auditor(object):
                     item.confirmed_fixed_issues.append(old_issue)
                     db.session.delete(old_issue)
 
+        # Items the watcher hasn't saved yet have no revisions to summarise; their
+        # summary is made when Datastore.store saves them.
+        for item in self.items:
+            if item.db_item.id:
+                update_item_summary(item.db_item)
+
         db.session.commit()
         self._create_auditor_settings()
+        # After the auditor settings, or ?enabledonly=true would cache the new issues' absence.
+        bump_data_version()
 
     def email_report(self, report):
         """
@@ -19,29 +19,54 @@
 .. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
 
 """
-from security_monkey.monitors import get_monitors
+from security_monkey.watcher import watcher_registry
 from security_monkey.datastore import Item, ItemRevision, Account, Technology
+from security_monkey import app, db
+
+from joblib import Parallel, delayed
+from StringIO import StringIO
 import json
 import os
+import tarfile
+import time
+import zipfile
+
+
+ARCHIVE_FORMATS = ['tar', 'zip']
+MANIFEST_FILE = 'manifest.json'
+
+# Configs loaded, and written, at a time.
+BACKUP_BATCH_SIZE = 500
+
+
+def backup_config_to_json(account_names, monitor_names, output_folder, archive=None):
+    """
+    Saves the latest config of every item of the accounts and monitors to
+    output_folder/<account>/<technology>/<name>.json.
+
+    The durable hash of each file is kept in output_folder/manifest.json, and a file
+    is only written again once the item's durable hash has changed, so changes to
+    ephemeral fields alone don't rewrite it.  The files are written by
+    BACKUP_THREADS threads (default: 8).
 
-def backup_config_to_json(account_names, monitor_names, output_folder):
-    monitors = get_monitors(account_names, monitor_names)
-    for monitor in monitors:
-        for account in account_names:
-            _backup_items_in_account(account, monitor, output_folder)
+    :param archive: 'tar' or 'zip' to write a full backup to a single
+        output_folder.tar.gz or output_folder.zip instead.
+    Raises ValueError for an unknown monitor or archive format.
+    """
+    if archive and archive not in ARCHIVE_FORMATS:
+        raise ValueError("Unknown archive format: {}".format(archive))
 
-def _backup_items_in_account(account_name, monitor, output_folder):
-    technology_name = monitor.watcher.index
-    query = Item.query
-    query = query.join((Account, Account.id==Item.account_id))
-    query = query.join((Technology, Technology.id==Item.tech_id))
-    query = query.filter(Account.name == account_name)
-    query = query.filter(Technology.name == technology_name)
-    items_to_backup = query.all()
+    unknown = [monitor_name for monitor_name in monitor_names if monitor_name not in watcher_registry]
+    if unknown:
+        raise ValueError("Unknown monitor: {}".format(", ".join(unknown)))
+    technology_names = [watcher_registry[monitor_name].index for monitor_name in monitor_names]
+    if not account_names or not technology_names:
+        return
 
-    for item in items_to_backup:
-        latest_revision = ItemRevision.query.filter(ItemRevision.id==item.latest_revision_id).first()
-        _serialize_item_to_file(item, latest_revision, output_folder, account_name, technology_name)
+    if archive:
+        _backup_to_archive(account_names, technology_names, output_folder, archive)
+    else:
+        _backup_to_folder(account_names, technology_names, output_folder)
 
 
 def standardize_name(name):
@@ -50,18 +75,115 @@ def standardize_name(name):
     return name.replace('/', '_') if name else 'no_name.json'
 
 
-def _serialize_item_to_file(item, latest_revision, output_folder, account_name, technology_name):
-    output_folder = "{0}/{1}/{2}".format(
-        output_folder,
-        account_name,
-        technology_name
-    )
+def _backup_path(account_name, technology_name, item_name):
+    return "{0}/{1}/{2}.json".format(account_name, technology_name, standardize_name(item_name))
+
+
+def _latest_items(account_names, technology_names):
+    """
+    The backup path, item id and durable hash of every item to back up.  Where items
+    share a path, as items of the same name in different regions do, the newest wins.
+    """
+    query = db.session.query(Item.id, Account.name, Technology.name, Item.name, Item.latest_revision_durable_hash)
+    query = query.join((Account, Account.id == Item.account_id))
+    query = query.join((Technology, Technology.id == Item.tech_id))
+    query = query.filter(Account.name.in_(account_names))
+    query = query.filter(Technology.name.in_(technology_names))
+    query = query.filter(Item.latest_revision_id != None)
+
+    items = {}
+    for item_id, account_name, technology_name, item_name, durable_hash in query.order_by(Item.id):
+        items[_backup_path(account_name, technology_name, item_name)] = (item_id, durable_hash)
+    return items
+
+
+def _latest_configs(item_ids):
+    """
+    Yields lists of (item id, config) for the latest revisions of the items, so only
+    one batch of configs is in memory at a time.
+    """
+    for start in range(0, len(item_ids), BACKUP_BATCH_SIZE):
+        query = db.session.query(Item.id, ItemRevision.config)
+        query = query.join((ItemRevision, ItemRevision.id == Item.latest_revision_id))
+        yield query.filter(Item.id.in_(item_ids[start:start + BACKUP_BATCH_SIZE])).all()
+
+
+def _read_manifest(output_folder):
+    path = os.path.join(output_folder, MANIFEST_FILE)
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as manifest_file:
+        return json.load(manifest_file)
+
+
+def _write_manifest(output_folder, manifest):
+    path = os.path.join(output_folder, MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    os.rename(path + '.tmp', path)
+
+
+def _serialize_config_to_file(config, output_file):
+    output_folder = os.path.dirname(output_file)
     if not os.path.isdir(output_folder):
-        os.makedirs(output_folder, mode=0o777)
-    output_file = "{0}/{1}.json".format(
-        output_folder,
-        standardize_name(item.name)
-    )
-    print "Writing {0} to {1}".format(item.name, output_file)
+        try:
+            os.makedirs(output_folder, mode=0o777)
+        except OSError:
+            # Another thread got there first.
+            if not os.path.isdir(output_folder):
+                raise
     with open(output_file, 'w') as output:
-        output.write(json.dumps(latest_revision.config, indent=2))
+        output.write(json.dumps(config, indent=2))
+
+
+def _backup_to_folder(account_names, technology_names, output_folder):
+    manifest = _read_manifest(output_folder)
+
+    changed = {}
+    for path, (item_id, durable_hash) in _latest_items(account_names, technology_names).items():
+        if durable_hash and manifest.get(path) == durable_hash and \
+                os.path.isfile(os.path.join(output_folder, path)):
+            continue
+        changed[item_id] = (path, durable_hash)
+    app.logger.info("Backing up {} changed items to {}".format(len(changed), output_folder))
+
+    threads = app.config.get('BACKUP_THREADS', 8)
+    for batch in _latest_configs(sorted(changed)):
+        Parallel(n_jobs=threads, backend="threading")(
+            delayed(_serialize_config_to_file)(config, os.path.join(output_folder, changed[item_id][0]))
+            for item_id, config in batch
+        )
+        for item_id, _ in batch:
+            path, durable_hash = changed[item_id]
+            manifest[path] = durable_hash
+        # Saved after every batch, so an interrupted backup keeps the files it wrote.
+        _write_manifest(output_folder, manifest)
+
+
+def _backup_to_archive(account_names, technology_names, output_folder, archive):
+    items = _latest_items(account_names, technology_names)
+    paths = {item_id: path for path, (item_id, _) in items.items()}
+    batches = _latest_configs(sorted(paths))
+
+    parent_folder = os.path.dirname(output_folder)
+    if parent_folder and not os.path.isdir(parent_folder):
+        os.makedirs(parent_folder, mode=0o777)
+
+    if archive == 'zip':
+        archive_file = output_folder + '.zip'
+        with zipfile.ZipFile(archive_file + '.tmp', 'w', zipfile.ZIP_DEFLATED) as output:
+            for batch in batches:
+                for item_id, config in batch:
+                    output.writestr(paths[item_id], json.dumps(config, indent=2))
+    else:
+        archive_file = output_folder + '.tar.gz'
+        with tarfile.open(archive_file + '.tmp', 'w:gz') as output:
+            for batch in batches:
+                for item_id, config in batch:
+                    data = json.dumps(config, indent=2)
+                    info = tarfile.TarInfo(paths[item_id])
+                    info.size = len(data)
+                    info.mtime = time.time()
+                    output.addfile(info, StringIO(data))
+    os.rename(archive_file + '.tmp', archive_file)
+    app.logger.info("Backed up {} items to {}".format(len(paths), archive_file))
@@ -0,0 +1,369 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.cloudtrail
+    :platform: Unix
+    :synopsis: Reads CloudTrail events, re-slurps only the items touched by mutating
+    API calls and records the events as CloudTrailEntry rows against the new revisions.
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey import app, db
+from security_monkey.datastore import Account, CloudTrailEntry, Item, Technology
+from security_monkey.monitors import get_monitors
+
+from collections import defaultdict
+from StringIO import StringIO
+import datetime
+import gzip
+import json
+import os
+
+
+def _bucket_name(params, response):
+    return params.get('bucketName')
+
+
+def _group_id(params, response):
+    return params.get('groupId') or response.get('groupId')
+
+
+def _user_name(params, response):
+    return params.get('userName')
+
+
+def _role_name(params, response):
+    return params.get('roleName')
+
+
+def _group_name(params, response):
+    return params.get('groupName')
+
+
+def _load_balancer_name(params, response):
+    return params.get('loadBalancerName')
+
+
+def _queue_name(params, response):
+    if params.get('queueName'):
+        return params.get('queueName')
+    queue_url = params.get('queueUrl') or response.get('queueUrl')
+    if queue_url:
+        return queue_url.rstrip('/').split('/')[-1]
+
+
+def _topic_name(params, response):
+    if params.get('name'):
+        return params.get('name')
+    arn = params.get('topicArn') or response.get('topicArn')
+    if not arn and params.get('subscriptionArn'):
+        # arn:aws:sns:us-east-1:012345678910:topic-name:subscription-id
+        arn = params.get('subscriptionArn').rsplit(':', 1)[0]
+    if arn:
+        return arn.split(':')[5]
+
+
+def _event_map(*entries):
+    """
+    Builds {event_name: [(technology, name_function), ...]} from
+    (technology, name_function, [event_name, ...]) entries.
+    """
+    event_map = defaultdict(list)
+    for tech, name_function, event_names in entries:
+        for event_name in event_names:
+            event_map[event_name].append((tech, name_function))
+    return dict(event_map)
+
+
+# Mutating API calls, keyed on CloudTrail eventSource and eventName.
+CLOUDTRAIL_EVENT_MAP = {
+    's3.amazonaws.com': _event_map(
+        ('s3', _bucket_name, [
+            'CreateBucket', 'DeleteBucket', 'PutBucketAcl', 'PutBucketPolicy', 'DeleteBucketPolicy',
+            'PutBucketTagging', 'DeleteBucketTagging', 'PutBucketVersioning', 'PutBucketLifecycle',
+            'DeleteBucketLifecycle', 'PutBucketLogging'])
+    ),
+    'ec2.amazonaws.com': _event_map(
+        ('securitygroup', _group_id, [
+            'CreateSecurityGroup', 'DeleteSecurityGroup', 'AuthorizeSecurityGroupIngress',
+            'AuthorizeSecurityGroupEgress', 'RevokeSecurityGroupIngress', 'RevokeSecurityGroupEgress'])
+    ),
+    'iam.amazonaws.com': _event_map(
+        ('iamuser', _user_name, [
+            'CreateUser', 'DeleteUser', 'UpdateUser', 'PutUserPolicy', 'DeleteUserPolicy', 'AttachUserPolicy',
+            'DetachUserPolicy', 'CreateAccessKey', 'DeleteAccessKey', 'UpdateAccessKey', 'CreateLoginProfile',
+            'DeleteLoginProfile', 'UpdateLoginProfile', 'EnableMFADevice', 'DeactivateMFADevice',
+            'UploadSigningCertificate', 'DeleteSigningCertificate', 'UpdateSigningCertificate',
+            'AddUserToGroup', 'RemoveUserFromGroup']),
+        ('iamrole', _role_name, [
+            'CreateRole', 'DeleteRole', 'PutRolePolicy', 'DeleteRolePolicy', 'AttachRolePolicy',
+            'DetachRolePolicy', 'UpdateAssumeRolePolicy', 'AddRoleToInstanceProfile',
+            'RemoveRoleFromInstanceProfile']),
+        ('iamgroup', _group_name, [
+            'CreateGroup', 'DeleteGroup', 'UpdateGroup', 'PutGroupPolicy', 'DeleteGroupPolicy',
+            'AttachGroupPolicy', 'DetachGroupPolicy', 'AddUserToGroup', 'RemoveUserFromGroup'])
+    ),
+    'elasticloadbalancing.amazonaws.com': _event_map(
+        ('elb', _load_balancer_name, [
+            'CreateLoadBalancer', 'DeleteLoadBalancer', 'CreateLoadBalancerListeners',
+            'DeleteLoadBalancerListeners', 'CreateLoadBalancerPolicy', 'DeleteLoadBalancerPolicy',
+            'SetLoadBalancerPoliciesOfListener', 'SetLoadBalancerPoliciesForBackendServer',
+            'SetLoadBalancerListenerSSLCertificate', 'ApplySecurityGroupsToLoadBalancer',
+            'AttachLoadBalancerToSubnets', 'DetachLoadBalancerFromSubnets',
+            'ModifyLoadBalancerAttributes', 'ConfigureHealthCheck'])
+    ),
+    'sqs.amazonaws.com': _event_map(
+        ('sqs', _queue_name, ['CreateQueue', 'DeleteQueue', 'SetQueueAttributes', 'AddPermission',
+                              'RemovePermission'])
+    ),
+    'sns.amazonaws.com': _event_map(
+        ('sns', _topic_name, ['CreateTopic', 'DeleteTopic', 'SetTopicAttributes', 'Subscribe', 'Unsubscribe',
+                              'AddPermission', 'RemovePermission'])
+    )
+}
+
+# Technologies whose items are not regional.
+UNIVERSAL_TECHNOLOGIES = ['iamuser', 'iamrole', 'iamgroup']
+
+
+def _load_records(fileobj, filename):
+    """
+    Returns the list of events in a CloudTrail log file.
+    Accepts gzipped files, the {"Records": [...]} format delivered by CloudTrail
+    and a plain list of events.
+    """
+    if filename.endswith('.gz'):
+        fileobj = gzip.GzipFile(fileobj=StringIO(fileobj.read()))
+    data = json.load(fileobj)
+    if isinstance(data, dict):
+        return data.get('Records', [])
+    return data
+
+
+def _read_local_events(path):
+    if os.path.isdir(path):
+        filenames = []
+        for root, dirs, files in os.walk(path):
+            filenames.extend([os.path.join(root, f) for f in files if f.endswith(('.json', '.json.gz'))])
+    else:
+        filenames = [path]
+
+    for filename in sorted(filenames):
+        with open(filename, 'rb') as fileobj:
+            for event in _load_records(fileobj, filename):
+                yield event
+
+
+def _read_s3_events(source, since=None):
+    """
+    Reads CloudTrail log files from s3://bucket/prefix.  The endpoint can point at any
+    S3-compatible store through the CLOUDTRAIL_S3_ENDPOINT configuration option.
+    """
+    import boto3
+    bucket, _, prefix = source[len('s3://'):].partition('/')
+    s3 = boto3.client('s3', endpoint_url=app.config.get('CLOUDTRAIL_S3_ENDPOINT'))
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if since and obj['LastModified'].replace(tzinfo=None) < since:
+                continue
+            body = s3.get_object(Bucket=bucket, Key=obj['Key'])['Body']
+            for event in _load_records(body, obj['Key']):
+                yield event
+
+
+def read_events(source, since=None):
+    """
+    Yields CloudTrail events from a local file, a local directory or an
+    s3://bucket/prefix location.
+    """
+    if source.startswith('s3://'):
+        events = _read_s3_events(source, since=since)
+    else:
+        events = _read_local_events(source)
+
+    for event in events:
+        if since and _event_time(event) < since:
+            continue
+        yield event
+
+
+def _event_time(event):
+    return datetime.datetime.strptime(event.get('eventTime'), '%Y-%m-%dT%H:%M:%SZ')
+
+
+def _find_item(tech, account, region=None, name=None, name_like=None):
+    query = Item.query.join((Technology, Item.tech_id == Technology.id)) \
+        .join((Account, Item.account_id == Account.id)) \
+        .filter(Technology.name == tech) \
+        .filter(Account.name == account)
+    if region:
+        query = query.filter(Item.region == region)
+    if name:
+        query = query.filter(Item.name == name)
+    if name_like:
+        query = query.filter(Item.name.like(name_like))
+    return query.first()
+
+
+def _resolve_location(tech, account, region, name):
+    """
+    Turns the identifier found in an event into a watcher location.
+
+    Security groups are stored as "name (sg-id in vpc-id)", so the id is looked up against
+    existing items.  When a group has not been seen yet, the location is widened to
+    (index, account, region) and the whole region is re-slurped.  S3 buckets are stored
+    under their bucket location, which may differ from the region of the API endpoint.
+    """
+    if tech in UNIVERSAL_TECHNOLOGIES:
+        return tech, account, 'universal', name
+
+    if tech == 'securitygroup':
+        item = _find_item(tech, account, region=region, name_like='% ({}%'.format(name))
+        if not item:
+            return tech, account, region
+        return tech, account, region, item.name
+
+    if tech == 's3':
+        item = _find_item(tech, account, name=name)
+        if item:
+            region = item.region
+
+    return tech, account, region, name
+
+
+def locations_for_event(event, account_name):
+    """
+    Maps a CloudTrail event to the watcher locations it modifies.
+    :return: list of (index, account, region, name) or (index, account, region) tuples.
+        Empty when the event is read-only, failed or not tracked.
+    """
+    if event.get('errorCode') or event.get('readOnly'):
+        return []
+
+    handlers = CLOUDTRAIL_EVENT_MAP.get(event.get('eventSource'), {}).get(event.get('eventName'), [])
+    params = event.get('requestParameters') or {}
+    response = event.get('responseElements') or {}
+
+    locations = []
+    for tech, name_function in handlers:
+        name = name_function(params, response)
+        if not name:
+            continue
+        locations.append(_resolve_location(tech, account_name, event.get('awsRegion'), name))
+    return locations
+
+
+def _record_event(event, location):
+    """
+    Stores the event as a CloudTrailEntry linked to the latest revision
+    of the item at the given location.
+    """
+    item = None
+    if len(location) == 4:
+        item = _find_item(location[0], location[1], region=location[2], name=location[3])
+
+    if not item or not item.latest_revision_id:
+        app.logger.debug("Not recording CloudTrail event {} - no item at {}".format(event.get('eventID'), location))
+        return False
+
+    user_identity = event.get('userIdentity') or {}
+    entry = CloudTrailEntry(event_id=event.get('eventID'),
+                            request_id=event.get('requestID'),
+                            event_source=event.get('eventSource'),
+                            event_name=event.get('eventName'),
+                            event_time=_event_time(event),
+                            request_parameters=event.get('requestParameters'),
+                            responseElements=event.get('responseElements'),
+                            source_ip=event.get('sourceIPAddress'),
+                            user_agent=(event.get('userAgent') or '')[:300],
+                            full_entry=event,
+                            user_identity=user_identity,
+                            user_identity_arn=user_identity.get('arn'),
+                            revision_id=item.latest_revision_id,
+                            item_id=item.id)
+    db.session.add(entry)
+    return True
+
+
+def process_cloudtrail_events(source, account_names=None, since=None, debug=False):
+    """
+    Re-slurps only the items modified by the CloudTrail events found in source.
+    Periodic full sweeps are still required to pick up anything CloudTrail does not report.
+
+    :param source: Local file or directory, or s3://bucket/prefix.
+    :param account_names: Optional list of account names to restrict processing to.
+    :param since: Optional naive UTC datetime.  Older events are skipped.
+    :return: Number of CloudTrailEntry rows recorded.
+    """
+    query = Account.query.filter(Account.third_party == False).filter(Account.active == True)  # noqa
+    accounts = {account.number: account.name for account in query.all()
+                if not account_names or account.name in account_names}
+
+    events = []
+    for event in read_events(source, since=since):
+        if event.get('eventSource') not in CLOUDTRAIL_EVENT_MAP:
+            continue
+        account_number = event.get('recipientAccountId') or (event.get('userIdentity') or {}).get('accountId')
+        if account_number in accounts:
+            events.append((event, accounts[account_number]))
+
+    event_ids = [event.get('eventID') for event, _ in events]
+    seen = set()
+    if event_ids:
+        seen = set(entry.event_id for entry in
+                   CloudTrailEntry.query.filter(CloudTrailEntry.event_id.in_(event_ids)).all())
+
+    pending = defaultdict(set)
+    new_events = []
+    for event, account_name in events:
+        if event.get('eventID') in seen:
+            continue
+        seen.add(event.get('eventID'))
+        locations = locations_for_event(event, account_name)
+        for location in locations:
+            pending[location[0]].add(location)
+        if locations:
+            new_events.append((event, account_name))
+
+    app.logger.info("Found {} CloudTrail events touching {} technologies.".format(
+        len(new_events), len(pending)))
+
+    for tech, locations in pending.items():
+        tech_accounts = sorted(set([location[1] for location in locations]))
+        for monitor in get_monitors(tech_accounts, [tech], debug):
+            watcher = monitor.watcher
+            locations = list(locations)
+            items, exception_map = watcher.slurp_items(locations)
+            watcher.find_changes(current=items, exception_map=exception_map, locations=locations)
+            watcher.save()
+
+            changed_items = watcher.created_items + watcher.changed_items
+            for auditor in monitor.auditors:
+                auditor.audit_these_objects(changed_items)
+                auditor.save_issues()
+
+    # Resolve again now that newly created items have been stored.
+    recorded = 0
+    for event, account_name in new_events:
+        for location in locations_for_event(event, account_name):
+            if _record_event(event, location):
+                recorded += 1
+                break
+    db.session.commit()
+
+    app.logger.info("Recorded {} CloudTrail entries.".format(recorded))
+    return recorded
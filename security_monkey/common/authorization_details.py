@@ -0,0 +1,181 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.authorization_details
+    :platform: Unix
+    :synopsis: Downloads the users, groups, roles and managed policies of an account with
+        one paginated GetAccountAuthorizationDetails call, shared by the IAM watchers.
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey import app
+
+from datetime import datetime, timedelta
+import json
+import threading
+import urllib
+
+
+# account name => (downloaded at, AuthorizationDetails)
+_cache = {}
+_cache_lock = threading.Lock()
+_account_locks = {}
+
+
+def policy_document(document):
+    """
+    boto3 returns policy documents already decoded, but the API sends them url-encoded.
+    """
+    if isinstance(document, basestring):
+        return json.loads(urllib.unquote(document))
+    return document
+
+
+class AuthorizationDetails(object):
+    """
+    The GetAccountAuthorizationDetails response for one account, with the
+    lookups the IAM watchers need.
+    """
+    def __init__(self, users=None, groups=None, roles=None, policies=None):
+        self.users = users or []
+        self.groups = groups or []
+        self.roles = roles or []
+        self.policies = policies or []
+
+        # policy arn => {'users': [arn, ...], 'groups': [...], 'roles': [...]}
+        attachments = {}
+        for entity_type, entities in [('users', self.users), ('groups', self.groups), ('roles', self.roles)]:
+            for entity in entities:
+                for attached in entity.get('AttachedManagedPolicies', []):
+                    policy_attachments = attachments.setdefault(
+                        attached['PolicyArn'], {'users': [], 'groups': [], 'roles': []})
+                    policy_attachments[entity_type].append(entity['Arn'])
+        self.attachments = attachments
+
+        # entity arn => [{'name', 'arn', 'version'}, ...], in the order the policies are listed
+        managed_policies = {}
+        for policy in self.policies:
+            policy_attachments = attachments.get(policy['Arn'], {})
+            for entity_arn in sum(policy_attachments.values(), []):
+                managed_policies.setdefault(entity_arn, []).append({
+                    "name": policy['PolicyName'],
+                    "arn": policy['Arn'],
+                    "version": policy['DefaultVersionId']
+                })
+        self._managed_policies = managed_policies
+
+        # group name => [user, ...]
+        group_users = {}
+        for user in self.users:
+            for group_name in user.get('GroupList', []):
+                group_users.setdefault(group_name, []).append(user)
+        self._group_users = group_users
+
+    def users_by_name(self):
+        return {user['UserName']: user for user in self.users}
+
+    def groups_by_name(self):
+        return {group['GroupName']: group for group in self.groups}
+
+    def policies_by_arn(self):
+        return {policy['Arn']: policy for policy in self.policies}
+
+    def managed_policies(self, arn):
+        """
+        :returns: the managed policies attached to the user, group or role with this arn.
+        """
+        return self._managed_policies.get(arn, [])
+
+    def group_users(self, group_name):
+        return self._group_users.get(group_name, [])
+
+    def policy_attachments(self, policy_arn):
+        return self.attachments.get(policy_arn, {'users': [], 'groups': [], 'roles': []})
+
+    @staticmethod
+    def inline_policies(entity, key):
+        """
+        :param key: UserPolicyList, GroupPolicyList or RolePolicyList
+        :returns: dict of policy name => policy document
+        """
+        return {policy['PolicyName']: policy_document(policy['PolicyDocument'])
+                for policy in entity.get(key, [])}
+
+    @staticmethod
+    def default_version_document(policy):
+        for version in policy.get('PolicyVersionList', []):
+            if version.get('IsDefaultVersion'):
+                return policy_document(version['Document'])
+        return None
+
+
+def _download(watcher, account):
+    from security_monkey.common.sts_connect import connect
+    client = connect(account, 'boto3.iam.client')
+
+    details = {'UserDetailList': [], 'GroupDetailList': [], 'RoleDetailList': [], 'Policies': []}
+    for response in watcher.iter_pages(client.get_account_authorization_details, truncated_key='IsTruncated'):
+        for key in details:
+            details[key].extend(response.get(key, []))
+
+    app.logger.debug("Downloaded authorization details of {} users, {} groups, {} roles and {} policies in {}".format(
+        len(details['UserDetailList']), len(details['GroupDetailList']), len(details['RoleDetailList']),
+        len(details['Policies']), account))
+
+    return AuthorizationDetails(users=details['UserDetailList'], groups=details['GroupDetailList'],
+                                roles=details['RoleDetailList'], policies=details['Policies'])
+
+
+def get_authorization_details(watcher, account):
+    """
+    Returns the AuthorizationDetails of the account.  The download is shared by the
+    IAM user, group, role and managed policy watchers, which run back to back, and is
+    kept for IAM_AUTHORIZATION_DETAILS_TTL minutes.
+
+    :param watcher: the calling watcher, whose rate limiting is applied to each page.
+    """
+    ttl = timedelta(minutes=app.config.get('IAM_AUTHORIZATION_DETAILS_TTL', 5))
+
+    with _cache_lock:
+        account_lock = _account_locks.setdefault(account, threading.Lock())
+
+    # Only one watcher downloads an account at a time; the others wait for its result.
+    with account_lock:
+        now = datetime.utcnow()
+        cached = _cache.get(account)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+
+        details = _download(watcher, account)
+
+        with _cache_lock:
+            for cached_account in _cache.keys():
+                if now - _cache[cached_account][0] >= ttl:
+                    del _cache[cached_account]
+            _cache[account] = (now, details)
+
+        return details
+
+
+def clear_authorization_details(account=None):
+    """
+    Drops the cached details of the account, or of every account.
+    """
+    with _cache_lock:
+        if account:
+            _cache.pop(account, None)
+        else:
+            _cache.clear()
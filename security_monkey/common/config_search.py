@@ -0,0 +1,87 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.config_search
+    :platform: Unix
+    :synopsis: Flattens the latest config of each item into the text of the item_config_search
+        table, and turns searchconfig queries into filters on its trigram index.
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.datastore import ItemConfigSearch
+
+from sqlalchemy import and_, or_
+import json
+import shlex
+
+
+def config_search_text(config):
+    """
+    One lowercase line per value in the config, as /path/to/key=value.  List
+    indexes are left out of the paths, so every element of a list shares its path:
+
+        {"rules": [{"FromPort": 22}]}  =>  /rules/fromport=22
+    """
+    lines = []
+
+    def walk(value, path):
+        if isinstance(value, dict):
+            for key in sorted(value):
+                walk(value[key], u'{}/{}'.format(path, key))
+        elif isinstance(value, (list, tuple)):
+            for element in value:
+                walk(element, path)
+        else:
+            if not isinstance(value, basestring):
+                value = json.dumps(value)
+            lines.append(u'{}={}\n'.format(path, value))
+
+    walk(config, u'')
+    return u''.join(lines).lower()
+
+
+def _like_escape(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def config_search_filter(searchconfig):
+    """
+    A filter on ItemConfigSearch matching every whitespace separated term of the
+    query.  Terms may be quoted to include spaces.  Matching ignores case.
+
+        sg-1234           - appears anywhere in a key or value
+        fromport:22       - a key named fromport whose value is 22.  Terms like
+                            arn:aws:iam::012345678910 also match as plain text.
+    """
+    try:
+        terms = shlex.split(searchconfig)
+    except ValueError:
+        # Unbalanced quotes
+        terms = searchconfig.split()
+
+    clauses = []
+    for term in terms:
+        term = term.lower()
+        anywhere = ItemConfigSearch.config_text.like(u'%{}%'.format(_like_escape(term)))
+
+        key, _, value = term.partition(':')
+        if key and value and '/' not in key:
+            key_value = ItemConfigSearch.config_text.like(u'%/{}={}\n%'.format(_like_escape(key), _like_escape(value)))
+            clauses.append(or_(key_value, anywhere))
+        else:
+            clauses.append(anywhere)
+
+    return and_(*clauses)
@@ -0,0 +1,168 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.distinct_index
+    :platform: Unix
+    :synopsis: An in-memory index of the technology, account, region, name and arn of
+        every item, which serves the distinct values for the search autocompletion.
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.datastore import Item, Account, Technology, ItemSummary, get_data_version
+from security_monkey import app, db
+
+from datetime import datetime, timedelta
+import threading
+
+
+DIMENSIONS = ['tech', 'account', 'region', 'name', 'arn']
+
+_index = None
+_index_lock = threading.Lock()
+
+
+class DistinctIndex(object):
+    """
+    The dimensions of every item, one row per item, with the rows of each value.
+    It is built once and never changed, so requests can share it without locking.
+    """
+    def __init__(self, rows, version=None):
+        """
+        :param rows: (item id, technology, account, third party, region, name, arn, active) tuples
+        """
+        self.version = version
+        self.built = datetime.utcnow()
+        self.item_ids = []
+        self.columns = {dimension: [] for dimension in DIMENSIONS}
+        # dimension => value => set of row numbers
+        self.postings = {dimension: {} for dimension in DIMENSIONS}
+        # dimension => value => the lowest id of the items with the value
+        self.first_item_ids = {dimension: {} for dimension in DIMENSIONS}
+        self.third_party = set()
+        self.active = {True: set(), False: set()}
+        self.lower = {}
+        # dimension => [(lowercase value, value), ...] in value order
+        self.sorted_values = {}
+
+        for number, (item_id, tech, account, third_party, region, name, arn, active) in enumerate(rows):
+            self.item_ids.append(item_id)
+            for dimension, value in zip(DIMENSIONS, [tech, account, region, name, arn]):
+                self.columns[dimension].append(value)
+                if value is None:
+                    continue
+                self.postings[dimension].setdefault(value, set()).add(number)
+                self.first_item_ids[dimension].setdefault(value, item_id)
+                if value not in self.lower:
+                    self.lower[value] = value.lower()
+            if third_party:
+                self.third_party.add(number)
+            if active is not None:
+                self.active[active].add(number)
+
+        for dimension in DIMENSIONS:
+            self.sorted_values[dimension] = [(self.lower[value], value)
+                                             for value in sorted(self.postings[dimension])]
+
+    def _matching_rows(self, filters, active=None, third_party=True):
+        """
+        :returns: the set of matching row numbers, or None when every row matches.
+        """
+        rows = None
+        for dimension, values in filters.items():
+            matching = set()
+            for value in values:
+                matching |= self.postings[dimension].get(value, set())
+            rows = matching if rows is None else rows & matching
+        if active is not None:
+            rows = set(self.active[active]) if rows is None else rows & self.active[active]
+        if not third_party and self.third_party:
+            rows = set(range(len(self.item_ids))) if rows is None else rows
+            rows -= self.third_party
+        return rows
+
+    def values(self, dimension, filters=None, search=None, active=None, third_party=True):
+        """
+        The distinct values of the dimension among the items matching every filter.
+
+        :param filters: dimension => list of values, any of which may match.
+        :param search: only values containing this, ignoring case.
+        :param active: only items whose latest revision is active (True) or not (False).
+        :param third_party: whether to count the items of third party accounts.
+        :returns: sorted list of values
+        """
+        rows = self._matching_rows(filters or {}, active, third_party)
+        search = search.lower() if search else None
+
+        if rows is None:
+            if search:
+                return [value for lower, value in self.sorted_values[dimension] if search in lower]
+            return [value for _, value in self.sorted_values[dimension]]
+
+        column = self.columns[dimension]
+        values = set(column[row] for row in rows)
+        values.discard(None)
+        if search:
+            values = [value for value in values if search in self.lower[value]]
+        return sorted(values)
+
+    def item_id(self, dimension, value):
+        """
+        The id of an item with this value, which select2 uses as the id of the choice.
+        """
+        return self.first_item_ids[dimension].get(value)
+
+
+def _build(version):
+    query = db.session.query(Item.id, Technology.name, Account.name, Account.third_party,
+                             Item.region, Item.name, Item.arn, ItemSummary.active)
+    query = query.join((Technology, Technology.id == Item.tech_id))
+    query = query.join((Account, Account.id == Item.account_id))
+    query = query.outerjoin((ItemSummary, ItemSummary.item_id == Item.id))
+    rows = query.order_by(Item.id).all()
+
+    app.logger.debug("Built the distinct index of {} items at data version {}".format(len(rows), version))
+    return DistinctIndex(rows, version=version)
+
+
+def get_distinct_index():
+    """
+    The index of the current data.  When the data version has moved on, the index is
+    rebuilt, but at most every DISTINCT_INDEX_REFRESH seconds (default: 30), so that a
+    running watcher, which moves the version with every item it stores, doesn't keep
+    the API rebuilding it.
+    """
+    global _index
+    refresh = timedelta(seconds=app.config.get('DISTINCT_INDEX_REFRESH', 30))
+
+    index = _index
+    if index and (datetime.utcnow() - index.built < refresh):
+        return index
+
+    version = get_data_version()
+    if index and index.version == version:
+        return index
+
+    # Only one request rebuilds; the others wait for it.
+    with _index_lock:
+        if _index is index:
+            _index = _build(version)
+        return _index
+
+
+def clear_distinct_index():
+    global _index
+    with _index_lock:
+        _index = None
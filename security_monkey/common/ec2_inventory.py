@@ -0,0 +1,145 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.ec2_inventory
+    :platform: Unix
+    :synopsis: Describes the instances, tags, VPCs and subnets of an account and region once,
+        for all of the EC2 family watchers running in the same cycle, and indexes the tags by resource.
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey import app
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import threading
+
+
+# (account name, region name) => EC2Inventory, least recently used first
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def index_tags(tags):
+    """
+    :returns: dict of resource id => list of its tags
+    """
+    tag_index = {}
+    for tag in tags:
+        tag_index.setdefault(tag.res_id, []).append(tag)
+    return tag_index
+
+
+class EC2Inventory(object):
+    """
+    The EC2 resources of one account and region.  Each kind of resource is described
+    the first time a watcher asks for it and then kept until the inventory expires.
+    Errors are raised to the calling watcher and nothing is kept.
+    """
+    def __init__(self, account, region):
+        self.account = account
+        self.region = region
+        self.created = datetime.utcnow()
+        self._lock = threading.RLock()
+        self._conn = None
+        self._resources = {}
+
+    def _describe(self, kind, watcher, method_name, **kwargs):
+        with self._lock:
+            if kind not in self._resources:
+                if not self._conn:
+                    from security_monkey.common.sts_connect import connect
+                    self._conn = connect(self.account, 'vpc', region=self.region)
+                self._resources[kind] = watcher.wrap_aws_rate_limited_call(
+                    getattr(self._conn, method_name),
+                    **kwargs
+                )
+                app.logger.debug("Described {} {} in {}/{}".format(
+                    len(self._resources[kind]), kind, self.account, self.region))
+            return self._resources[kind]
+
+    def _derive(self, kind, build):
+        with self._lock:
+            if kind not in self._resources:
+                self._resources[kind] = build()
+            return self._resources[kind]
+
+    def instances(self, watcher):
+        return self._describe('instances', watcher, 'get_only_instances')
+
+    def tags(self, watcher):
+        return self._describe('tags', watcher, 'get_all_tags')
+
+    def tag_index(self, watcher):
+        """
+        :returns: dict of resource id => list of its tags, for every tag in the region.
+        """
+        return self._derive('tag_index', lambda: index_tags(self.tags(watcher)))
+
+    def instance_names(self, watcher):
+        """
+        :returns: dict of instance id => value of its Name tag.  When no watcher has
+            downloaded every tag in the region yet, only the Name tags of instances are requested.
+        """
+        def build():
+            if 'tags' in self._resources:
+                tag_index = self.tag_index(watcher)
+            else:
+                tag_index = index_tags(self._describe('instance_name_tags', watcher, 'get_all_tags',
+                                                      filters={'resource-type': 'instance', 'key': 'Name'}))
+            return {res_id: tag.value for res_id, tags in tag_index.iteritems()
+                    for tag in tags if tag.name == 'Name'}
+
+        return self._derive('instance_names', build)
+
+    def vpcs(self, watcher):
+        return self._describe('vpcs', watcher, 'get_all_vpcs')
+
+    def subnets(self, watcher):
+        return self._describe('subnets', watcher, 'get_all_subnets')
+
+
+def get_ec2_inventory(account, region):
+    """
+    Returns the EC2Inventory for the account and region.  Inventories are kept for
+    EC2_INVENTORY_TTL minutes, and at most EC2_INVENTORY_MAX_ENTRIES of them are held,
+    dropping the least recently used.
+
+    :param region: region name or boto RegionInfo
+    """
+    region = getattr(region, 'name', region)
+    ttl = timedelta(minutes=app.config.get('EC2_INVENTORY_TTL', 5))
+    max_entries = app.config.get('EC2_INVENTORY_MAX_ENTRIES', 100)
+    key = (account, region)
+
+    with _cache_lock:
+        now = datetime.utcnow()
+        for cached_key in _cache.keys():
+            if now - _cache[cached_key].created >= ttl:
+                del _cache[cached_key]
+
+        inventory = _cache.pop(key, None) or EC2Inventory(account, region)
+        _cache[key] = inventory
+
+        while len(_cache) > max_entries:
+            _cache.popitem(last=False)
+
+        return inventory
+
+
+def clear_ec2_inventory():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,159 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.pagination
+    :platform: Unix
+    :synopsis: Keyset pagination for the list endpoints, with totals counted once
+        and cached instead of on every page.
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey import app
+
+from sqlalchemy import and_, or_, tuple_, literal, DateTime
+from datetime import datetime, timedelta
+import base64
+import json
+import threading
+
+
+# query key => (counted at, total)
+_totals = {}
+_totals_lock = threading.Lock()
+
+_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def encode_cursor(values):
+    values = [value.strftime(_DATETIME_FORMAT) if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values))
+
+
+def decode_cursor(cursor, keys):
+    """
+    :param keys: the (column, descending) pairs the cursor was made for.
+    :returns: the values of the keys the previous page ended on.
+    Raises ValueError if the cursor doesn't belong to these keys.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(str(cursor)))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor: {}".format(cursor))
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError("Invalid cursor: {}".format(cursor))
+
+    decoded = []
+    for (column, _), value in zip(keys, values):
+        if isinstance(column.type, DateTime) and value is not None:
+            value = datetime.strptime(value, _DATETIME_FORMAT)
+        decoded.append(value)
+    return decoded
+
+
+def _after_clause(keys, values):
+    """
+    Rows that sort after values.  When every key runs the same way this is a row
+    comparison, which Postgres can serve from an index.  Otherwise it is expanded into
+    (k1 > v1) OR (k1 = v1 AND k2 < v2) OR ...
+    """
+    # Bound explicitly, as SQLAlchemy won't compare a column with a bare True or False.
+    values = [literal(value, column.type) for (column, _), value in zip(keys, values)]
+
+    directions = set(descending for _, descending in keys)
+    if len(directions) == 1:
+        row = tuple_(*[column for column, _ in keys])
+        cursor = tuple_(*values)
+        return row < cursor if directions.pop() else row > cursor
+
+    clauses = []
+    for i, ((column, descending), value) in enumerate(zip(keys, values)):
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*(equal + [column < value if descending else column > value])))
+    return or_(*clauses)
+
+
+def _order_by(query, keys):
+    return query.order_by(*[column.desc() if descending else column.asc() for column, descending in keys])
+
+
+def keyset_page(query, keys, after=None, count=30):
+    """
+    One page of the query, ordered by keys, starting after the cursor returned with
+    the previous page.  Unlike an OFFSET, the cost doesn't grow with the page number.
+
+    :param keys: list of (column, descending) pairs.  The last must be unique, like the
+        primary key, and none may be null.
+    :param after: the cursor of the previous page, or None for the first page.
+    :returns: (rows, cursor of the next page or None on the last page)
+    Raises ValueError for an invalid cursor.
+    """
+    count = max(count, 1)
+    query = _order_by(query, keys)
+    if after:
+        query = query.filter(_after_clause(keys, decode_cursor(after, keys)))
+
+    results = query.add_columns(*[column for column, _ in keys]).limit(count + 1).all()
+
+    next_cursor = None
+    if len(results) > count:
+        results = results[:count]
+        next_cursor = encode_cursor(list(results[-1])[1:])
+
+    return [result[0] for result in results], next_cursor
+
+
+def offset_page(query, keys, page=1, count=30):
+    """
+    The rows of a numbered page, in the same order as keyset_page, for the clients
+    that still page by number.
+    """
+    page = max(page or 1, 1)
+    count = max(count, 1)
+    return _order_by(query, keys).limit(count).offset((page - 1) * count).all()
+
+
+def cached_total(query):
+    """
+    The number of rows of the query.  Counting runs over every matching row, so the
+    total is kept for PAGINATION_TOTAL_TTL minutes (default: 5) and shared by all the
+    pages of the same filters.  It can lag behind new rows by that long.
+    """
+    ttl = timedelta(minutes=app.config.get('PAGINATION_TOTAL_TTL', 5))
+
+    query = query.order_by(None)
+    compiled = query.with_labels().statement.compile()
+    key = (str(compiled), repr(sorted(compiled.params.items())))
+
+    now = datetime.utcnow()
+    with _totals_lock:
+        cached = _totals.get(key)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+
+    total = query.count()
+
+    with _totals_lock:
+        for cached_key in _totals.keys():
+            if now - _totals[cached_key][0] >= ttl:
+                del _totals[cached_key]
+        _totals[key] = (now, total)
+
+    return total
+
+
+def clear_cached_totals():
+    with _totals_lock:
+        _totals.clear()
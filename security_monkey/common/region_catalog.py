@@ -0,0 +1,110 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.region_catalog
+    :platform: Unix
+    :synopsis: Resolves the regions each account has enabled, stores them in the
+        accountregion table and hands them out to the watchers.
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.datastore import Account, AccountRegion
+from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey import app, db
+
+from boto.regioninfo import RegionInfo, load_regions
+from datetime import datetime, timedelta
+import threading
+
+
+_refresh_lock = threading.Lock()
+
+
+def excluded_regions():
+    """
+    Regions no watcher will visit.  Defaults to the regions we can't reach.
+    """
+    return set(app.config.get('EXCLUDED_REGIONS', TROUBLE_REGIONS))
+
+
+def _discover(account):
+    from security_monkey.common.sts_connect import connect
+    ec2 = connect(account, 'ec2')
+    return sorted(region.name for region in ec2.get_all_regions())
+
+
+def refresh_regions(account):
+    """
+    Asks EC2 which regions the account has enabled and replaces the stored list.
+
+    :returns: list of region names
+    """
+    account_db = Account.query.filter(Account.name == account).first()
+    names = _discover(account)
+
+    AccountRegion.query.filter(AccountRegion.account_id == account_db.id).delete()
+    now = datetime.utcnow()
+    for name in names:
+        db.session.add(AccountRegion(account_id=account_db.id, region=name, discovered=now))
+    db.session.commit()
+
+    app.logger.debug("Discovered {} regions in {}".format(len(names), account))
+    return names
+
+
+def enabled_regions(account):
+    """
+    The stored regions of the account, refreshed once they are older than
+    REGION_REFRESH_HOURS (default: 24).  If the refresh fails, the stored
+    regions are used until the next attempt.
+
+    :returns: list of region names
+    """
+    max_age = timedelta(hours=app.config.get('REGION_REFRESH_HOURS', 24))
+
+    # Watchers of the same account start together; only one of them refreshes.
+    with _refresh_lock:
+        account_db = Account.query.filter(Account.name == account).first()
+        stored = AccountRegion.query.filter(AccountRegion.account_id == account_db.id).all()
+        if stored and datetime.utcnow() - min(row.discovered for row in stored) < max_age:
+            return sorted(row.region for row in stored)
+
+        try:
+            return refresh_regions(account)
+        except Exception as e:
+            db.session.rollback()
+            if not stored:
+                raise
+            app.logger.warn("Couldn't refresh the regions of {}, using the stored list: {}".format(account, e))
+            return sorted(row.region for row in stored)
+
+
+def get_regions(account, service=None):
+    """
+    The regions a watcher should visit in the account: the enabled regions, less
+    EXCLUDED_REGIONS, and less the regions boto doesn't know the service in.
+
+    :param service: boto endpoint name, such as 'sqs' or 'elasticloadbalancing'.
+    :returns: list of boto RegionInfo
+    """
+    excluded = excluded_regions()
+    names = [name for name in enabled_regions(account) if name not in excluded]
+
+    endpoints = load_regions().get(service)
+    if endpoints:
+        names = [name for name in names if name in endpoints]
+
+    return [RegionInfo(name=name, endpoint=endpoints.get(name) if endpoints else None) for name in names]
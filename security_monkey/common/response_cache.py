@@ -0,0 +1,114 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.response_cache
+    :platform: Unix
+    :synopsis: Keeps the responses of the read-mostly API lists until a watcher, auditor
+        or user changes the data, and answers repeated requests with 304 Not Modified.
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.datastore import get_data_version
+from security_monkey import app
+
+from flask import request, make_response, g
+from flask_login import current_user
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import threading
+
+
+# (path, query args, role) => (data version, response, status code), least recently used first
+_responses = OrderedDict()
+_responses_lock = threading.Lock()
+
+
+def _request_key():
+    args = sorted((key, value.strip()) for key, values in request.args.lists() for value in values if value.strip())
+    role = current_user.role if current_user.is_authenticated() else None
+    return request.path, tuple(args), role
+
+
+def cached_response(f):
+    """
+    For the GET handlers of an AuthenticatedService.  The response is kept, for every
+    user with the same role and query args, until the data version moves on.  Only the
+    auth block differs between users, and it is filled in for each request.
+
+    Responses carry an ETag of the data version, the request and the user, and a
+    request whose If-None-Match still matches gets a 304 without running the handler.
+    Keeps up to API_RESPONSE_CACHE_SIZE responses (default: 500; 0 keeps none).
+    A handler whose data lags behind reports its version with served_data_version,
+    and its response is only kept once that is the current version.
+    """
+    @wraps(f)
+    def decorated_function(self, *args, **kwargs):
+        version = get_data_version()
+        key = _request_key()
+        user_id = current_user.id if current_user.is_authenticated() else None
+        etag = hashlib.md5(repr((version, key, user_id))).hexdigest()
+        headers = {'ETag': '"{}"'.format(etag), 'Cache-Control': 'no-cache'}
+
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.headers.extend(headers)
+            return response
+
+        with _responses_lock:
+            cached = _responses.pop(key, None)
+            if cached and cached[0] == version:
+                _responses[key] = cached
+            else:
+                cached = None
+
+        if cached:
+            data, code = cached[1], cached[2]
+        else:
+            g.served_data_version = version
+            result = f(self, *args, **kwargs)
+            if not isinstance(result, tuple) or len(result) != 2 or result[1] != 200:
+                return result
+            data, code = result
+
+            if g.served_data_version != version:
+                # Older than the data: neither kept nor given an ETag that would outlive it.
+                return data, code, {'Cache-Control': 'no-cache'}
+
+            size = app.config.get('API_RESPONSE_CACHE_SIZE', 500)
+            with _responses_lock:
+                _responses[key] = (version, data, code)
+                while len(_responses) > size:
+                    _responses.popitem(last=False)
+
+        if 'auth' in data:
+            data = dict(data, auth=self.auth_dict)
+        return data, code, headers
+
+    return decorated_function
+
+
+def served_data_version(version):
+    """
+    For handlers that answer from data which may lag behind the database, like the
+    distinct index: the data version their response reflects.
+    """
+    g.served_data_version = version
+
+
+def clear_cached_responses():
+    with _responses_lock:
+        _responses.clear()
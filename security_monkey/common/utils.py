@@ -102,7 +102,7 @@ def send_email(subject=None, recipients=[], html=""):
 
 
 def add_account(number, third_party, name, s3_name, active, notes, role_name='SecurityMonkey', edit=False):
-    from security_monkey.datastore import Account
+    from security_monkey.datastore import Account, bump_data_version
     ''' Adds an account. If one with the same number already exists, do nothing,
     unless edit is True, in which case, override the existing account. Returns True
     if an action is taken, False otherwise. '''
@@ -123,6 +123,7 @@ def add_account(number, third_party, name, s3_name, active, notes, role_name='Se
     account.third_party = third_party
     db.session.add(account)
     db.session.commit()
+    bump_data_version()
     return True
 
 
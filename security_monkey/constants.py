@@ -20,6 +20,6 @@
 
 """
 
-# SM will not alert on exceptions that occur while attempting to retrieve data
-# from these regions.  In our case, we do not have permissions to these regions.
+# The default for EXCLUDED_REGIONS.  The watchers don't visit these regions,
+# as in our case we do not have permissions to them.
 TROUBLE_REGIONS = ['cn-north-1', 'us-gov-west-1']
@@ -29,12 +29,13 @@ from auth.models import RBACUserMixin
 from security_monkey import db, app
 
 from sqlalchemy.dialects.postgresql import JSON
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Unicode, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Unicode, Text, func
 from sqlalchemy.dialects.postgresql import CIDR
-from sqlalchemy.schema import ForeignKey, UniqueConstraint
+from sqlalchemy.schema import ForeignKey, UniqueConstraint, Sequence
 from sqlalchemy.orm import relationship, backref
 
 from sqlalchemy.orm import deferred
+from sqlalchemy.ext.compiler import compiles
 
 from copy import deepcopy
 import dpath.util
@@ -47,6 +48,19 @@ import hashlib
 import traceback
 
 
+class JSONB(JSON):
+    """
+    Postgres jsonb, which SQLAlchemy 0.9.2 has no type for.  Values are bound and
+    loaded as with JSON; the database stores them parsed, so they can be indexed.
+    """
+    __visit_name__ = 'JSONB'
+
+
+@compiles(JSONB, 'postgresql')
+def _compile_jsonb(type_, compiler, **kw):
+    return "JSONB"
+
+
 association_table = db.Table(
     'association',
     Column('user_id', Integer, ForeignKey('user.id')),
@@ -201,6 +215,85 @@ class Item(db.Model):
     cloudtrail_entries = relationship("CloudTrailEntry", backref="item", cascade="all, delete, delete-orphan", order_by="CloudTrailEntry.event_time")
 
     exceptions = relationship("ExceptionLogs", backref="item", cascade="all, delete, delete-orphan")
+    summary = relationship("ItemSummary", backref="item", uselist=False, cascade="all, delete, delete-orphan")
+    config_search = relationship("ItemConfigSearch", backref="item", uselist=False, cascade="all, delete, delete-orphan")
+
+
+class ItemSummary(db.Model):
+    """
+    What the item list shows for each item, kept up to date as revisions are stored
+    and issues are audited, justified or disabled, so the list needs no per-item queries.
+    """
+    __tablename__ = "item_summary"
+    item_id = Column(Integer, ForeignKey("item.id", ondelete="CASCADE"), primary_key=True)
+    first_seen = Column(DateTime(), nullable=True, index=True)
+    last_seen = Column(DateTime(), nullable=True, index=True)
+    active = Column(Boolean(), nullable=True, index=True)
+    num_issues = Column(Integer, nullable=False, default=0, index=True)
+    issue_score = Column(Integer, nullable=False, default=0, index=True)
+    unjustified_issue_score = Column(Integer, nullable=False, default=0, index=True)
+
+
+class ItemConfigSearch(db.Model):
+    """
+    The latest config of each item, flattened by common.config_search for the
+    searchconfig filters.  The trigram index on config_text is created by the
+    migration, as it needs the pg_trgm extension.
+    """
+    __tablename__ = "item_config_search"
+    item_id = Column(Integer, ForeignKey("item.id", ondelete="CASCADE"), primary_key=True)
+    config_text = deferred(Column(Text(), nullable=False, default=u''))
+
+
+def update_item_summary(item):
+    """
+    Recomputes the ItemSummary of the item from its revisions and issues.
+    Issues of disabled auditor settings are counted but not scored.  The caller commits.
+    """
+    first_seen, last_seen = db.session.query(func.min(ItemRevision.date_created),
+                                             func.max(ItemRevision.date_created)) \
+        .filter(ItemRevision.item_id == item.id).one()
+    latest_revision = item.revisions.first()
+
+    summary = item.summary
+    if not summary:
+        summary = ItemSummary()
+        item.summary = summary
+
+    summary.first_seen = first_seen
+    summary.last_seen = last_seen
+    summary.active = latest_revision.active if latest_revision else None
+    summary.num_issues = len(item.issues)
+    summary.issue_score = 0
+    summary.unjustified_issue_score = 0
+    for issue in item.issues:
+        if issue.auditor_setting and issue.auditor_setting.disabled:
+            continue
+        summary.issue_score += issue.score or 0
+        if not issue.justified:
+            summary.unjustified_issue_score += issue.score or 0
+
+    db.session.add(summary)
+    return summary
+
+
+# Advanced after every commit that changes what the item, issue and distinct lists show,
+# so cached responses can tell they are stale.  A sequence needs no row lock, and its
+# last_value can be read from any process.
+data_version_seq = Sequence('data_version_seq', metadata=db.metadata)
+
+
+def get_data_version():
+    # The first nextval() leaves last_value as it was and only sets is_called.
+    return db.session.execute(
+        "SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM data_version_seq").scalar()
+
+
+def bump_data_version():
+    """
+    Call after the commit: a cache filled before it would otherwise be kept.
+    """
+    db.engine.execute(data_version_seq.next_value().select())
 
 
 class ItemComment(db.Model):
@@ -232,7 +325,8 @@ class ItemRevision(db.Model):
     __tablename__ = "itemrevision"
     id = Column(Integer, primary_key=True)
     active = Column(Boolean())
-    config = deferred(Column(JSON))
+    # GIN indexed (jsonb_path_ops) by its migration, for the containment queries of /api/1/query
+    config = deferred(Column(JSONB))
     date_created = Column(DateTime(), default=datetime.datetime.utcnow, nullable=False, index=True)
     date_last_ephemeral_change = Column(DateTime(), nullable=True, index=True)
     item_id = Column(Integer, ForeignKey("item.id"), nullable=False, index=True)
@@ -319,6 +413,19 @@ class ExceptionLogs(db.Model):
     account_id = Column(Integer, ForeignKey("account.id", ondelete="CASCADE"), index=True)
 
 
+class AccountRegion(db.Model):
+    """
+    The regions enabled in an account, as last discovered by the region catalog.
+    """
+    __tablename__ = "accountregion"
+    id = Column(Integer, primary_key=True)
+    account_id = Column(Integer, ForeignKey("account.id", ondelete="CASCADE"), nullable=False, index=True)
+    region = Column(String(32), nullable=False)
+    discovered = Column(DateTime(), default=datetime.datetime.utcnow, nullable=False)
+
+    __table_args__ = (UniqueConstraint('account_id', 'region'), )
+
+
 class Datastore(object):
     def __init__(self, debug=False):
         pass
@@ -379,6 +486,19 @@ class Datastore(object):
         item_hash = hashlib.md5(item_str)
         return item_hash.hexdigest()
 
+    def get_item_partitions(self, tech, accounts):
+        """
+        Returns the (account name, region) pairs holding active items of the technology.
+        """
+        query = db.session.query(Account.name, Item.region).distinct() \
+            .join((Item, Item.account_id == Account.id)) \
+            .join((Technology, Item.tech_id == Technology.id)) \
+            .join((ItemRevision, ItemRevision.id == Item.latest_revision_id)) \
+            .filter(Technology.name == tech) \
+            .filter(Account.name.in_(accounts)) \
+            .filter(ItemRevision.active == True)
+        return query.all()
+
     def get_all_ctype_filtered(self, tech=None, account=None, region=None, name=None, include_inactive=False):
         """
         Returns a list of Items joined with their most recent ItemRevision,
@@ -391,12 +511,10 @@ class Datastore(object):
         if account:
             query = query.join((Account, Item.account_id == Account.id)).filter(Account.name == account)
 
-        filter_by = {'region': region, 'name': name}
-        for k, v in filter_by.items():
-            if not v:
-                del filter_by[k]
-
-        query = query.filter_by(**filter_by)
+        if region:
+            query = query.filter(Item.region == region)
+        if name:
+            query = query.filter(Item.name == name)
 
         attempt = 1
         while True:
@@ -451,6 +569,11 @@ class Datastore(object):
             config,
             self.ephemeral_paths_for_tech(tech=ctype))
 
+        from security_monkey.common.config_search import config_search_text
+        if not item.config_search:
+            item.config_search = ItemConfigSearch()
+        item.config_search.config_text = config_search_text(config)
+
         if ephemeral:
             item_revision = item.revisions.first()
             item_revision.config = config
@@ -477,10 +600,12 @@ class Datastore(object):
         db.session.commit()
 
         self._set_latest_revision(item)
+        bump_data_version()
 
     def _set_latest_revision(self, item):
         latest_revision = item.revisions.first()
         item.latest_revision_id = latest_revision.id
+        update_item_summary(item)
         db.session.add(item)
         db.session.commit()
         #db.session.close()
@@ -8,7 +8,6 @@
 """
 
 from datetime import timedelta
-from itertools import product
 
 from flask import make_response, request, current_app
 from functools import update_wrapper, wraps
@@ -109,28 +108,62 @@ def record_exception(source="boto"):
     return decorator
 
 
-def iter_account_region(index=None, accounts=None, regions=None, exception_record_region=None):
-    regions = regions or ['us-east-1']
+def iter_account_region(index=None, accounts=None, regions=None, service=None, exception_record_region=None,
+                        partitions=False):
+    """
+    Calls the decorated function once per account and region.
+
+    :param regions: explicit list of region names.  Defaults to us-east-1, or with
+        a service, to the regions the region catalog gives for each account.
+    :param service: boto endpoint name used to look up the account's regions.
+    :param partitions: when True, the decorated function returns a generator of
+        (account, region, item_list, exception_map), one per call, as Watcher.slurp_partitions
+        yields them.  The region is exception_record_region when given.
+    """
+    def account_regions(account_name, exception_map):
+        if regions or not service:
+            return regions or ['us-east-1']
+
+        from security_monkey.common.region_catalog import get_regions
+        try:
+            return [region.name for region in get_regions(account_name, service)]
+        except Exception as e:
+            location = (index, account_name)
+            exception_map[location] = BotoConnectionIssue(str(e), index, account_name, None)
+            store_exception(source="{}-watcher".format(index), location=location, exception=e)
+            return []
 
     def decorator(f):
+        def iter_partitions(*args, **kwargs):
+            for account_name in accounts:
+                account = Account.query.filter(Account.name == account_name).first()
+                if not account:
+                    app.logger.error("Couldn't find account with name {}".format(account_name))
+                    continue
+                exception_map = {}
+                account_region_list = account_regions(account.name, exception_map)
+                if exception_map:
+                    yield account.name, None, [], exception_map
+                for region in account_region_list:
+                    kwargs['index'] = index
+                    kwargs['account_name'] = account.name
+                    kwargs['account_number'] = account.number
+                    kwargs['region'] = region
+                    kwargs['assume_role'] = account.role_name or 'SecurityMonkey'
+                    kwargs['exception_map'] = {}
+                    if exception_record_region:
+                        kwargs['exception_record_region'] = exception_record_region
+                    itm, exc = f(*args, **kwargs)
+                    yield account.name, exception_record_region or region, itm, exc
+
         @wraps(f)
         def decorated_function(*args, **kwargs):
+            if partitions:
+                return iter_partitions(*args, **kwargs)
+
             item_list = []
             exception_map = {}
-            for account_name, region in product(accounts, regions):
-                account = Account.query.filter(Account.name == account_name).first()
-                if not account:
-                    app.logger.error("Couldn't find account with name", account_name)
-                    return
-                kwargs['index'] = index
-                kwargs['account_name'] = account.name
-                kwargs['account_number'] = account.number
-                kwargs['region'] = region
-                kwargs['assume_role'] = account.role_name or 'SecurityMonkey'
-                kwargs['exception_map'] = {}
-                if exception_record_region:
-                    kwargs['exception_record_region'] = exception_record_region
-                itm, exc = f(*args, **kwargs)
+            for _, _, itm, exc in iter_partitions(*args, **kwargs):
                 item_list.extend(itm)
                 exception_map.update(exc)
             return item_list, exception_map
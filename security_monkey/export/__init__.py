@@ -1,14 +1,85 @@
-from flask import request, Response
+from flask import request, Response, stream_with_context
 from flask.blueprints import Blueprint
-from sqlalchemy.sql.expression import cast
-from sqlalchemy import String
 from security_monkey import rbac
-from security_monkey.datastore import Item, ItemRevision, Account, Technology, ItemAudit, AuditorSettings
-from sqlalchemy.orm import joinedload
+from security_monkey.datastore import Item, ItemRevision, Account, Technology, ItemAudit, AuditorSettings, ItemConfigSearch
+from security_monkey.datastore import ItemComment
+from security_monkey.common.config_search import config_search_filter
+from security_monkey.common.pagination import keyset_page
+from security_monkey.export.snapshot import iter_snapshot_records, ndjson_line
+from sqlalchemy.orm import joinedload, subqueryload, contains_eager
+from sqlalchemy import func
+import zlib
 
 
 export_blueprint = Blueprint("export", __name__)
 
+# Rows loaded, and sent, at a time.
+EXPORT_BATCH_SIZE = 500
+
+
+def _csv_value(obj, attribute):
+    val = obj
+    for at in attribute:
+        val = getattr(val, at)
+        if val is None:
+            break
+    if isinstance(val, unicode):
+        val = val.encode('utf-8')
+    val = str(val).replace('"', '""')
+    return '"{val}"'.format(val=val)
+
+
+def _csv_batches(query, keys, attributes):
+    """
+    Yields the CSV one batch of rows at a time.  Each batch is a keyset page of the
+    query, so only one is held in memory, however large the export.
+    """
+    yield ",".join(["/".join(at) for at in attributes]) + "\n"
+
+    after = None
+    while True:
+        rows, after = keyset_page(query, keys, after, EXPORT_BATCH_SIZE)
+        lines = []
+        for row in rows:
+            lines.append(",".join([_csv_value(row, attribute) for attribute in attributes]) + "\n")
+        yield "".join(lines)
+        if not after:
+            break
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _streamed_response(chunks, mimetype):
+    """
+    Streams the chunks as they are generated, gzipped if the client accepts it.
+    """
+    headers = {'Vary': 'Accept-Encoding'}
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        chunks = _gzip(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+
+def _csv_response(query, keys, attributes):
+    return _streamed_response(_csv_batches(query, keys, attributes), 'text/csv')
+
+
+def _ndjson_batches(records):
+    lines = []
+    for record in records:
+        lines.append(ndjson_line(record))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield "".join(lines)
+            lines = []
+    yield "".join(lines)
+
 
 @export_blueprint.route("/export/items")
 @rbac.allow(roles=["View"], methods=["GET"])
@@ -49,16 +120,16 @@ def export_items():
         query = query.filter(ItemRevision.active == active)
     if 'searchconfig' in args:
         searchconfig = args['searchconfig']
-        query = query.filter(cast(ItemRevision.config, String).ilike('%{}%'.format(searchconfig)))
+        query = query.join((ItemConfigSearch, ItemConfigSearch.item_id == Item.id))
+        query = query.filter(config_search_filter(searchconfig))
 
-    # Eager load the joins and leave the config column out of this.
-    query = query.options(joinedload('issues'))
-    # Now loaded by the join on line 29 I think...
-    #query = query.options(joinedload('revisions').defer('config'))
-    query = query.options(joinedload('account'))
-    query = query.options(joinedload('technology'))
+    # Eager load the relationships in the CSV; the config column is deferred.
+    query = query.options(subqueryload(Item.issues))
+    query = query.options(subqueryload(Item.comments).joinedload(ItemComment.user))
+    query = query.options(joinedload(Item.account))
+    query = query.options(joinedload(Item.technology))
 
-    query = query.order_by(ItemRevision.date_created.desc())
+    keys = [(ItemRevision.date_created, True), (Item.id, True)]
     attributes = [
         ["technology", "name"],
         ["account", "name"],
@@ -70,21 +141,7 @@ def export_items():
         ["comments"]
     ]
 
-    out = ",".join(["/".join(at) for at in attributes]) + "\n"
-
-    for item in query:
-        values = []
-        for attribute in attributes:
-            val = item
-            for at in attribute:
-                val = getattr(val, at)
-                if val is None:
-                    break
-            val = str(val).replace('"', '""')
-            values.append('"{val}"'.format(val=val))
-
-        out += ",".join(values) + "\n"
-    return Response(out, mimetype='text/csv')
+    return _csv_response(query, keys, attributes)
 
 
 @export_blueprint.route("/export/issues")
@@ -134,8 +191,15 @@ def export_issues():
         query = query.join((AuditorSettings, AuditorSettings.id == ItemAudit.auditor_setting_id))
         query = query.filter(AuditorSettings.disabled == False)
 
-    query = query.order_by(ItemAudit.justified, ItemAudit.score.desc())
+    query = query.options(contains_eager(ItemAudit.item).joinedload(Item.account))
+    query = query.options(contains_eager(ItemAudit.item).joinedload(Item.technology))
+    query = query.options(contains_eager(ItemAudit.item).subqueryload(Item.comments).joinedload(ItemComment.user))
+    query = query.options(joinedload(ItemAudit.user))
 
+    # The order of the issue list.  Unset flags and scores sort as false and 0.
+    keys = [(func.coalesce(ItemAudit.justified, False), False),
+            (func.coalesce(ItemAudit.score, 0), True),
+            (ItemAudit.id, True)]
     attributes = [
         ["item", "technology", "name"],
         ["item", "account", "name"],
@@ -152,18 +216,27 @@ def export_issues():
         ["justification"]
     ]
 
-    out = ",".join(["/".join(at) for at in attributes]) + "\n"
-
-    for issue in query:
-        values = []
-        for attribute in attributes:
-            val = issue
-            for at in attribute:
-                val = getattr(val, at)
-                if val is None:
-                    break
-            val = str(val).replace('"', '""')
-            values.append('"{val}"'.format(val=val))
-
-        out += ",".join(values) + "\n"
-    return Response(out, mimetype='text/csv')
+    return _csv_response(query, keys, attributes)
+
+
+@export_blueprint.route("/export/snapshot")
+@rbac.allow(roles=["View"], methods=["GET"])
+def export_snapshot():
+    """
+    The latest revision of every item, config included, one JSON object per line in
+    item id order.  If the download is interrupted, pass the item_id of the last
+    line received as after to get the rest.
+    """
+    accounts = request.args.get('accounts', None)
+    technologies = request.args.get('technologies', None)
+    after = request.args.get('after', None)
+
+    try:
+        after = int(after) if after else None
+    except ValueError:
+        return Response('after must be an item id', status=400)
+
+    records = iter_snapshot_records(accounts.split(',') if accounts else None,
+                                    technologies.split(',') if technologies else None,
+                                    after=after)
+    return _streamed_response(_ndjson_batches(records), 'application/x-ndjson')
@@ -0,0 +1,201 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.export.snapshot
+    :platform: Unix
+    :synopsis: Bulk export of the latest revision of every item, as gzipped NDJSON or
+        Parquet part files, for offline analysis.
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.datastore import Item, ItemRevision, Account, Technology
+from security_monkey import app, db
+
+from datetime import datetime
+import gzip
+import itertools
+import json
+import os
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+SNAPSHOT_FORMATS = ['ndjson', 'parquet']
+SNAPSHOT_FIELDS = ['item_id', 'account', 'technology', 'region', 'name', 'arn',
+                   'revision_id', 'active', 'date_created', 'config']
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def iter_snapshot_records(account_names=None, technology_names=None, after=None, chunk_size=None):
+    """
+    The latest revision of every item, in item id order, as dicts of SNAPSHOT_FIELDS.
+    The rows come from a server-side cursor, SNAPSHOT_CHUNK_SIZE (default: 1000) at a
+    time, so memory doesn't grow with the number of items.
+
+    :param after: only items with a greater id, to resume an interrupted export.
+    """
+    chunk_size = chunk_size or app.config.get('SNAPSHOT_CHUNK_SIZE', 1000)
+
+    query = db.session.query(Item.id, Account.name, Technology.name, Item.region, Item.name, Item.arn,
+                             ItemRevision.id, ItemRevision.active, ItemRevision.date_created,
+                             ItemRevision.config)
+    query = query.join((ItemRevision, ItemRevision.id == Item.latest_revision_id))
+    query = query.join((Account, Account.id == Item.account_id))
+    query = query.join((Technology, Technology.id == Item.tech_id))
+    if account_names:
+        query = query.filter(Account.name.in_(account_names))
+    if technology_names:
+        query = query.filter(Technology.name.in_(technology_names))
+    if after is not None:
+        query = query.filter(Item.id > after)
+
+    for row in query.order_by(Item.id).yield_per(chunk_size):
+        record = dict(zip(SNAPSHOT_FIELDS, row))
+        if record['date_created']:
+            record['date_created'] = record['date_created'].isoformat()
+        yield record
+
+
+def ndjson_line(record):
+    return json.dumps(record, sort_keys=True) + "\n"
+
+
+def _write_ndjson(path, records):
+    """
+    :returns: (number of records written, id of the last item)
+    """
+    count, last_item_id = 0, None
+    with gzip.open(path, 'wb') as output:
+        for record in records:
+            output.write(ndjson_line(record))
+            count, last_item_id = count + 1, record['item_id']
+    return count, last_item_id
+
+
+def _write_parquet(path, records):
+    """
+    Parquet is written a whole file at a time, so the records of a part are held in
+    memory until then.
+    """
+    columns = {field: [] for field in SNAPSHOT_FIELDS}
+    for record in records:
+        for field in SNAPSHOT_FIELDS:
+            columns[field].append(record[field])
+    if not columns['item_id']:
+        return 0, None
+    # The configs of each technology have their own shape, so they are kept as JSON text.
+    columns['config'] = [json.dumps(config, sort_keys=True) for config in columns['config']]
+
+    table = pyarrow.Table.from_arrays([pyarrow.array(columns[field]) for field in SNAPSHOT_FIELDS],
+                                      names=SNAPSHOT_FIELDS)
+    pyarrow.parquet.write_table(table, path, compression='snappy')
+    return len(columns['item_id']), columns['item_id'][-1]
+
+
+def _read_manifest(output_folder):
+    path = os.path.join(output_folder, MANIFEST_FILE)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as manifest_file:
+        return json.load(manifest_file)
+
+
+def _write_manifest(output_folder, manifest):
+    # Written aside and renamed, so an interrupted export never leaves half a manifest.
+    path = os.path.join(output_folder, MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    os.rename(path + '.tmp', path)
+
+
+def export_snapshot(output_folder, account_names=None, technology_names=None, fmt='ndjson', part_size=None):
+    """
+    Writes the latest revision of every item to numbered part files of at most
+    SNAPSHOT_PART_SIZE records (default: 50000) in output_folder, with a manifest of
+    the parts written so far.  NDJSON parts are streamed to disk as the records arrive.
+    Run again on the same folder, an interrupted export carries on after the last
+    complete part.
+
+    :returns: the manifest
+    Raises ValueError for an unknown format, a folder holding a different export, or
+    Parquet without pyarrow installed.
+    """
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError("Unknown snapshot format: {}".format(fmt))
+    if fmt == 'parquet' and pyarrow is None:
+        raise ValueError("Parquet snapshots need pyarrow: pip install pyarrow")
+    part_size = part_size or app.config.get('SNAPSHOT_PART_SIZE', 50000)
+
+    account_names = sorted(account_names or [])
+    technology_names = sorted(technology_names or [])
+
+    if not os.path.isdir(output_folder):
+        os.makedirs(output_folder, mode=0o777)
+
+    manifest = _read_manifest(output_folder)
+    if manifest:
+        if [manifest['format'], manifest['accounts'], manifest['technologies']] != \
+                [fmt, account_names, technology_names]:
+            raise ValueError("{} holds a different snapshot".format(output_folder))
+        if manifest['complete']:
+            app.logger.info("The snapshot in {} is already complete".format(output_folder))
+            return manifest
+        app.logger.info("Resuming the snapshot in {} after item {}".format(output_folder, manifest['last_item_id']))
+    else:
+        manifest = {
+            'format': fmt,
+            'accounts': account_names,
+            'technologies': technology_names,
+            'fields': SNAPSHOT_FIELDS,
+            'started': datetime.utcnow().isoformat(),
+            'parts': [],
+            'records': 0,
+            'last_item_id': None,
+            'complete': False
+        }
+
+    write_part = _write_parquet if fmt == 'parquet' else _write_ndjson
+    extension = 'parquet' if fmt == 'parquet' else 'ndjson.gz'
+
+    records = iter_snapshot_records(account_names, technology_names, after=manifest['last_item_id'])
+    while True:
+        file_name = 'part-{:05d}.{}'.format(len(manifest['parts']), extension)
+        path = os.path.join(output_folder, file_name)
+        count, last_item_id = write_part(path + '.tmp', itertools.islice(records, part_size))
+        if not count:
+            if os.path.exists(path + '.tmp'):
+                os.remove(path + '.tmp')
+            break
+        os.rename(path + '.tmp', path)
+
+        manifest['parts'].append({'file': file_name, 'records': count, 'last_item_id': last_item_id})
+        manifest['records'] += count
+        manifest['last_item_id'] = last_item_id
+        _write_manifest(output_folder, manifest)
+        app.logger.info("Wrote {} records to {}".format(count, path))
+
+        if count < part_size:
+            break
+
+    manifest['complete'] = True
+    manifest['finished'] = datetime.utcnow().isoformat()
+    _write_manifest(output_folder, manifest)
+    return manifest
@@ -51,15 +51,12 @@ class Reporter(object):
         time1 = time.time()
         for monitor in self.get_watchauditors(account, interval):
             app.logger.info("Running {} for {} ({} minutes interval)".format(monitor.watcher.i_am_singular, account, interval))
-            value = monitor.watcher.slurp()
-            (items, exception_map) = monitor.watcher.slurp()
-            monitor.watcher.find_changes(current=items, exception_map=exception_map)
-            items_to_audit = [item for item in monitor.watcher.created_items + monitor.watcher.changed_items]
-
-            if len(items_to_audit) > 0:
-                for auditor in monitor.auditors:
-                    auditor.audit_these_objects(items_to_audit)
-                    auditor.save_issues()
+            # Each account and region is diffed and audited before the next one is slurped:
+            for items_to_audit in monitor.watcher.find_changes_by_partition():
+                if len(items_to_audit) > 0:
+                    for auditor in monitor.auditors:
+                        auditor.audit_these_objects(items_to_audit)
+                        auditor.save_issues()
 
             monitor.watcher.save()
             app.logger.info("Account {} is done with {}".format(account, monitor.watcher.i_am_singular))
@@ -12,6 +12,7 @@ from apscheduler.threadpool import ThreadPool
 from apscheduler.scheduler import Scheduler
 from sqlalchemy.exc import OperationalError, InvalidRequestError, StatementError
 
+from security_monkey.cloudtrail import process_cloudtrail_events
 from security_monkey.datastore import Account, clear_old_exceptions, store_exception
 from security_monkey.monitors import get_monitors
 from security_monkey.reporter import Reporter
@@ -39,8 +40,9 @@ def find_changes(accounts, monitor_names, debug=True):
     monitors = get_monitors(accounts, monitor_names, debug)
     for monitor in monitors:
         cw = monitor.watcher
-        (items, exception_map) = cw.slurp()
-        cw.find_changes(current=items, exception_map=exception_map)
+        # The changes are audited below, with every other item:
+        for _ in cw.find_changes_by_partition():
+            pass
         cw.save()
 
     audit_changes(accounts, monitor_names, False, debug)
@@ -73,6 +75,19 @@ def _audit_changes(auditors, send_report, debug=True):
         store_exception("scheduler-audit-changes", None, e)
 
 
+def run_cloudtrail_processor(source, lookback=None):
+    """ Re-slurps the items touched by recent CloudTrail events """
+    since = None
+    if lookback:
+        since = datetime.utcnow() - timedelta(minutes=lookback)
+    try:
+        process_cloudtrail_events(source, since=since)
+    except (OperationalError, InvalidRequestError, StatementError) as e:
+        app.logger.exception("Database error processing CloudTrail events from %s, cleaning up session.", source)
+        db.session.remove()
+        store_exception("scheduler-run-cloudtrail-processor", None, e)
+
+
 def _clear_old_exceptions():
     print("Clearing out exceptions that have an expired TTL...")
     clear_old_exceptions()
@@ -114,6 +129,17 @@ def setup_scheduler():
                 auditors.extend(monitor.auditors)
             scheduler.add_cron_job(audit_changes, hour=10, day_of_week="mon-fri", args=[auditors, True])
 
+        # Re-slurp items as CloudTrail reports changes, between the full sweeps above:
+        cloudtrail_source = app.config.get('CLOUDTRAIL_EVENTS_SOURCE')
+        if cloudtrail_source:
+            poll_interval = app.config.get('CLOUDTRAIL_POLL_INTERVAL', 5)
+            scheduler.add_interval_job(
+                run_cloudtrail_processor,
+                minutes=poll_interval,
+                start_date=datetime.now()+timedelta(seconds=2),
+                args=[cloudtrail_source, app.config.get('CLOUDTRAIL_LOOKBACK_MINUTES', 60)]
+            )
+
         # Clear out old exceptions:
         scheduler.add_cron_job(_clear_old_exceptions, hour=3, minute=0)
 
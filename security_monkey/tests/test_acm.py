@@ -0,0 +1,87 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_acm
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.datastore import Account, Datastore
+from security_monkey.watchers import acm
+from security_monkey.watchers.acm import ACM
+from security_monkey import db
+
+from boto.regioninfo import RegionInfo
+from dateutil.tz import tzutc
+from datetime import datetime, timedelta
+from mock import patch, MagicMock
+
+ARN = 'arn:aws:acm:us-east-1:012345678910:certificate/1'
+
+
+def _client(not_after, status='ISSUED'):
+    client = MagicMock()
+    client.list_certificates.side_effect = lambda CertificateStatuses=None, **kwargs: {
+        'CertificateSummaryList': [{'CertificateArn': ARN, 'DomainName': 'example.com'}]
+        if CertificateStatuses == [status] else []}
+    client.describe_certificate.return_value = {'Certificate': {
+        'CertificateArn': ARN, 'DomainName': 'example.com', 'Status': status, 'NotAfter': not_after}}
+    return client
+
+
+class ACMTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        account = Account(number="012345678910", name="testing", s3_name="testing", role_name="SecurityMonkey",
+                          active=True, third_party=False)
+        db.session.add(account)
+        db.session.commit()
+
+    def tearDown(self):
+        acm._described.clear()
+        super(ACMTestCase, self).tearDown()
+
+    def _slurp(self, client):
+        with patch('security_monkey.watchers.acm.get_regions', return_value=[RegionInfo(name='us-east-1')]):
+            with patch('security_monkey.common.sts_connect.connect', return_value=client):
+                items, exception_map = ACM(accounts=['testing']).slurp()
+        self.assertEqual(exception_map, {})
+        for item in items:
+            Datastore().store('acm', item.region, item.account, item.name, True, item.new_config, arn=item.arn)
+        return items
+
+    def test_unchanged_certificates_are_not_described(self):
+        not_after = datetime.now(tzutc()) + timedelta(days=365)
+        items = self._slurp(_client(not_after))
+        self.assertEqual(items[0].new_config['NotAfter'], not_after.isoformat())
+
+        client = _client(not_after)
+        items = self._slurp(client)
+        self.assertFalse(client.describe_certificate.called)
+        self.assertEqual(items[0].new_config['NotAfter'], not_after.isoformat())
+
+        # A status change is described again:
+        client = _client(not_after, status='REVOKED')
+        self._slurp(client)
+        self.assertTrue(client.describe_certificate.called)
+
+    def test_certificates_due_for_renewal_are_described(self):
+        not_after = datetime.now(tzutc()) + timedelta(days=30)
+        self._slurp(_client(not_after))
+
+        client = _client(not_after)
+        self._slurp(client)
+        self.assertTrue(client.describe_certificate.called)
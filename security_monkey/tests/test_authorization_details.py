@@ -0,0 +1,144 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_authorization_details
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common import authorization_details
+from security_monkey.common.authorization_details import AuthorizationDetails, get_authorization_details
+from security_monkey.watchers.iam.iam_role import _details_config
+from security_monkey.watchers.iam.managed_policy import ManagedPolicy
+
+from mock import patch, MagicMock
+from datetime import datetime
+
+USER_ARN = 'arn:aws:iam::012345678910:user/alice'
+GROUP_ARN = 'arn:aws:iam::012345678910:group/admins'
+ROLE_ARN = 'arn:aws:iam::012345678910:role/web'
+ADMIN_POLICY = 'arn:aws:iam::aws:policy/AdministratorAccess'
+READ_POLICY = 'arn:aws:iam::012345678910:policy/read'
+UNATTACHED_POLICY = 'arn:aws:iam::aws:policy/ReadOnlyAccess'
+
+DOCUMENT = {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': '*', 'Resource': '*'}]}
+
+
+def _details():
+    return AuthorizationDetails(
+        users=[{
+            'UserName': 'alice', 'Arn': USER_ARN, 'GroupList': ['admins'],
+            'UserPolicyList': [{'PolicyName': 'inline', 'PolicyDocument': DOCUMENT}],
+            'AttachedManagedPolicies': [{'PolicyName': 'read', 'PolicyArn': READ_POLICY},
+                                        {'PolicyName': 'AdministratorAccess', 'PolicyArn': ADMIN_POLICY}]
+        }],
+        groups=[{
+            'GroupName': 'admins', 'Arn': GROUP_ARN,
+            'GroupPolicyList': [{'PolicyName': 'encoded', 'PolicyDocument': '%7B%22Version%22%3A%20%222012-10-17%22%7D'}],
+            'AttachedManagedPolicies': [{'PolicyName': 'AdministratorAccess', 'PolicyArn': ADMIN_POLICY}]
+        }],
+        roles=[{
+            'RoleName': 'web', 'Arn': ROLE_ARN, 'RoleId': 'AROA1', 'Path': '/',
+            'CreateDate': datetime(2016, 1, 1), 'AssumeRolePolicyDocument': DOCUMENT,
+            'RolePolicyList': [],
+            'InstanceProfileList': [{'Path': '/', 'InstanceProfileName': 'web', 'InstanceProfileId': 'AIPA1',
+                                     'CreateDate': datetime(2016, 1, 2), 'Arn': 'arn:aws:iam::012345678910:instance-profile/web'}],
+            'AttachedManagedPolicies': [{'PolicyName': 'read', 'PolicyArn': READ_POLICY}]
+        }],
+        policies=[
+            {'PolicyName': 'AdministratorAccess', 'Arn': ADMIN_POLICY, 'DefaultVersionId': 'v1',
+             'PolicyVersionList': [{'Document': DOCUMENT, 'VersionId': 'v1', 'IsDefaultVersion': True}]},
+            {'PolicyName': 'read', 'Arn': READ_POLICY, 'DefaultVersionId': 'v3',
+             'PolicyVersionList': [{'Document': {}, 'VersionId': 'v2', 'IsDefaultVersion': False},
+                                   {'Document': DOCUMENT, 'VersionId': 'v3', 'IsDefaultVersion': True}]},
+        ]
+    )
+
+
+class AuthorizationDetailsTestCase(SecurityMonkeyTestCase):
+    def tearDown(self):
+        authorization_details.clear_authorization_details()
+        super(AuthorizationDetailsTestCase, self).tearDown()
+
+    def test_lookups(self):
+        details = _details()
+
+        # Managed policies are in the order the policies are listed, as with ListPolicies:
+        self.assertEqual(details.managed_policies(USER_ARN), [
+            {'name': 'AdministratorAccess', 'arn': ADMIN_POLICY, 'version': 'v1'},
+            {'name': 'read', 'arn': READ_POLICY, 'version': 'v3'}])
+        self.assertEqual(details.managed_policies('arn:aws:iam::012345678910:user/nobody'), [])
+
+        self.assertEqual(details.policy_attachments(ADMIN_POLICY),
+                         {'users': [USER_ARN], 'groups': [GROUP_ARN], 'roles': []})
+        self.assertEqual(details.default_version_document(details.policies[1]), DOCUMENT)
+        self.assertEqual([user['UserName'] for user in details.group_users('admins')], ['alice'])
+
+        group = details.groups_by_name()['admins']
+        self.assertEqual(details.inline_policies(group, 'GroupPolicyList'), {'encoded': {'Version': '2012-10-17'}})
+
+    def test_role_config(self):
+        config = _details_config(_details().roles[0])
+        self.assertEqual(config['role']['create_date'], '2016-01-01T00:00:00Z')
+        self.assertEqual(config['managed_policies'], [{'name': 'read', 'arn': READ_POLICY}])
+        self.assertEqual(config['rolepolicies'], {})
+        self.assertEqual(config['instance_profiles'][0]['create_date'], '2016-01-02T00:00:00Z')
+
+    def test_download_is_shared(self):
+        with patch.object(authorization_details, '_download', return_value=_details()) as download:
+            first = get_authorization_details(None, 'testing')
+            second = get_authorization_details(None, 'testing')
+            get_authorization_details(None, 'other')
+
+        self.assertIs(first, second)
+        self.assertEqual(download.call_count, 2)
+
+        authorization_details.clear_authorization_details('testing')
+        with patch.object(authorization_details, '_download', return_value=_details()) as download:
+            get_authorization_details(None, 'testing')
+        self.assertEqual(download.call_count, 1)
+
+    def test_managed_policies(self):
+        def listed(name, arn, version, count):
+            return {'PolicyName': name, 'Arn': arn, 'DefaultVersionId': version, 'AttachmentCount': count,
+                    'CreateDate': datetime(2016, 1, 1), 'UpdateDate': datetime(2016, 1, 1)}
+
+        iam = MagicMock()
+        iam.list_policies.side_effect = [
+            {'Policies': [listed('AdministratorAccess', ADMIN_POLICY, 'v1', 2)],
+             'IsTruncated': True, 'Marker': 'next'},
+            {'Policies': [listed('ReadOnlyAccess', UNATTACHED_POLICY, 'v7', 0), listed('read', READ_POLICY, 'v3', 2)],
+             'IsTruncated': False}
+        ]
+        iam.get_policy_version.return_value = {'PolicyVersion': {'Document': '%7B%22Version%22%3A%20%222012-10-17%22%7D'}}
+
+        watcher = ManagedPolicy(accounts=['testing'])
+        with patch.object(authorization_details, '_download', return_value=_details()):
+            with patch('security_monkey.common.sts_connect.connect', return_value=iam):
+                items, exception_map = watcher.slurp()
+
+        self.assertEqual(exception_map, {})
+        configs = {item.name: item.new_config for item in items}
+        self.assertEqual(sorted(configs), ['AdministratorAccess', 'ReadOnlyAccess', 'read'])
+        self.assertEqual(configs['AdministratorAccess']['attached_groups'], [GROUP_ARN])
+        self.assertEqual(configs['read']['policy'], DOCUMENT)
+
+        # Unattached AWS managed policies aren't in the download:
+        self.assertEqual(configs['ReadOnlyAccess']['attached_users'], [])
+        self.assertEqual(configs['ReadOnlyAccess']['policy'], {'Version': '2012-10-17'})
+        iam.get_policy_version.assert_called_once_with(PolicyArn=UNATTACHED_POLICY, VersionId='v7')
+        self.assertEqual(iam.list_policies.call_args_list[1][1], {'Marker': 'next'})
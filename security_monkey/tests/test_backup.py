@@ -0,0 +1,95 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_backup
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.backup import backup_config_to_json, _serialize_config_to_file
+from security_monkey.datastore import Account, Datastore
+from security_monkey import db
+
+from mock import patch
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+
+class BackupTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        db.session.add(Account(number="012345678910", name="testing", s3_name="testing",
+                               role_name="SecurityMonkey", active=True, third_party=False))
+        db.session.commit()
+
+        self.datastore = Datastore()
+        for i in range(3):
+            self.datastore.store('securitygroup', 'us-east-1', 'testing', 'sg{}'.format(i), True, {'id': i})
+        self.datastore.store('securitygroup', 'us-east-1', 'testing', 'a/b', True, {'id': 'slash'})
+
+        self.temp = tempfile.mkdtemp()
+        self.folder = os.path.join(self.temp, 'backups')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp)
+        super(BackupTestCase, self).tearDown()
+
+    def _read(self, name):
+        with open(os.path.join(self.folder, 'testing', 'securitygroup', name)) as backup:
+            return json.load(backup)
+
+    def test_incremental_backup(self):
+        backup_config_to_json(['testing'], ['securitygroup'], self.folder)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.folder, 'testing', 'securitygroup'))),
+                         ['a_b.json', 'sg0.json', 'sg1.json', 'sg2.json'])
+        self.assertEqual(self._read('sg1.json'), {'id': 1})
+        with open(os.path.join(self.folder, 'manifest.json')) as manifest_file:
+            self.assertEqual(len(json.load(manifest_file)), 4)
+
+        self.datastore.store('securitygroup', 'us-east-1', 'testing', 'sg1', True, {'id': 1, 'rules': []})
+        os.remove(os.path.join(self.folder, 'testing', 'securitygroup', 'sg2.json'))
+
+        with patch('security_monkey.backup._serialize_config_to_file', wraps=_serialize_config_to_file) as serialize:
+            backup_config_to_json(['testing'], ['securitygroup'], self.folder)
+        written = sorted(os.path.basename(call[0][1]) for call in serialize.call_args_list)
+        self.assertEqual(written, ['sg1.json', 'sg2.json'])
+        self.assertEqual(self._read('sg1.json'), {'id': 1, 'rules': []})
+        self.assertEqual(self._read('sg2.json'), {'id': 2})
+
+    def test_archives(self):
+        backup_config_to_json(['testing'], ['securitygroup'], self.folder, archive='tar')
+        with tarfile.open(self.folder + '.tar.gz') as archive:
+            self.assertEqual(sorted(archive.getnames()),
+                             ['testing/securitygroup/a_b.json', 'testing/securitygroup/sg0.json',
+                              'testing/securitygroup/sg1.json', 'testing/securitygroup/sg2.json'])
+            self.assertEqual(json.load(archive.extractfile('testing/securitygroup/sg2.json')), {'id': 2})
+
+        backup_config_to_json(['testing'], ['securitygroup'], self.folder, archive='zip')
+        with zipfile.ZipFile(self.folder + '.zip') as archive:
+            self.assertEqual(len(archive.namelist()), 4)
+            self.assertEqual(json.loads(archive.read('testing/securitygroup/a_b.json')), {'id': 'slash'})
+
+        self.assertFalse(os.path.exists(self.folder))
+        with self.assertRaises(ValueError):
+            backup_config_to_json(['testing'], ['securitygroup'], self.folder, archive='rar')
+
+    def test_unknown_monitor(self):
+        with self.assertRaises(ValueError):
+            backup_config_to_json(['testing'], ['securitygroups'], self.folder)
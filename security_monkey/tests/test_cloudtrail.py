@@ -0,0 +1,126 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_cloudtrail
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.cloudtrail import locations_for_event, read_events, process_cloudtrail_events
+from security_monkey.datastore import Account, CloudTrailEntry, Datastore, Item
+from security_monkey.watcher import watcher_registry, ChangeItem
+from security_monkey.watchers.iam.iam_user import IAMUser
+from security_monkey.auditor import auditor_registry
+from security_monkey.auditors.iam.iam_user import IAMUserAuditor
+from security_monkey import db
+
+from mock import patch
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+
+def _event(event_id, event_source, event_name, request_parameters, **kwargs):
+    event = {
+        'eventID': event_id,
+        'eventSource': event_source,
+        'eventName': event_name,
+        'eventTime': '2016-09-01T12:00:00Z',
+        'awsRegion': 'us-east-1',
+        'recipientAccountId': '012345678910',
+        'requestParameters': request_parameters,
+        'responseElements': None,
+        'userIdentity': {'arn': 'arn:aws:iam::012345678910:user/alice', 'accountId': '012345678910'}
+    }
+    event.update(kwargs)
+    return event
+
+
+class CloudTrailTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        self.account = Account(number="012345678910", name="testing", s3_name="testing", role_name="SecurityMonkey",
+                               active=True, third_party=False)
+        db.session.add(self.account)
+        db.session.commit()
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        super(CloudTrailTestCase, self).tearDown()
+
+    def test_iam_event_maps_to_user_and_group(self):
+        event = _event('1', 'iam.amazonaws.com', 'AddUserToGroup', {'userName': 'alice', 'groupName': 'admins'})
+        locations = locations_for_event(event, 'testing')
+        self.assertEqual(sorted(locations), [('iamgroup', 'testing', 'universal', 'admins'),
+                                             ('iamuser', 'testing', 'universal', 'alice')])
+
+    def test_failed_and_untracked_events_are_ignored(self):
+        failed = _event('1', 'iam.amazonaws.com', 'DeleteUser', {'userName': 'alice'}, errorCode='AccessDenied')
+        untracked = _event('2', 'iam.amazonaws.com', 'GetUser', {'userName': 'alice'})
+        self.assertEqual(locations_for_event(failed, 'testing'), [])
+        self.assertEqual(locations_for_event(untracked, 'testing'), [])
+
+    def test_sqs_and_sns_names(self):
+        sqs = _event('1', 'sqs.amazonaws.com', 'SetQueueAttributes',
+                     {'queueUrl': 'https://sqs.us-east-1.amazonaws.com/012345678910/my-queue'})
+        sns = _event('2', 'sns.amazonaws.com', 'Unsubscribe',
+                     {'subscriptionArn': 'arn:aws:sns:us-east-1:012345678910:my-topic:0f3d6a92'})
+        self.assertEqual(locations_for_event(sqs, 'testing'), [('sqs', 'testing', 'us-east-1', 'my-queue')])
+        self.assertEqual(locations_for_event(sns, 'testing'), [('sns', 'testing', 'us-east-1', 'my-topic')])
+
+    def test_unknown_security_group_widens_to_region(self):
+        event = _event('1', 'ec2.amazonaws.com', 'AuthorizeSecurityGroupIngress', {'groupId': 'sg-12345678'})
+        self.assertEqual(locations_for_event(event, 'testing'), [('securitygroup', 'testing', 'us-east-1')])
+
+        Datastore().store('securitygroup', 'us-east-1', 'testing', 'web (sg-12345678 in vpc-1234abcd)', True, {})
+        self.assertEqual(locations_for_event(event, 'testing'),
+                         [('securitygroup', 'testing', 'us-east-1', 'web (sg-12345678 in vpc-1234abcd)')])
+
+    def test_read_events_from_directory(self):
+        with open(os.path.join(self.tempdir, 'one.json'), 'w') as f:
+            json.dump({'Records': [_event('1', 'iam.amazonaws.com', 'CreateUser', {'userName': 'alice'})]}, f)
+        archive = gzip.open(os.path.join(self.tempdir, 'two.json.gz'), 'wb')
+        archive.write(json.dumps({'Records': [_event('2', 'iam.amazonaws.com', 'CreateUser', {'userName': 'bob'})]}))
+        archive.close()
+
+        events = list(read_events(self.tempdir))
+        self.assertEqual([event['eventID'] for event in events], ['1', '2'])
+
+    def test_process_records_entry_and_skips_seen_events(self):
+        with open(os.path.join(self.tempdir, 'events.json'), 'w') as f:
+            json.dump({'Records': [_event('1', 'iam.amazonaws.com', 'CreateUser', {'userName': 'alice'})]}, f)
+
+        def slurp_item(watcher, account, region, name, exception_map={}):
+            return ChangeItem(index='iamuser', region=region, account=account, name=name,
+                              arn='arn:aws:iam::012345678910:user/{}'.format(name),
+                              new_config={'user': {'user_name': name}}, active=True)
+
+        # find_modules may have registered stale copies of these classes; use the canonical ones.
+        with patch.dict(watcher_registry, {'iamuser': IAMUser}), \
+                patch.dict(auditor_registry, {'iamuser': [IAMUserAuditor]}), \
+                patch.object(IAMUser, 'slurp_item', slurp_item):
+            self.assertEqual(process_cloudtrail_events(self.tempdir), 1)
+            # The same event is never processed twice:
+            self.assertEqual(process_cloudtrail_events(self.tempdir), 0)
+
+        item = Item.query.filter(Item.name == 'alice').one()
+        entry = CloudTrailEntry.query.one()
+        self.assertEqual(entry.item_id, item.id)
+        self.assertEqual(entry.revision_id, item.latest_revision_id)
+        self.assertEqual(entry.user_identity_arn, 'arn:aws:iam::012345678910:user/alice')
@@ -0,0 +1,71 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_config_query
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.views.query import path_document, predicate_clause
+from security_monkey.datastore import Account, Datastore, Item, ItemRevision
+from security_monkey import db
+
+SG_CONFIG = {
+    'id': 'sg-1234',
+    'vpc_id': 'vpc-1234',
+    'rules': [{'from_port': 22, 'cidr_ip': '10.0.0.0/8'}, {'from_port': 443, 'cidr_ip': '0.0.0.0/0'}]
+}
+
+
+class ConfigQueryTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        account = Account(number="012345678910", name="testing", s3_name="testing", role_name="SecurityMonkey",
+                          active=True, third_party=False)
+        db.session.add(account)
+        db.session.commit()
+
+        datastore = Datastore()
+        datastore.store('securitygroup', 'us-east-1', 'testing', 'web', True, SG_CONFIG)
+        datastore.store('securitygroup', 'us-east-1', 'testing', 'db', True, {'id': 'sg-5678', 'rules': []})
+
+    def _query(self, *predicates):
+        query = Item.query.join((ItemRevision, Item.latest_revision_id == ItemRevision.id))
+        for predicate in predicates:
+            query = query.filter(predicate_clause(predicate))
+        return sorted(item.name for item in query)
+
+    def test_path_document(self):
+        self.assertEqual(path_document('rules[].from_port', 22), {'rules': [{'from_port': 22}]})
+        self.assertEqual(path_document('a.b', 'c'), {'a': {'b': 'c'}})
+        self.assertEqual(path_document('tags[]', 'x'), {'tags': ['x']})
+
+    def test_query(self):
+        self.assertEqual(self._query({'path': 'rules[].from_port', 'equals': 22}), ['web'])
+        self.assertEqual(self._query({'path': 'rules[].from_port', 'not_equals': 22}), ['db'])
+        self.assertEqual(self._query({'path': 'vpc_id', 'exists': True}), ['web'])
+        self.assertEqual(self._query({'path': 'vpc_id', 'exists': False}), ['db'])
+        self.assertEqual(self._query({'path': 'id', 'equals': 'sg-5678'}), ['db'])
+
+        # contains matches several keys of the same list element:
+        self.assertEqual(self._query({'contains': {'rules': [{'from_port': 22, 'cidr_ip': '10.0.0.0/8'}]}}), ['web'])
+        self.assertEqual(self._query({'contains': {'rules': [{'from_port': 22, 'cidr_ip': '0.0.0.0/0'}]}}), [])
+
+    def test_bad_predicates(self):
+        for predicate in ['rules', {'path': 'rules[].from_port'}, {'equals': 22},
+                          {'path': 'rules[].from_port', 'exists': True}]:
+            with self.assertRaises(ValueError):
+                predicate_clause(predicate)
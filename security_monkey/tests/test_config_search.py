@@ -0,0 +1,70 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_config_search
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.config_search import config_search_text, config_search_filter
+from security_monkey.datastore import Account, Datastore, Item, ItemConfigSearch
+from security_monkey import db
+
+SG_CONFIG = {
+    'id': 'sg-1234',
+    'description': 'Web servers',
+    'rules': [{'from_port': 22, 'cidr_ip': '10.0.0.0/8'}, {'from_port': 443, 'cidr_ip': '0.0.0.0/0'}],
+    'owner': 'arn:aws:iam::012345678910:root'
+}
+
+
+class ConfigSearchTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        account = Account(number="012345678910", name="testing", s3_name="testing", role_name="SecurityMonkey",
+                          active=True, third_party=False)
+        db.session.add(account)
+        db.session.commit()
+
+        datastore = Datastore()
+        datastore.store('securitygroup', 'us-east-1', 'testing', 'web', True, SG_CONFIG)
+        datastore.store('securitygroup', 'us-east-1', 'testing', 'db', True, {'id': 'sg-5678', 'rules': []})
+
+    def _search(self, searchconfig):
+        query = Item.query.join((ItemConfigSearch, ItemConfigSearch.item_id == Item.id))
+        return sorted(item.name for item in query.filter(config_search_filter(searchconfig)))
+
+    def test_config_search_text(self):
+        self.assertEqual(config_search_text(SG_CONFIG),
+                         u'/description=web servers\n'
+                         u'/id=sg-1234\n'
+                         u'/owner=arn:aws:iam::012345678910:root\n'
+                         u'/rules/cidr_ip=10.0.0.0/8\n/rules/from_port=22\n'
+                         u'/rules/cidr_ip=0.0.0.0/0\n/rules/from_port=443\n')
+
+    def test_search(self):
+        self.assertEqual(self._search('SG-'), ['db', 'web'])
+        self.assertEqual(self._search('sg- 1234'), ['web'])
+        self.assertEqual(self._search('"web servers"'), ['web'])
+        self.assertEqual(self._search('from_port:22'), ['web'])
+        self.assertEqual(self._search('from_port:2'), [])
+        self.assertEqual(self._search('arn:aws:iam::012345678910'), ['web'])
+        # LIKE wildcards are matched literally:
+        self.assertEqual(self._search('%'), [])
+
+        # The search follows the latest revision:
+        Datastore().store('securitygroup', 'us-east-1', 'testing', 'web', False, {})
+        self.assertEqual(self._search('sg-1234'), [])
@@ -0,0 +1,71 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_distinct_index
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.distinct_index import DistinctIndex, get_distinct_index, clear_distinct_index
+from security_monkey.datastore import Account, Datastore
+from security_monkey import app, db
+
+from mock import patch
+
+ROWS = [
+    (1, 'securitygroup', 'prod', False, 'us-east-1', 'web', 'arn:web', True),
+    (2, 'securitygroup', 'test', False, 'us-west-2', 'Web-test', None, True),
+    (3, 'iamrole', 'prod', False, 'universal', 'admin', 'arn:admin', False),
+    (4, 's3', 'vendor', True, 'us-east-1', 'vendor-bucket', 'arn:vendor', True),
+]
+
+
+class DistinctIndexTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        clear_distinct_index()
+
+    def test_values(self):
+        index = DistinctIndex(ROWS)
+        self.assertEqual(index.values('tech'), ['iamrole', 's3', 'securitygroup'])
+        self.assertEqual(index.values('arn'), ['arn:admin', 'arn:vendor', 'arn:web'])
+        self.assertEqual(index.values('name', search='WEB'), ['Web-test', 'web'])
+        self.assertEqual(index.values('region', filters={'tech': ['securitygroup', 's3']}),
+                         ['us-east-1', 'us-west-2'])
+        self.assertEqual(index.values('name', filters={'tech': ['securitygroup'], 'account': ['prod']}), ['web'])
+        self.assertEqual(index.values('name', active=False), ['admin'])
+        self.assertEqual(index.values('account', third_party=False), ['prod', 'test'])
+        self.assertEqual(index.values('account', filters={'region': ['nowhere']}), [])
+        self.assertEqual(index.item_id('region', 'us-east-1'), 1)
+
+    def test_refresh(self):
+        db.session.add(Account(number="012345678910", name="testing", s3_name="testing",
+                               role_name="SecurityMonkey", active=True, third_party=False))
+        db.session.commit()
+        Datastore().store('securitygroup', 'us-east-1', 'testing', 'web', True, {})
+
+        index = get_distinct_index()
+        self.assertEqual(index.values('name'), ['web'])
+
+        Datastore().store('securitygroup', 'us-east-1', 'testing', 'db', True, {})
+        # Rebuilt at most every DISTINCT_INDEX_REFRESH seconds:
+        self.assertIs(get_distinct_index(), index)
+
+        with patch.dict(app.config, {'DISTINCT_INDEX_REFRESH': 0}):
+            index = get_distinct_index()
+            self.assertEqual(index.values('name'), ['db', 'web'])
+            # Not rebuilt while the data stays the same:
+            self.assertIs(get_distinct_index(), index)
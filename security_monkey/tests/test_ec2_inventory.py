@@ -0,0 +1,87 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_ec2_inventory
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common import ec2_inventory
+from security_monkey.common.ec2_inventory import get_ec2_inventory, clear_ec2_inventory
+from security_monkey.watchers.keypair import Keypair
+from security_monkey import app
+
+from boto.ec2.tag import Tag
+from mock import patch, MagicMock
+from datetime import timedelta
+
+
+class EC2InventoryTestCase(SecurityMonkeyTestCase):
+    def tearDown(self):
+        clear_ec2_inventory()
+        super(EC2InventoryTestCase, self).tearDown()
+
+    def test_describes_are_shared(self):
+        conn = MagicMock()
+        conn.get_all_tags.return_value = ['tag']
+        conn.get_only_instances.return_value = ['instance']
+        watcher = Keypair(accounts=['testing'])
+
+        with patch('security_monkey.common.sts_connect.connect', return_value=conn) as connect:
+            self.assertEqual(get_ec2_inventory('testing', 'us-east-1').tags(watcher), ['tag'])
+            self.assertEqual(get_ec2_inventory('testing', 'us-east-1').tags(watcher), ['tag'])
+            self.assertEqual(get_ec2_inventory('testing', 'us-east-1').instances(watcher), ['instance'])
+
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(conn.get_all_tags.call_count, 1)
+        self.assertEqual(conn.get_only_instances.call_count, 1)
+
+    def test_expiry_and_eviction(self):
+        first = get_ec2_inventory('testing', 'us-east-1')
+        first.created -= timedelta(minutes=app.config.get('EC2_INVENTORY_TTL', 5))
+        self.assertIsNot(get_ec2_inventory('testing', 'us-east-1'), first)
+
+        with patch.dict(app.config, {'EC2_INVENTORY_MAX_ENTRIES': 2}):
+            east = get_ec2_inventory('testing', 'us-east-1')
+            get_ec2_inventory('testing', 'us-west-2')
+            # Using us-east-1 again makes us-west-2 the least recently used:
+            get_ec2_inventory('testing', 'us-east-1')
+            get_ec2_inventory('testing', 'eu-west-1')
+
+        self.assertEqual(ec2_inventory._cache.keys(), [('testing', 'us-east-1'), ('testing', 'eu-west-1')])
+        self.assertIs(ec2_inventory._cache[('testing', 'us-east-1')], east)
+
+    def test_instance_names(self):
+        conn = MagicMock()
+        conn.get_all_tags.return_value = [Tag(res_id='i-1', name='Name', value='web'),
+                                          Tag(res_id='i-1', name='team', value='blue'),
+                                          Tag(res_id='i-2', name='Name', value='db')]
+        watcher = Keypair(accounts=['testing'])
+
+        with patch('security_monkey.common.sts_connect.connect', return_value=conn):
+            # Without a full tag download, only Name tags of instances are requested:
+            names = get_ec2_inventory('testing', 'us-east-1').instance_names(watcher)
+            conn.get_all_tags.assert_called_once_with(filters={'resource-type': 'instance', 'key': 'Name'})
+            self.assertEqual(names, {'i-1': 'web', 'i-2': 'db'})
+
+            # Once every tag has been downloaded, it is reused:
+            inventory = get_ec2_inventory('testing', 'us-west-2')
+            tag_index = inventory.tag_index(watcher)
+            self.assertEqual([tag.name for tag in tag_index['i-1']], ['Name', 'team'])
+            self.assertEqual(inventory.instance_names(watcher), {'i-1': 'web', 'i-2': 'db'})
+
+        self.assertEqual(conn.get_all_tags.call_count, 2)
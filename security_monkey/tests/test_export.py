@@ -0,0 +1,76 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_export
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.datastore import Account, Datastore, ItemAudit, ItemComment, User
+from security_monkey import db
+
+from mock import patch
+import csv
+import gzip
+from StringIO import StringIO
+
+
+class ExportTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        db.session.add(Account(number="012345678910", name="testing", s3_name="testing_s3",
+                               role_name="SecurityMonkey", active=True, third_party=False))
+        user = User(email="user@example.com", active=True, role="View")
+        db.session.add(user)
+        db.session.commit()
+
+        datastore = Datastore()
+        for i in range(5):
+            datastore.store('securitygroup', 'us-east-1', 'testing', 'sg{}'.format(i), True, {'id': i})
+        item = datastore._get_item('securitygroup', 'us-east-1', 'testing', 'sg3')
+        db.session.add(ItemAudit(item_id=item.id, issue='Open to "all"', score=10, notes='Checked'))
+        db.session.add(ItemComment(item_id=item.id, user_id=user.id, text='Looking'))
+        db.session.commit()
+
+        with self.test_app.session_transaction() as session:
+            session['user_id'] = user.id
+            session['_fresh'] = True
+
+    @patch('security_monkey.export.EXPORT_BATCH_SIZE', 2)
+    def test_export_items(self):
+        response = self.test_app.get('/api/1/export/items')
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(StringIO(response.data)))
+        self.assertEqual(rows[0], ['technology/name', 'account/name', 'account/s3_name', 'account/number',
+                                   'region', 'name', 'issues', 'comments'])
+        # Newest first, across batches:
+        self.assertEqual([row[5] for row in rows[1:]], ['sg4', 'sg3', 'sg2', 'sg1', 'sg0'])
+        self.assertEqual(rows[2][:6], ['securitygroup', 'testing', 'testing_s3', '012345678910', 'us-east-1', 'sg3'])
+        self.assertIn('Open to ""all""', response.data)
+        self.assertIn('User [user@example.com]', response.data)
+
+    @patch('security_monkey.export.EXPORT_BATCH_SIZE', 2)
+    def test_export_issues_gzip(self):
+        response = self.test_app.get('/api/1/export/issues', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+
+        lines = gzip.GzipFile(fileobj=StringIO(response.data)).read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1], '"securitygroup","testing","testing_s3","012345678910","us-east-1","sg3",'
+                                   '"[User [user@example.com]({}): Looking]","10","Open to ""all""",'
+                                   '"Checked","None","None","None"'.format(
+                                       ItemComment.query.first().date_created))
@@ -267,6 +267,16 @@ class IAMTestCase(SecurityMonkeyTestCase):
 
         self.assertEqual(get_cert_info(EXTERNAL_VALID_STR), valid)
 
+    def test_get_cert_info_is_cached(self):
+        from security_monkey.watchers.iam import iam_ssl
+        from mock import patch
+        with patch.object(iam_ssl, 'parse_cert_info', return_value={'domains': ['a.example.com']}) as parse:
+            first = iam_ssl.get_cert_info(EXTERNAL_VALID_STR)
+            first['domains'].append('b.example.com')
+            self.assertEqual(iam_ssl.get_cert_info(EXTERNAL_VALID_STR), {'domains': ['a.example.com']})
+        self.assertEqual(parse.call_count, 1)
+        iam_ssl._cert_info_cache.clear()
+
     def test_iam_full_admin_only(self):
         import json
         from security_monkey.auditors.iam.iam_policy import IAMPolicyAuditor
@@ -0,0 +1,70 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_item_summary
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.datastore import Account, AuditorSettings, Datastore, Item, ItemAudit, update_item_summary
+from security_monkey.auditor import Auditor
+from security_monkey.watcher import ChangeItem
+from security_monkey import db
+
+
+class ItemSummaryTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        account = Account(number="012345678910", name="testing", s3_name="testing", role_name="SecurityMonkey",
+                          active=True, third_party=False)
+        db.session.add(account)
+        db.session.commit()
+
+    def test_summary_follows_revisions_and_issues(self):
+        datastore = Datastore()
+        datastore.store('keypair', 'us-east-1', 'testing', 'alpha', True, {'fingerprint': 'aa'})
+        item = datastore._get_item('keypair', 'us-east-1', 'testing', 'alpha')
+        first_seen = item.summary.first_seen
+        self.assertEqual(item.summary.last_seen, first_seen)
+        self.assertTrue(item.summary.active)
+        self.assertEqual(item.summary.num_issues, 0)
+
+        datastore.store('keypair', 'us-east-1', 'testing', 'alpha', False, {})
+        self.assertEqual(item.summary.first_seen, first_seen)
+        self.assertGreaterEqual(item.summary.last_seen, first_seen)
+        self.assertFalse(item.summary.active)
+
+        disabled = AuditorSettings(disabled=True, issue_text='disabled')
+        item.issues.append(ItemAudit(score=10, issue='open', justified=False))
+        item.issues.append(ItemAudit(score=5, issue='justified', justified=True))
+        item.issues.append(ItemAudit(score=3, issue='disabled', justified=False, auditor_setting=disabled))
+        update_item_summary(item)
+        db.session.commit()
+
+        self.assertEqual(item.summary.num_issues, 3)
+        self.assertEqual(item.summary.issue_score, 15)
+        self.assertEqual(item.summary.unjustified_issue_score, 10)
+
+    def test_audit_before_save_adds_no_item(self):
+        # The reporter audits new items before the watcher saves them.
+        auditor = Auditor(accounts=['testing'])
+        auditor.index = 'keypair'
+        auditor.items = [ChangeItem(index='keypair', region='us-east-1', account='testing', name='beta',
+                                    new_config={'fingerprint': 'bb'})]
+        auditor.items[0].audit_issues = []
+        auditor.save_issues()
+
+        self.assertEqual(Item.query.filter(Item.name == 'beta').count(), 0)
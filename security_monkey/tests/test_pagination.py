@@ -0,0 +1,117 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_pagination
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.pagination import keyset_page, offset_page, cached_total, clear_cached_totals
+from security_monkey.datastore import Account, Datastore, Item, ItemAudit, ItemRevision, ItemSummary, User
+from security_monkey import db
+
+from datetime import datetime
+import json
+
+
+class PaginationTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        clear_cached_totals()
+        account = Account(number="012345678910", name="testing", s3_name="testing", role_name="SecurityMonkey",
+                          active=True, third_party=False)
+        db.session.add(account)
+        db.session.commit()
+
+        datastore = Datastore()
+        for i in range(5):
+            datastore.store('securitygroup', 'us-east-1', 'testing', 'sg{}'.format(i), True, {'id': i})
+
+        # Revisions created in the same instant are told apart by their id.
+        ItemRevision.query.update({ItemRevision.date_created: datetime(2016, 1, 1)})
+        db.session.commit()
+
+    def _all_pages(self, query, keys, count):
+        rows, after = keyset_page(query, keys, count=count)
+        pages = [rows]
+        while after:
+            rows, after = keyset_page(query, keys, after, count)
+            pages.append(rows)
+        return pages
+
+    def test_keyset_page(self):
+        keys = [(ItemRevision.date_created, True), (ItemRevision.id, True)]
+        pages = self._all_pages(ItemRevision.query, keys, 2)
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        ids = [revision.id for page in pages for revision in page]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(ids, [revision.id for revision in offset_page(ItemRevision.query, keys, 1, 5)])
+        self.assertEqual(ids[2:4], [revision.id for revision in offset_page(ItemRevision.query, keys, 2, 2)])
+
+    def test_keyset_page_mixed_directions(self):
+        for item in Item.query.all():
+            db.session.add(ItemAudit(item_id=item.id, issue='issue', score=item.id % 2, justified=item.id % 3 == 0))
+        db.session.commit()
+
+        keys = [(ItemAudit.justified, False), (ItemAudit.score, True), (ItemAudit.id, True)]
+        pages = self._all_pages(ItemAudit.query, keys, 2)
+
+        issues = [(issue.justified, -issue.score, -issue.id) for page in pages for issue in page]
+        self.assertEqual(len(issues), 5)
+        self.assertEqual(issues, sorted(issues))
+
+    def test_keyset_page_count(self):
+        keys = [(ItemRevision.date_created, True), (ItemRevision.id, True)]
+        for count in [0, -1]:
+            rows, after = keyset_page(ItemRevision.query, keys, count=count)
+            self.assertEqual(len(rows), 1)
+            self.assertTrue(after)
+
+    def test_item_list_null_last_seen(self):
+        ItemSummary.query.filter(ItemSummary.item_id.in_([item.id for item in Item.query.limit(2)])) \
+            .update({ItemSummary.last_seen: None}, synchronize_session=False)
+        user = User(email="user@example.com", active=True, role="View")
+        db.session.add(user)
+        db.session.commit()
+        with self.test_app.session_transaction() as session:
+            session['user_id'] = user.id
+            session['_fresh'] = True
+
+        names, after = [], None
+        while True:
+            url = '/api/1/items?count=2' + ('&after={}'.format(after) if after else '')
+            response = json.loads(self.test_app.get(url).data)
+            names.extend(item['name'] for item in response['items'])
+            after = response['next']
+            if not after:
+                break
+        self.assertEqual(sorted(names), ['sg0', 'sg1', 'sg2', 'sg3', 'sg4'])
+
+    def test_invalid_cursor(self):
+        keys = [(ItemRevision.date_created, True), (ItemRevision.id, True)]
+        for cursor in ['not a cursor', 'WzFd']:
+            with self.assertRaises(ValueError):
+                keyset_page(ItemRevision.query, keys, cursor)
+
+    def test_cached_total(self):
+        self.assertEqual(cached_total(ItemRevision.query), 5)
+        Datastore().store('securitygroup', 'us-east-1', 'testing', 'sg5', True, {'id': 5})
+        self.assertEqual(cached_total(ItemRevision.query), 5)
+        self.assertEqual(cached_total(ItemRevision.query.filter(ItemRevision.active == True)), 6)
+
+        clear_cached_totals()
+        self.assertEqual(cached_total(ItemRevision.query), 6)
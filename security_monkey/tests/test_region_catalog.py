@@ -0,0 +1,88 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_region_catalog
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common import region_catalog
+from security_monkey.common.region_catalog import get_regions
+from security_monkey.datastore import Account, AccountRegion
+from security_monkey.decorators import iter_account_region
+from security_monkey import app, db
+
+from mock import patch
+from datetime import datetime, timedelta
+
+REGIONS = ['cn-north-1', 'eu-central-1', 'us-east-1', 'us-west-2']
+
+
+class RegionCatalogTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        account = Account(number="012345678910", name="testing", s3_name="testing", role_name="SecurityMonkey",
+                          active=True, third_party=False)
+        db.session.add(account)
+        db.session.commit()
+
+    def test_regions_are_stored(self):
+        with patch.object(region_catalog, '_discover', return_value=REGIONS) as discover:
+            self.assertEqual([region.name for region in get_regions('testing')],
+                             ['eu-central-1', 'us-east-1', 'us-west-2'])
+            get_regions('testing')
+        self.assertEqual(discover.call_count, 1)
+        self.assertEqual(sorted(row.region for row in AccountRegion.query.all()), REGIONS)
+
+        # Once a day old, they are refreshed:
+        for row in AccountRegion.query.all():
+            row.discovered -= timedelta(hours=24)
+        db.session.commit()
+        with patch.object(region_catalog, '_discover', return_value=['us-east-1']) as discover:
+            self.assertEqual([region.name for region in get_regions('testing')], ['us-east-1'])
+        self.assertEqual(discover.call_count, 1)
+
+    def test_failed_refresh_uses_stored_regions(self):
+        account = Account.query.filter(Account.name == 'testing').first()
+        stale = datetime.utcnow() - timedelta(days=2)
+        db.session.add(AccountRegion(account_id=account.id, region='us-west-2', discovered=stale))
+        db.session.commit()
+
+        with patch.object(region_catalog, '_discover', side_effect=Exception('throttled')):
+            self.assertEqual([region.name for region in get_regions('testing')], ['us-west-2'])
+
+        AccountRegion.query.delete()
+        db.session.commit()
+        with patch.object(region_catalog, '_discover', side_effect=Exception('throttled')):
+            self.assertRaises(Exception, get_regions, 'testing')
+
+    def test_exclusions_and_services(self):
+        with patch.object(region_catalog, '_discover', return_value=REGIONS):
+            with patch.dict(app.config, {'EXCLUDED_REGIONS': ['us-west-2']}):
+                self.assertEqual([region.name for region in get_regions('testing')],
+                                 ['cn-north-1', 'eu-central-1', 'us-east-1'])
+
+            # boto doesn't know SES in eu-central-1:
+            self.assertEqual([region.name for region in get_regions('testing', 'ses')], ['us-east-1', 'us-west-2'])
+
+    def test_iter_account_region(self):
+        @iter_account_region(index='test', accounts=['testing'], service='sqs')
+        def slurp(**kwargs):
+            return [kwargs['region']], {}
+
+        with patch.object(region_catalog, '_discover', return_value=REGIONS):
+            items, exception_map = slurp()
+        self.assertEqual(items, ['eu-central-1', 'us-east-1', 'us-west-2'])
@@ -0,0 +1,111 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_response_cache
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.response_cache import cached_response, clear_cached_responses, served_data_version
+from security_monkey.datastore import bump_data_version, get_data_version
+from security_monkey import app
+
+
+class MockService(object):
+    def __init__(self, user):
+        self.auth_dict = {'user': user}
+        self.calls = 0
+
+    @cached_response
+    def get(self):
+        self.calls += 1
+        if self.calls > 10:
+            return {'Error': 'Too many calls'}, 400
+        return {'items': [self.calls], 'auth': self.auth_dict}, 200
+
+
+class LaggingService(MockService):
+    def __init__(self, user, version):
+        super(LaggingService, self).__init__(user)
+        self.version = version
+
+    @cached_response
+    def get(self):
+        self.calls += 1
+        served_data_version(self.version)
+        return {'items': [self.calls], 'auth': self.auth_dict}, 200
+
+
+class ResponseCacheTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        clear_cached_responses()
+
+    def _get(self, service, url='/api/1/items?count=30', headers=None):
+        with app.test_request_context(url, headers=headers):
+            return service.get()
+
+    def test_cached_until_data_changes(self):
+        service = MockService('first@example.com')
+        data, code, headers = self._get(service)
+        self.assertEqual(data, {'items': [1], 'auth': {'user': 'first@example.com'}})
+
+        # Other users with the same role share the response, with their own auth.
+        data, code, headers = self._get(MockService('second@example.com'), '/api/1/items?count=30&names=')
+        self.assertEqual(data, {'items': [1], 'auth': {'user': 'second@example.com'}})
+        self.assertEqual(service.calls, 1)
+
+        self._get(service, '/api/1/items?count=10')
+        self.assertEqual(service.calls, 2)
+
+        bump_data_version()
+        data, code, headers = self._get(service)
+        self.assertEqual(data['items'], [3])
+
+    def test_not_modified(self):
+        service = MockService('first@example.com')
+        data, code, headers = self._get(service)
+
+        response = self._get(service, headers={'If-None-Match': headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(service.calls, 1)
+
+        bump_data_version()
+        data, code, new_headers = self._get(service, headers={'If-None-Match': headers['ETag']})
+        self.assertEqual(code, 200)
+        self.assertNotEqual(new_headers['ETag'], headers['ETag'])
+
+    def test_errors_not_cached(self):
+        service = MockService('first@example.com')
+        service.calls = 10
+        self.assertEqual(self._get(service), ({'Error': 'Too many calls'}, 400))
+        self.assertEqual(self._get(service), ({'Error': 'Too many calls'}, 400))
+        self.assertEqual(service.calls, 12)
+
+    def test_lagging_data_not_cached(self):
+        bump_data_version()
+        service = LaggingService('first@example.com', get_data_version() - 1)
+        data, code, headers = self._get(service)
+        self.assertNotIn('ETag', headers)
+        self._get(service)
+        self.assertEqual(service.calls, 2)
+
+        # Once the data catches up:
+        service.version = get_data_version()
+        data, code, headers = self._get(service)
+        self.assertIn('ETag', headers)
+        self._get(service)
+        self.assertEqual(service.calls, 3)
@@ -0,0 +1,94 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_route53
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.datastore import Account, Datastore
+from security_monkey.watchers import route53
+from security_monkey.watchers.route53 import Route53
+from security_monkey import app, db
+
+from mock import patch, MagicMock
+
+ZONE = {'Id': '/hostedzone/Z1', 'Name': 'example.com.', 'CallerReference': 'ref',
+        'Config': {'PrivateZone': False}, 'ResourceRecordSetCount': 2}
+RECORDS = [
+    [{'Name': 'example.com.', 'Type': 'A', 'TTL': 300, 'ResourceRecords': [{'Value': '10.0.0.1'}]}],
+    [{'Name': 'www.example.com.', 'Type': 'CNAME', 'TTL': 300, 'ResourceRecords': [{'Value': 'example.com'}]}],
+]
+
+
+class Route53TestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        account = Account(number="012345678910", name="testing", s3_name="testing", role_name="SecurityMonkey",
+                          active=True, third_party=False)
+        db.session.add(account)
+        db.session.commit()
+
+    def tearDown(self):
+        route53._zone_sweeps.clear()
+        super(Route53TestCase, self).tearDown()
+
+    def _slurp(self, zone):
+        """
+        :returns: the items, and how many times the zone's records were listed.
+        """
+        def list_resource_record_sets(HostedZoneId=None, StartRecordName=None, StartRecordType=None):
+            if StartRecordName is None:
+                return {'ResourceRecordSets': RECORDS[0], 'IsTruncated': True,
+                        'NextRecordName': 'www.example.com.', 'NextRecordType': 'CNAME'}
+            self.assertEqual((StartRecordName, StartRecordType), ('www.example.com.', 'CNAME'))
+            return {'ResourceRecordSets': RECORDS[1], 'IsTruncated': False}
+
+        client = MagicMock()
+        client.list_resource_record_sets.side_effect = list_resource_record_sets
+        with patch.object(route53, 'list_hosted_zones', return_value=[zone]):
+            with patch.object(route53, 'route53_client', return_value=client):
+                items, exception_map = Route53(accounts=['testing']).slurp()
+        self.assertEqual(exception_map, {})
+        first_pages = [call for call in client.list_resource_record_sets.call_args_list
+                       if 'StartRecordName' not in call[1]]
+        return items, len(first_pages)
+
+    def test_zones_listed_every_run(self):
+        for _ in range(2):
+            items, listings = self._slurp(ZONE)
+            self.assertEqual(listings, 1)
+            self.assertEqual(sorted(item.name for item in items), ['example.com.', 'www.example.com.'])
+
+    @patch.dict(app.config, {'ROUTE53_SKIP_UNCHANGED_ZONES': True})
+    def test_unchanged_zones_are_not_listed(self):
+        items, listings = self._slurp(ZONE)
+        self.assertEqual(listings, 1)
+        self.assertEqual(sorted(item.name for item in items), ['example.com.', 'www.example.com.'])
+
+        datastore = Datastore()
+        for item in items:
+            datastore.store('route53', 'universal', 'testing', item.name, True, item.new_config)
+
+        items, listings = self._slurp(ZONE)
+        self.assertEqual(listings, 0)
+        watcher = Route53(accounts=['testing'])
+        watcher.find_changes(current=items, exception_map={})
+        self.assertEqual(watcher.created_items + watcher.changed_items + watcher.deleted_items, [])
+
+        # A record was added:
+        items, listings = self._slurp(dict(ZONE, ResourceRecordSetCount=3))
+        self.assertEqual(listings, 1)
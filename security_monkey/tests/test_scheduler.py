@@ -89,6 +89,10 @@ class MockWatcher(object):
     def find_changes(self, current=[], exception_map={}):
         pass
 
+    def find_changes_by_partition(self):
+        item_list, exception_map = self.slurp()
+        yield item_list
+
 
 class MockAuditor(object):
 
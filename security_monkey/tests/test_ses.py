@@ -0,0 +1,70 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_ses
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.watchers.ses import SES, VERIFICATION_BATCH_SIZE
+from security_monkey import db
+
+from boto.regioninfo import RegionInfo
+from mock import patch, MagicMock
+
+DOMAINS = ['domain{}.example.com'.format(i) for i in range(250)]
+
+
+def _verification_attributes(Identities):
+    # Odd numbered domains are still pending:
+    return {'VerificationAttributes': {
+        domain: {'VerificationStatus': 'Pending' if int(domain[6:].split('.')[0]) % 2 else 'Success'}
+        for domain in Identities}}
+
+
+class SESTestCase(SecurityMonkeyTestCase):
+    def test_verification_is_batched(self):
+        ses = MagicMock()
+        ses.list_identities.side_effect = [
+            {'Identities': DOMAINS[:200], 'NextToken': 'page2'},
+            {'Identities': DOMAINS[200:] + ['alice@example.com', 'bob@example.com']}
+        ]
+        ses.list_verified_email_addresses.return_value = {'VerifiedEmailAddresses': ['alice@example.com']}
+        ses.get_identity_verification_attributes.side_effect = _verification_attributes
+
+        watcher = SES(accounts=['testing'])
+        db.session.remove()
+        checked_out = db.engine.pool.checkedout()
+        with patch('security_monkey.watchers.ses.get_regions', return_value=[RegionInfo(name='us-east-1')]):
+            with patch('security_monkey.common.sts_connect.connect', return_value=ses) as connect:
+                items, exception_map = watcher.slurp()
+
+        self.assertEqual(exception_map, {})
+        # The batches' threads share the region's connection, and hold no database connections:
+        self.assertEqual(connect.call_count, 1)
+        db.session.remove()
+        self.assertEqual(db.engine.pool.checkedout(), checked_out)
+        batches = [call[1]['Identities'] for call in ses.get_identity_verification_attributes.call_args_list]
+        self.assertEqual(sorted(len(batch) for batch in batches), [50, VERIFICATION_BATCH_SIZE, VERIFICATION_BATCH_SIZE])
+        self.assertEqual(sorted(sum(batches, [])), sorted(DOMAINS))
+
+        configs = {item.name: item.new_config for item in items}
+        self.assertEqual(len(configs), 252)
+        self.assertEqual(configs['domain2.example.com'], {'name': 'domain2.example.com', 'verified': True})
+        self.assertEqual(configs['domain3.example.com'], {'name': 'domain3.example.com', 'verified': False})
+        self.assertTrue(configs['alice@example.com']['verified'])
+        self.assertFalse(configs['bob@example.com']['verified'])
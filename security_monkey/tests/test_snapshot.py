@@ -0,0 +1,127 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_snapshot
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.export.snapshot import export_snapshot, iter_snapshot_records
+from security_monkey.datastore import Account, Datastore, User
+from security_monkey import db
+
+from mock import patch
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+
+class SnapshotTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        for name in ['testing', 'other']:
+            db.session.add(Account(number="01234567891{}".format(len(name)), name=name, s3_name=name,
+                                   role_name="SecurityMonkey", active=True, third_party=False))
+        user = User(email="user@example.com", active=True, role="View")
+        db.session.add(user)
+        db.session.commit()
+
+        datastore = Datastore()
+        for i in range(5):
+            datastore.store('securitygroup', 'us-east-1', 'testing', 'sg{}'.format(i), True, {'id': i})
+        datastore.store('securitygroup', 'us-east-1', 'testing', 'sg0', True, {'id': 0, 'rules': []})
+        datastore.store('s3', 'us-east-1', 'other', 'bucket', True, {'policy': None})
+
+        with self.test_app.session_transaction() as session:
+            session['user_id'] = user.id
+            session['_fresh'] = True
+
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        super(SnapshotTestCase, self).tearDown()
+
+    def _read_parts(self, manifest):
+        records = []
+        for part in manifest['parts']:
+            with gzip.open(os.path.join(self.folder, part['file'])) as part_file:
+                records.extend(json.loads(line) for line in part_file)
+        return records
+
+    def test_latest_revisions(self):
+        records = list(iter_snapshot_records(account_names=['testing'], chunk_size=2))
+        self.assertEqual([record['name'] for record in records], ['sg0', 'sg1', 'sg2', 'sg3', 'sg4'])
+        self.assertEqual(records[0]['config'], {'id': 0, 'rules': []})
+        self.assertEqual(records[0]['technology'], 'securitygroup')
+
+        records = list(iter_snapshot_records(technology_names=['s3']))
+        self.assertEqual([record['name'] for record in records], ['bucket'])
+
+    def test_export_parts(self):
+        manifest = export_snapshot(self.folder, part_size=2)
+        self.assertTrue(manifest['complete'])
+        self.assertEqual(manifest['records'], 6)
+        self.assertEqual([part['file'] for part in manifest['parts']],
+                         ['part-00000.ndjson.gz', 'part-00001.ndjson.gz', 'part-00002.ndjson.gz'])
+        self.assertEqual(sorted(os.listdir(self.folder)),
+                         ['manifest.json', 'part-00000.ndjson.gz', 'part-00001.ndjson.gz', 'part-00002.ndjson.gz'])
+
+        records = self._read_parts(manifest)
+        self.assertEqual([record['name'] for record in records], ['sg0', 'sg1', 'sg2', 'sg3', 'sg4', 'bucket'])
+        with open(os.path.join(self.folder, 'manifest.json')) as manifest_file:
+            self.assertEqual(json.load(manifest_file), manifest)
+
+    def test_resume(self):
+        original = iter_snapshot_records
+
+        def interrupted(*args, **kwargs):
+            for number, record in enumerate(original(*args, **kwargs)):
+                if number == 3:
+                    raise IOError("Interrupted")
+                yield record
+
+        with patch('security_monkey.export.snapshot.iter_snapshot_records', interrupted):
+            with self.assertRaises(IOError):
+                export_snapshot(self.folder, part_size=2)
+
+        with open(os.path.join(self.folder, 'manifest.json')) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertFalse(manifest['complete'])
+        self.assertEqual(manifest['records'], 2)
+
+        manifest = export_snapshot(self.folder, part_size=2)
+        self.assertTrue(manifest['complete'])
+        records = self._read_parts(manifest)
+        self.assertEqual([record['name'] for record in records], ['sg0', 'sg1', 'sg2', 'sg3', 'sg4', 'bucket'])
+
+        with self.assertRaises(ValueError):
+            export_snapshot(self.folder, account_names=['testing'], part_size=2)
+
+    def test_endpoint(self):
+        response = self.test_app.get('/api/1/export/snapshot?technologies=securitygroup')
+        self.assertEqual(response.status_code, 200)
+        records = [json.loads(line) for line in response.data.splitlines()]
+        self.assertEqual([record['name'] for record in records], ['sg0', 'sg1', 'sg2', 'sg3', 'sg4'])
+
+        response = self.test_app.get('/api/1/export/snapshot?after={}'.format(records[3]['item_id']))
+        records = [json.loads(line) for line in response.data.splitlines()]
+        self.assertEqual([record['name'] for record in records], ['sg4', 'bucket'])
+
+        response = self.test_app.get('/api/1/export/snapshot?after=sg3')
+        self.assertEqual(response.status_code, 400)
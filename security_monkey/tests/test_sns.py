@@ -0,0 +1,117 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_sns
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.watchers.sns import SNS
+from security_monkey.datastore import Account
+from security_monkey import app, db
+
+from boto.regioninfo import RegionInfo
+from mock import patch, MagicMock
+import json
+
+TOPIC_ARN = 'arn:aws:sns:us-east-1:012345678910:{}'
+POLICY = {'Version': '2012-10-17', 'Statement': []}
+
+
+def _subscription(topic, endpoint):
+    return {'TopicArn': TOPIC_ARN.format(topic), 'Protocol': 'email', 'Endpoint': endpoint, 'Owner': '012345678910',
+            'SubscriptionArn': TOPIC_ARN.format(topic) + ':' + endpoint}
+
+
+SUBSCRIPTIONS = {
+    'alerts': [_subscription('alerts', 'b@example.com'), _subscription('alerts', 'a@example.com')],
+    'quiet': []
+}
+
+
+def _list_subscriptions(NextToken=None):
+    if NextToken is None:
+        return {'Subscriptions': [SUBSCRIPTIONS['alerts'][0]], 'NextToken': 'page2'}
+    return {'Subscriptions': [SUBSCRIPTIONS['alerts'][1]]}
+
+
+def _list_subscriptions_by_topic(TopicArn):
+    return {'Subscriptions': SUBSCRIPTIONS[TopicArn.split(':')[5]]}
+
+
+def _sns():
+    sns = MagicMock()
+    sns.list_topics.return_value = {'Topics': [{'TopicArn': TOPIC_ARN.format('alerts')},
+                                               {'TopicArn': TOPIC_ARN.format('quiet')}]}
+    sns.get_topic_attributes.return_value = {'Attributes': {'Policy': json.dumps(POLICY)}}
+    sns.list_subscriptions.side_effect = _list_subscriptions
+    sns.list_subscriptions_by_topic.side_effect = _list_subscriptions_by_topic
+    return sns
+
+
+class SNSTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        db.session.add(Account(number="012345678910", name="testing", s3_name="testing",
+                               role_name="SecurityMonkey", active=True, third_party=False))
+        db.session.commit()
+
+    def _slurp(self, sns):
+        watcher = SNS(accounts=['testing'])
+        with patch('security_monkey.watchers.sns.get_regions', return_value=[RegionInfo(name='us-east-1')]):
+            with patch('security_monkey.common.sts_connect.connect', return_value=sns) as connect:
+                items, exception_map = watcher.slurp()
+        # The threads share the connection the topics were listed with:
+        self.assertEqual(connect.call_count, 1)
+        return {item.name: item.new_config for item in items}, exception_map
+
+    def test_subscriptions_listed_once(self):
+        sns = _sns()
+        configs, exception_map = self._slurp(sns)
+
+        self.assertEqual(exception_map, {})
+        self.assertEqual(sns.list_subscriptions.call_count, 2)
+        self.assertFalse(sns.list_subscriptions_by_topic.called)
+        # Sorted, whatever the order of the pages:
+        self.assertEqual(configs['alerts']['subscriptions'], SUBSCRIPTIONS['alerts'][::-1])
+        self.assertEqual(configs['quiet']['subscriptions'], [])
+        self.assertEqual(configs['quiet']['policy'], POLICY)
+
+    def test_same_configs_per_topic(self):
+        bulk_configs, _ = self._slurp(_sns())
+
+        sns = _sns()
+        with patch.dict(app.config, {'SNS_LIST_ALL_SUBSCRIPTIONS': False}):
+            configs, exception_map = self._slurp(sns)
+
+        self.assertEqual(exception_map, {})
+        self.assertFalse(sns.list_subscriptions.called)
+        self.assertEqual(configs, bulk_configs)
+
+    def test_threads_release_connections(self):
+        sns = _sns()
+        sns.get_topic_attributes.return_value = {'Attributes': {'Policy': 'not json'}}
+
+        db.session.remove()
+        checked_out = db.engine.pool.checkedout()
+        configs, exception_map = self._slurp(sns)
+        db.session.remove()
+
+        # With no technology to log them against, storing the exceptions fails inside an open
+        # transaction on each worker's session.  The sessions were still removed:
+        self.assertEqual(configs, {})
+        self.assertEqual(len(exception_map), 2)
+        self.assertEqual(db.engine.pool.checkedout(), checked_out)
@@ -0,0 +1,73 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_sqs
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.datastore import Account
+from security_monkey.watchers.sqs import SQS
+from security_monkey import db
+
+from boto.regioninfo import RegionInfo
+from botocore.exceptions import ClientError
+from mock import patch, MagicMock
+import json
+
+QUEUE_URL = 'https://queue.amazonaws.com/012345678910/{}'
+POLICY = {'Version': '2012-10-17', 'Statement': []}
+
+
+def _list_queues(**kwargs):
+    if 'NextToken' not in kwargs:
+        return {'QueueUrls': [QUEUE_URL.format('first'), QUEUE_URL.format('nopolicy')], 'NextToken': 'page2'}
+    return {'QueueUrls': [QUEUE_URL.format('second'), QUEUE_URL.format('gone')]}
+
+
+def _get_queue_attributes(QueueUrl=None, AttributeNames=None):
+    if QueueUrl.endswith('gone'):
+        raise ClientError({'Error': {'Code': 'AWS.SimpleQueueService.NonExistentQueue'}}, 'GetQueueAttributes')
+    if QueueUrl.endswith('nopolicy'):
+        return {}
+    return {'Attributes': {'Policy': json.dumps(POLICY)}}
+
+
+class SQSTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        account = Account(number="012345678910", name="testing", s3_name="testing", role_name="SecurityMonkey",
+                          active=True, third_party=False)
+        db.session.add(account)
+        db.session.commit()
+
+    def test_slurp_pages(self):
+        sqs = MagicMock()
+        sqs.list_queues.side_effect = _list_queues
+        sqs.get_queue_attributes.side_effect = _get_queue_attributes
+
+        watcher = SQS(accounts=['testing'])
+        with patch('security_monkey.watchers.sqs.get_regions', return_value=[RegionInfo(name='us-east-1')]):
+            with patch('security_monkey.common.sts_connect.connect', return_value=sqs):
+                items, exception_map = watcher.slurp()
+
+        self.assertEqual(exception_map, {})
+        self.assertEqual(sqs.list_queues.call_count, 2)
+        self.assertEqual(sorted(item.name for item in items), ['first', 'second'])
+
+        item = [item for item in items if item.name == 'first'][0]
+        self.assertEqual(item.arn, 'arn:aws:sqs:us-east-1:012345678910:first')
+        self.assertEqual(item.new_config, dict(POLICY, arn=item.arn))
@@ -0,0 +1,150 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.tests.test_watcher
+    :platform: Unix
+
+.. version:: $$VERSION$$
+.. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
+
+"""
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.datastore import Account, Datastore
+from security_monkey.exceptions import BotoConnectionIssue
+from security_monkey.watchers.keypair import Keypair, KeypairItem
+from security_monkey import db
+
+from mock import patch
+
+
+def _slurp(watcher):
+    # alpha has changed, beta is gone and gamma can't be read:
+    items = [KeypairItem(region='us-east-1', account='testing', name='alpha', config={'fingerprint': 'ab'})]
+    exception_map = {('keypair', 'testing', 'us-west-2'): BotoConnectionIssue('error', 'keypair', 'testing', 'us-west-2')}
+    return items, exception_map
+
+
+class WatcherTestCase(SecurityMonkeyTestCase):
+    def pre_test_setup(self):
+        account = Account(number="012345678910", name="testing", s3_name="testing", role_name="SecurityMonkey",
+                          active=True, third_party=False)
+        db.session.add(account)
+        db.session.commit()
+
+        datastore = Datastore()
+        datastore.store('keypair', 'us-east-1', 'testing', 'alpha', True, {'fingerprint': 'aa'})
+        datastore.store('keypair', 'us-east-1', 'testing', 'beta', True, {'fingerprint': 'bb'})
+        datastore.store('keypair', 'us-west-2', 'testing', 'gamma', True, {'fingerprint': 'cc'})
+
+    def test_slurp_items_filters_full_slurp(self):
+        watcher = Keypair(accounts=['testing'])
+        locations = [('keypair', 'testing', 'us-east-1', 'alpha')]
+        with patch.object(Keypair, 'slurp', _slurp):
+            items, exception_map = watcher.slurp_items(locations)
+
+        self.assertEqual([item.name for item in items], ['alpha'])
+        self.assertEqual(exception_map, {})
+
+        watcher.find_changes(current=items, exception_map=exception_map, locations=locations)
+        self.assertEqual([item.name for item in watcher.changed_items], ['alpha'])
+        self.assertEqual(watcher.deleted_items, [])
+
+    def test_slurp_items_only_deletes_requested_locations(self):
+        watcher = Keypair(accounts=['testing'])
+        locations = [('keypair', 'testing', 'us-east-1', 'beta'), ('keypair', 'testing', 'us-west-2')]
+        with patch.object(Keypair, 'slurp', _slurp):
+            items, exception_map = watcher.slurp_items(locations)
+
+        self.assertEqual(items, [])
+        self.assertEqual(exception_map.keys(), [('keypair', 'testing', 'us-west-2')])
+
+        watcher.find_changes(current=items, exception_map=exception_map, locations=locations)
+        self.assertEqual([item.name for item in watcher.deleted_items], ['beta'])
+        self.assertEqual(watcher.changed_items, [])
+
+    def test_paginate(self):
+        watcher = Keypair(accounts=['testing'])
+        pages = {
+            None: {'Keys': [1, 2], 'Truncated': True, 'NextMarker': 'a'},
+            'a': {'Keys': [3], 'Truncated': True, 'NextMarker': 'b'},
+            'b': {'Keys': [4], 'Truncated': False, 'NextMarker': 'c'},
+        }
+        calls = []
+
+        def list_keys(Marker=None):
+            calls.append(Marker)
+            return pages[Marker]
+
+        results = watcher.paginate(list_keys, 'Keys', next_token_key='NextMarker', truncated_key='Truncated')
+        self.assertEqual(next(results), 1)
+        self.assertEqual(calls, [None])
+        self.assertEqual(list(results), [2, 3, 4])
+        self.assertEqual(calls, [None, 'a', 'b'])
+
+    def test_paginate_nested_response(self):
+        watcher = Keypair(accounts=['testing'])
+        pages = {
+            None: {'ListTopicsResponse': {'ListTopicsResult': {'Topics': ['x'], 'NextToken': 't'}}},
+            't': {'ListTopicsResponse': {'ListTopicsResult': {'Topics': ['y'], 'NextToken': None}}},
+        }
+        path = 'ListTopicsResponse.ListTopicsResult.'
+        results = watcher.paginate(lambda next_token=None: pages[next_token], path + 'Topics',
+                                   token_param='next_token', next_token_key=path + 'NextToken')
+        self.assertEqual(list(results), ['x', 'y'])
+
+    def test_paginate_several_tokens(self):
+        watcher = Keypair(accounts=['testing'])
+        pages = {
+            (None, None, None): {'Records': [1], 'IsTruncated': True, 'NextName': 'b', 'NextType': 'A',
+                                 'NextIdentifier': 'x'},
+            ('b', 'A', 'x'): {'Records': [2], 'IsTruncated': True, 'NextName': 'c', 'NextType': 'MX'},
+            ('c', 'MX', None): {'Records': [3], 'IsTruncated': False},
+        }
+
+        def list_records(StartName=None, StartType=None, StartIdentifier=None):
+            return pages[(StartName, StartType, StartIdentifier)]
+
+        results = watcher.paginate(list_records, 'Records', truncated_key='IsTruncated',
+                                   token_param={'StartName': 'NextName', 'StartType': 'NextType',
+                                                'StartIdentifier': 'NextIdentifier'})
+        self.assertEqual(list(results), [1, 2, 3])
+
+    def test_find_changes_by_partition(self):
+        watcher = Keypair(accounts=['testing'])
+        with patch.object(Keypair, 'slurp', _slurp):
+            partitions = sorted(watcher.slurp_partitions())
+            changes = list(watcher.find_changes_by_partition())
+
+        self.assertEqual([(account, region, len(items)) for account, region, items, _ in partitions],
+                         [('testing', 'us-east-1', 1), ('testing', 'us-west-2', 0)])
+        self.assertEqual(sorted(len(changed) for changed in changes), [0, 1])
+        self.assertEqual([item.name for item in watcher.changed_items], ['alpha'])
+        # gamma couldn't be read, so it isn't deleted:
+        self.assertEqual([item.name for item in watcher.deleted_items], ['beta'])
+
+        # Each partition was saved as it was diffed, and isn't saved again:
+        self.assertEqual(Datastore().get('keypair', 'us-east-1', 'testing', 'alpha').count(), 2)
+        watcher.save()
+        self.assertEqual(Datastore().get('keypair', 'us-east-1', 'testing', 'alpha').count(), 2)
+
+    def test_find_changes_by_partition_empty_region(self):
+        watcher = Keypair(accounts=['testing'])
+        items = [KeypairItem(region='us-east-1', account='testing', name='alpha', config={'fingerprint': 'aa'})]
+        with patch.object(Keypair, 'slurp', return_value=(items, {})):
+            for _ in watcher.find_changes_by_partition():
+                pass
+
+        # us-west-2 has no items left, so it yields no partition of its own:
+        self.assertEqual(sorted(item.name for item in watcher.deleted_items), ['beta', 'gamma'])
+        self.assertEqual(watcher.changed_items, [])
@@ -16,6 +16,7 @@ from security_monkey.views import AuthenticatedService
 from security_monkey.views import ACCOUNT_FIELDS
 from security_monkey.datastore import Account
 from security_monkey.datastore import User
+from security_monkey.datastore import bump_data_version
 from security_monkey import db, rbac
 
 from flask_restful import marshal, reqparse
@@ -148,6 +149,7 @@ class AccountGetPutDelete(AuthenticatedService):
         db.session.add(account)
         db.session.commit()
         db.session.refresh(account)
+        bump_data_version()
 
         marshaled_account = marshal(account.__dict__, ACCOUNT_FIELDS)
         marshaled_account['auth'] = self.auth_dict
@@ -195,6 +197,7 @@ class AccountGetPutDelete(AuthenticatedService):
 
         db.session.delete(account)
         db.session.commit()
+        bump_data_version()
 
         return {'status': 'deleted'}, 202
 
@@ -276,6 +279,7 @@ class AccountPostList(AuthenticatedService):
         db.session.add(account)
         db.session.commit()
         db.session.refresh(account)
+        bump_data_version()
 
         marshaled_account = marshal(account.__dict__, ACCOUNT_FIELDS)
         marshaled_account['auth'] = self.auth_dict
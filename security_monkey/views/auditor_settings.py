@@ -1,5 +1,6 @@
 from security_monkey.views import AuthenticatedService
-from security_monkey.datastore import Account, AuditorSettings, Technology, ItemAudit
+from security_monkey.datastore import Account, AuditorSettings, Technology, ItemAudit, Item, update_item_summary
+from security_monkey.datastore import bump_data_version
 from security_monkey.views import AUDITORSETTING_FIELDS
 from security_monkey import db, rbac
 
@@ -214,5 +215,13 @@ class AuditorSettingsPut(AuthenticatedService):
         results = AuditorSettings.query.get(as_id)
         results.disabled = disabled
         db.session.add(results)
+
+        # The scores of the items with these issues change:
+        items = Item.query.join((ItemAudit, ItemAudit.item_id == Item.id)) \
+            .filter(ItemAudit.auditor_setting_id == as_id).distinct().all()
+        for item in items:
+            update_item_summary(item)
+
         db.session.commit()
+        bump_data_version()
         return 200
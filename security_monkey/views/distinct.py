@@ -13,18 +13,25 @@
 #     limitations under the License.
 
 from security_monkey.views import AuthenticatedService
-from security_monkey.datastore import Item
-from security_monkey.datastore import Account
-from security_monkey.datastore import Technology
-from security_monkey.datastore import ItemRevision
+from security_monkey.common.distinct_index import get_distinct_index, DIMENSIONS
+from security_monkey.common.response_cache import cached_response, served_data_version
 from security_monkey import rbac
 
 from flask_restful import reqparse
-from sqlalchemy.sql.expression import func
 
 import json
 
 
+# query arg => the dimension it filters
+DIMENSION_ARGS = {
+    'regions': 'region',
+    'accounts': 'account',
+    'technologies': 'tech',
+    'names': 'name',
+    'arns': 'arn'
+}
+
+
 class Distinct(AuthenticatedService):
     decorators = [
         rbac.allow(["View"], ["GET"])
@@ -34,12 +41,16 @@ class Distinct(AuthenticatedService):
         self.reqparse = reqparse.RequestParser()
         super(Distinct, self).__init__()
 
+    @cached_response
     def get(self, key_id):
         """
             .. http:get:: /api/1/distinct
 
             Get a list of distinct regions, names, accounts, or technologies
 
+            The values come from an in-memory index of every item, which follows the data within
+            DISTINCT_INDEX_REFRESH seconds.
+
             **Example Request**:
 
             .. sourcecode:: http
@@ -68,6 +79,7 @@ class Distinct(AuthenticatedService):
         self.reqparse.add_argument('accounts', type=str, default=None, location='args')
         self.reqparse.add_argument('technologies', type=str, default=None, location='args')
         self.reqparse.add_argument('names', type=str, default=None, location='args')
+        self.reqparse.add_argument('arns', type=str, default=None, location='args')
         self.reqparse.add_argument('active', type=str, default=None, location='args')
 
         args = self.reqparse.parse_args()
@@ -84,85 +96,37 @@ class Distinct(AuthenticatedService):
         else:
             select2 = False
 
-        query = Item.query
-        query = query.join((Account, Account.id == Item.account_id))
-        query = query.join((Technology, Technology.id == Item.tech_id))
-        query = query.join((ItemRevision, Item.latest_revision_id == ItemRevision.id))
-        if 'regions' in args and key_id != 'region':
-            regions = args['regions'].split(',')
-            query = query.filter(Item.region.in_(regions))
-        if 'accounts' in args and key_id != 'account':
-            accounts = args['accounts'].split(',')
-            query = query.filter(Account.name.in_(accounts))
-        if 'technologies' in args and key_id != 'tech':
-            technologies = args['technologies'].split(',')
-            query = query.filter(Technology.name.in_(technologies))
-        if 'names' in args and key_id != 'name':
-            names = args['names'].split(',')
-            query = query.filter(Item.name.in_(names))
-        if 'arns' in args and key_id != 'arn':
-            names = args['arns'].split(',')
-            query = query.filter(Item.arn.in_(names))
+        if key_id not in DIMENSIONS:
+            return json.loads('{ "error": "Supply key in type,region,account,name,arn" }')
+
+        # Each dimension is filtered by the others, but not by itself.
+        filters = {}
+        for arg, dimension in DIMENSION_ARGS.items():
+            if arg in args and dimension != key_id:
+                filters[dimension] = args[arg].split(',')
+        active = None
         if 'active' in args:
             active = args['active'].lower() == "true"
-            query = query.filter(ItemRevision.active == active)
 
-        if key_id == 'tech':
-            if select2:
-                query = query.distinct(Technology.name).filter(func.lower(Technology.name).like('%' + q + '%'))
-            else:
-                query = query.distinct(Technology.name)
-        elif key_id == 'account':
-            if select2:
-                query = query.filter(Account.third_party == False)
-                query = query.distinct(Account.name).filter(func.lower(Account.name).like('%' + q + '%'))
-            else:
-                query = query.distinct(Account.name)
-
-        else:
-            filter_by = None
-            if key_id == "region":
-                filter_by = Item.region
-            elif key_id == "name":
-                filter_by = Item.name
-            elif key_id == "arn":
-                filter_by = Item.arn
-            else:
-                return json.loads('{ "error": "Supply key in type,region,account,name,arn" }')
-
-            if select2:
-                query = query.distinct(filter_by).filter(func.lower(filter_by).like('%' + q + '%'))
-            else:
-                query = query.distinct(filter_by)
+        index = get_distinct_index()
+        served_data_version(index.version)
+        values = index.values(key_id, filters=filters, search=q if select2 else None, active=active,
+                              third_party=not (select2 and key_id == 'account'))
 
-        items = query.paginate(page, count, error_out=False)
+        page = max(page or 1, 1)
+        page_values = values[(page - 1) * count:page * count]
 
         marshaled_dict = {}
         list_distinct = []
-        for item in items.items:
-            if key_id == "tech":
-                text = item.technology.name
-                item_id = item.id
-            elif key_id == "account":
-                text = item.account.name
-                item_id = item.id
-            elif key_id == "region":
-                text = item.region
-                item_id = item.id
-            elif key_id == "name":
-                text = item.name
-                item_id = item.id
-            elif key_id == "arn":
-                text = item.arn
-                item_id = item.id
+        for text in page_values:
             if(select2):
-                list_distinct.append({"id": item_id, "text": text})
+                list_distinct.append({"id": index.item_id(key_id, text), "text": text})
             else:
                 list_distinct.append(text)
 
         marshaled_dict['auth'] = self.auth_dict
         marshaled_dict['items'] = list_distinct
-        marshaled_dict['page'] = items.page
-        marshaled_dict['total'] = items.total
+        marshaled_dict['page'] = page
+        marshaled_dict['total'] = len(values)
         marshaled_dict['key_id'] = key_id
         return marshaled_dict, 200
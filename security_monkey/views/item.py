@@ -21,12 +21,19 @@ from security_monkey.datastore import Item
 from security_monkey.datastore import Account
 from security_monkey.datastore import Technology
 from security_monkey.datastore import ItemRevision
+from security_monkey.datastore import ItemSummary
+from security_monkey.datastore import ItemComment
+from security_monkey.datastore import ItemAudit
+from security_monkey.datastore import ItemConfigSearch
+from security_monkey.common.config_search import config_search_filter
+from security_monkey.common.pagination import keyset_page, offset_page, cached_total
+from security_monkey.common.response_cache import cached_response
 from security_monkey import rbac
 
 from flask_restful import marshal, reqparse
-from sqlalchemy.sql.expression import cast
-from sqlalchemy import String
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, subqueryload, contains_eager, undefer
+from sqlalchemy import func
+from datetime import datetime
 
 
 class ItemGet(AuthenticatedService):
@@ -36,13 +43,15 @@ class ItemGet(AuthenticatedService):
         """
             .. http:get:: /api/1/item/1234
 
-            Get a specific item
+            Get a specific item.  Revisions are listed newest first, without their configs unless
+            include_configs is true; a revision's config can also be fetched from /api/1/revisions/<id>.
+            revision_limit returns only the newest revisions, and revision_count tells how many there are.
 
             **Example Request**:
 
             .. sourcecode:: http
 
-                GET /api/1/item/1234 HTTP/1.1
+                GET /api/1/item/1234?revision_limit=1&include_configs=true HTTP/1.1
                 Host: example.com
                 Accept: application/json
 
@@ -69,7 +78,9 @@ class ItemGet(AuthenticatedService):
                             "config": {},
                             "item_id": 1234,
                             "id": 213784
-                        }                    ],
+                        }
+                    ],
+                    "revision_count": 12,
                     "auth": {
                         "authenticated": true,
                         "user": "user@example.com"
@@ -80,11 +91,26 @@ class ItemGet(AuthenticatedService):
 
             :statuscode 200: no error
             :statuscode 401: Authenticaiton Error Please login.
+            :statuscode 404: Item with given ID not found.
         """
 
+        self.reqparse.add_argument('revision_limit', type=int, default=None, location='args')
+        self.reqparse.add_argument('include_configs', type=str, default='false', location='args')
+        args = self.reqparse.parse_args()
+        include_configs = args['include_configs'].lower() == 'true'
+
+        # Everything the response needs, in a fixed number of queries however many comments and issues there are.
         query = Item.query.filter(Item.id == item_id)
+        query = query.options(joinedload(Item.account))
+        query = query.options(joinedload(Item.technology))
+        query = query.options(subqueryload(Item.comments).joinedload(ItemComment.user))
+        query = query.options(subqueryload(Item.issues).joinedload(ItemAudit.auditor_setting))
+        query = query.options(subqueryload(Item.issues).joinedload(ItemAudit.user))
         result = query.first()
 
+        if not result:
+            return {"Error": "Item with id {} not found".format(item_id)}, 404
+
         # result should be an Item with a list of audit thingers and a list of
         # revisions
         retval = {}
@@ -119,28 +145,47 @@ class ItemGet(AuthenticatedService):
                                        )
             retval['issues'].append(issue_marshaled)
 
+        # The configs are deferred; they are only read when asked for.
+        revisions = result.revisions
+        if include_configs:
+            revisions = revisions.options(undefer(ItemRevision.config))
+        if args['revision_limit'] is not None:
+            revisions = revisions.limit(max(args['revision_limit'], 0))
+
         retval['revisions'] = []
-        for revision in result.revisions.all():
+        for revision in revisions:
             revision_marshaled = marshal(revision.__dict__, REVISION_FIELDS)
-            revision_marshaled = dict(
-                revision_marshaled.items() +
-                {'config': revision.config}.items()
-            )
+            if include_configs:
+                revision_marshaled = dict(
+                    revision_marshaled.items() +
+                    {'config': revision.config}.items()
+                )
             retval['revisions'].append(revision_marshaled)
+        retval['revision_count'] = result.revisions.count()
 
         return retval, 200
 
 
+# The item_summary columns the item list can be ordered by
+ITEM_SUMMARY_ORDERS = ['last_seen', 'first_seen', 'num_issues', 'issue_score', 'unjustified_issue_score']
+EPOCH = datetime(1970, 1, 1)
+
+
 # Returns a list of items optionally filtered by
 #  account, region, name, ctype or id.
 class ItemList(AuthenticatedService):
     decorators = [rbac.allow(['View'], ["GET"])]
 
+    @cached_response
     def get(self):
         """
             .. http:get:: /api/1/items
 
-            Get a list of items matching the given criteria.
+            Get a list of items matching the given criteria.  Items are ordered by order_by
+            (last_seen, first_seen, num_issues, issue_score or unjustified_issue_score; default last_seen)
+            in order_dir (Asc or Desc; default Desc).  Pass the returned next cursor as after to get the
+            following page; next is null on the last page.  Passing page instead pages by number, which
+            gets slower the deeper the page.  The total is cached for a few minutes.
 
             **Example Request**:
 
@@ -175,7 +220,7 @@ class ItemList(AuthenticatedService):
                         }
                     ],
                     "total": 144,
-                    "page": 1,
+                    "next": "WyIyMDE0LTA2LTE4VDExOjUzOjE2LjQ2NzcwOSIsIDE0NDE0XQ==",
                     "auth": {
                         "authenticated": true,
                         "user": "user@example.com"
@@ -183,11 +228,13 @@ class ItemList(AuthenticatedService):
                 }
 
             :statuscode 200: no error
+            :statuscode 400: invalid order_by or cursor
             :statuscode 401: Authenciation Error. Please Login.
         """
 
         self.reqparse.add_argument('count', type=int, default=30, location='args')
-        self.reqparse.add_argument('page', type=int, default=1, location='args')
+        self.reqparse.add_argument('page', type=int, default=None, location='args')
+        self.reqparse.add_argument('after', type=str, default=None, location='args')
         self.reqparse.add_argument('regions', type=str, default=None, location='args')
         self.reqparse.add_argument('accounts', type=str, default=None, location='args')
         self.reqparse.add_argument('active', type=str, default=None, location='args')
@@ -196,17 +243,23 @@ class ItemList(AuthenticatedService):
         self.reqparse.add_argument('technologies', type=str, default=None, location='args')
         self.reqparse.add_argument('searchconfig', type=str, default=None, location='args')
         self.reqparse.add_argument('ids', type=int, default=None, location='args')
+        self.reqparse.add_argument('order_by', type=str, default='last_seen', location='args')
+        self.reqparse.add_argument('order_dir', type=str, default='Desc', location='args')
         args = self.reqparse.parse_args()
 
         page = args.pop('page', None)
         count = args.pop('count', None)
+        after = args.pop('after', None)
+        order_by = args.pop('order_by', None)
+        order_dir = args.pop('order_dir', None)
         for k, v in args.items():
             if not v:
                 del args[k]
 
         # Read more about filtering:
         # http://docs.sqlalchemy.org/en/rel_0_7/orm/query.html
-        query = Item.query.join((ItemRevision, Item.latest_revision_id == ItemRevision.id))
+        # The counts, scores and dates come from the item_summary table.
+        query = Item.query.join((ItemSummary, ItemSummary.item_id == Item.id))
         if 'regions' in args:
             regions = args['regions'].split(',')
             query = query.filter(Item.region.in_(regions))
@@ -229,57 +282,53 @@ class ItemList(AuthenticatedService):
             query = query.filter(Item.id.in_(ids))
         if 'active' in args:
             active = args['active'].lower() == "true"
-            query = query.filter(ItemRevision.active == active)
+            query = query.filter(ItemSummary.active == active)
         if 'searchconfig' in args:
             searchconfig = args['searchconfig']
-            query = query.filter(cast(ItemRevision.config, String).ilike('%{}%'.format(searchconfig)))
+            query = query.join((ItemConfigSearch, ItemConfigSearch.item_id == Item.id))
+            query = query.filter(config_search_filter(searchconfig))
 
-        # Eager load the joins except for the revisions because of the dynamic lazy relationship
-        query = query.options(joinedload('issues'))
+        query = query.options(contains_eager(Item.summary))
         query = query.options(joinedload('account'))
         query = query.options(joinedload('technology'))
 
-        query = query.order_by(ItemRevision.date_created.desc())
-
-        items = query.paginate(page, count)
+        if order_by not in ITEM_SUMMARY_ORDERS:
+            return {"Error": "order_by must be one of {}".format(", ".join(ITEM_SUMMARY_ORDERS))}, 400
+        descending = order_dir != 'Asc'
+        order_column = getattr(ItemSummary, order_by)
+        if order_by in ['first_seen', 'last_seen']:
+            # Keyset keys can't be null.  Items without revisions sort as the oldest.
+            order_column = func.coalesce(order_column, EPOCH)
+        keys = [(order_column, descending), (Item.id, descending)]
 
         marshaled_dict = {
-            'page': items.page,
-            'total': items.total,
+            'total': cached_total(query),
             'auth': self.auth_dict
         }
+        if page:
+            items = offset_page(query, keys, page, count)
+            marshaled_dict['page'] = page
+        else:
+            try:
+                items, marshaled_dict['next'] = keyset_page(query, keys, after, count)
+            except ValueError as e:
+                return {"Error": str(e)}, 400
 
         marshaled_items = []
-        for item in items.items:
-            num_issues = len(item.issues)
-
-            issue_score = 0
-            unjustified_issue_score = 0
-            for issue in item.issues:
-                if issue.auditor_setting.disabled:
-                    continue
-
-                issue_score = issue_score + issue.score
-
-                if not issue.justified:
-                    unjustified_issue_score += issue.score
-
-            first_seen = str(item.revisions.order_by(ItemRevision.date_created.asc()).first().date_created)
-            last_seen = str(item.revisions.first().date_created)
-            active = item.revisions.first().active
+        for item in items:
+            summary = item.summary
 
             item_marshaled = marshal(item.__dict__, ITEM_FIELDS)
             item_marshaled = dict(item_marshaled.items() +
                                   {
                                       'account': item.account.name,
                                       'technology': item.technology.name,
-                                      'num_issues': num_issues,
-                                      'issue_score': issue_score,
-                                      'unjustified_issue_score': unjustified_issue_score,
-                                      'active': active,
-                                      'first_seen': first_seen,
-                                      'last_seen': last_seen
-                                      #'last_rev': item.revisions[0].config,
+                                      'num_issues': summary.num_issues,
+                                      'issue_score': summary.issue_score,
+                                      'unjustified_issue_score': summary.unjustified_issue_score,
+                                      'active': summary.active,
+                                      'first_seen': str(summary.first_seen),
+                                      'last_seen': str(summary.last_seen)
                                   }.items())
 
             marshaled_items.append(item_marshaled)
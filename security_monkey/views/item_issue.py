@@ -23,8 +23,11 @@ from security_monkey.datastore import Account
 from security_monkey.datastore import Technology
 from security_monkey.datastore import ItemRevision
 from security_monkey.datastore import AuditorSettings
+from security_monkey.common.pagination import keyset_page, offset_page, cached_total
+from security_monkey.common.response_cache import cached_response
 
 from flask_restful import marshal
+from sqlalchemy import func
 
 
 class ItemAuditList(AuthenticatedService):
@@ -32,11 +35,15 @@ class ItemAuditList(AuthenticatedService):
         rbac.allow(["View"], ["GET"])
     ]
 
+    @cached_response
     def get(self):
         """
              .. http:get:: /api/1/issues
 
-             Get a list of Audit Issues matching the given criteria
+             Get a list of Audit Issues matching the given criteria, unjustified and highest scoring first.
+             Pass the returned next cursor as after to get the following page; next is null on the last
+             page.  Passing page instead pages by number, which gets slower the deeper the page.  The total
+             is cached for a few minutes.
 
              **Example Request**:
 
@@ -72,7 +79,7 @@ class ItemAuditList(AuthenticatedService):
                         }
                     ],
                     total: 1,
-                    page: 1,
+                    next: null,
                     auth: {
                         authenticated: true,
                         user: "user@example.com"
@@ -80,11 +87,13 @@ class ItemAuditList(AuthenticatedService):
                 }
 
              :statuscode 200: no error
+             :statuscode 400: invalid cursor
              :statuscode 401: Authentication failure. Please login.
         """
 
         self.reqparse.add_argument('count', type=int, default=30, location='args')
-        self.reqparse.add_argument('page', type=int, default=1, location='args')
+        self.reqparse.add_argument('page', type=int, default=None, location='args')
+        self.reqparse.add_argument('after', type=str, default=None, location='args')
         self.reqparse.add_argument('regions', type=str, default=None, location='args')
         self.reqparse.add_argument('accounts', type=str, default=None, location='args')
         self.reqparse.add_argument('technologies', type=str, default=None, location='args')
@@ -97,6 +106,7 @@ class ItemAuditList(AuthenticatedService):
 
         page = args.pop('page', None)
         count = args.pop('count', None)
+        after = args.pop('after', None)
         for k, v in args.items():
             if not v:
                 del args[k]
@@ -135,17 +145,26 @@ class ItemAuditList(AuthenticatedService):
             query = query.join((AuditorSettings, AuditorSettings.id == ItemAudit.auditor_setting_id))
             query = query.filter(AuditorSettings.disabled == False)
 
-        query = query.order_by(ItemAudit.justified, ItemAudit.score.desc())
-        issues = query.paginate(page, count)
+        # Cursors can't hold nulls, so unset flags and scores sort as false and 0.
+        keys = [(func.coalesce(ItemAudit.justified, False), False),
+                (func.coalesce(ItemAudit.score, 0), True),
+                (ItemAudit.id, True)]
 
         marshaled_dict = {
-            'page': issues.page,
-            'total': issues.total,
+            'total': cached_total(query),
             'auth': self.auth_dict
         }
+        if page:
+            issues = offset_page(query, keys, page, count)
+            marshaled_dict['page'] = page
+        else:
+            try:
+                issues, marshaled_dict['next'] = keyset_page(query, keys, after, count)
+            except ValueError as e:
+                return {"Error": str(e)}, 400
 
         items_marshaled = []
-        for issue in issues.items:
+        for issue in issues:
             item_marshaled = marshal(issue.item.__dict__, ITEM_FIELDS)
             issue_marshaled = marshal(issue.__dict__, AUDIT_FIELDS)
             account_marshaled = {'account': issue.item.account.name}
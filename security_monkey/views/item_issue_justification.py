@@ -14,7 +14,7 @@
 
 from security_monkey.views import AuthenticatedService
 from security_monkey.views import AUDIT_FIELDS
-from security_monkey.datastore import ItemAudit
+from security_monkey.datastore import ItemAudit, update_item_summary, bump_data_version
 from security_monkey import db, rbac
 
 from flask_restful import marshal
@@ -89,7 +89,9 @@ class JustifyPostDelete(AuthenticatedService):
         item.justification = args['justification']
 
         db.session.add(item)
+        update_item_summary(item.item)
         db.session.commit()
+        bump_data_version()
         db.session.refresh(item)
 
         retdict = {'auth': self.auth_dict}
@@ -146,6 +148,8 @@ class JustifyPostDelete(AuthenticatedService):
         item.justification = None
 
         db.session.add(item)
+        update_item_summary(item.item)
         db.session.commit()
+        bump_data_version()
 
         return {"status": "deleted"}, 202
@@ -0,0 +1,209 @@
+#     Copyright 2016 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+from security_monkey.views import AuthenticatedService
+from security_monkey.views import ITEM_FIELDS
+from security_monkey.datastore import Item
+from security_monkey.datastore import Account
+from security_monkey.datastore import Technology
+from security_monkey.datastore import ItemRevision
+from security_monkey.datastore import JSONB
+from security_monkey import rbac
+
+from flask_restful import marshal
+from sqlalchemy import Text, not_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql.expression import cast
+from sqlalchemy.orm import contains_eager
+
+MAX_QUERY_COUNT = 1000
+
+
+def path_document(path, value):
+    """
+    Turns a path and a value into the JSON document a config must contain.
+    Path segments are separated by dots, and a segment ending in [] is a list,
+    any element of which may match:
+
+        rules[].from_port, 22  =>  {"rules": [{"from_port": 22}]}
+    """
+    document = value
+    for segment in reversed(path.split('.')):
+        if segment.endswith('[]'):
+            segment = segment[:-2]
+            document = [document]
+        if segment:
+            document = {segment: document}
+    return document
+
+
+def predicate_clause(predicate):
+    """
+    A filter on the latest revision's config for one predicate of /api/1/query.
+    Raises ValueError for predicates it doesn't understand.
+    """
+    if not isinstance(predicate, dict):
+        raise ValueError("Each predicate must be an object")
+
+    if 'contains' in predicate:
+        return ItemRevision.config.op('@>')(cast(predicate['contains'], JSONB))
+
+    path = predicate.get('path')
+    if not path:
+        raise ValueError("Each predicate needs a path or contains")
+
+    if 'equals' in predicate:
+        return ItemRevision.config.op('@>')(cast(path_document(path, predicate['equals']), JSONB))
+    if 'not_equals' in predicate:
+        return not_(ItemRevision.config.op('@>')(cast(path_document(path, predicate['not_equals']), JSONB)))
+    if 'exists' in predicate:
+        if '[]' in path:
+            raise ValueError("exists doesn't support lists in the path: {}".format(path))
+        value = ItemRevision.config.op('#>')(cast(path.split('.'), ARRAY(Text)))
+        return value != None if predicate['exists'] else value == None
+
+    raise ValueError("Predicate on {} needs equals, not_equals or exists".format(path))
+
+
+class ConfigQuery(AuthenticatedService):
+    decorators = [
+        rbac.allow(["View"], ["POST"])
+    ]
+
+    def post(self):
+        """
+            .. http:post:: /api/1/query
+
+            Find the items whose latest config matches every predicate.  The predicates are
+            evaluated by the database, and the results come back in item id order: pass the
+            returned next value as after to get the following page.
+
+            Predicates:
+
+            - {"path": "a.b[].c", "equals": value} - a segment ending in [] is a list, any element of which may match
+            - {"path": "a.b[].c", "not_equals": value}
+            - {"path": "a.b", "exists": true} - or false; no lists in the path
+            - {"contains": {...}} - the config contains this document, for several keys of the same list element
+
+            **Example Request**:
+
+            .. sourcecode:: http
+
+                POST /api/1/query HTTP/1.1
+                Host: example.com
+                Accept: application/json
+
+                {
+                    "technologies": ["securitygroup"],
+                    "accounts": ["example_account"],
+                    "regions": ["us-east-1"],
+                    "where": [
+                        {"contains": {"rules": [{"from_port": 22, "cidr_ip": "0.0.0.0/0"}]}}
+                    ],
+                    "include_config": false,
+                    "count": 100,
+                    "after": null
+                }
+
+            **Example Response**:
+
+            .. sourcecode:: http
+
+                HTTP/1.1 200 OK
+                Vary: Accept
+                Content-Type: application/json
+
+                {
+                    "items": [
+                        {
+                            "id": 14414,
+                            "account": "example_account",
+                            "region": "us-east-1",
+                            "technology": "securitygroup",
+                            "name": "example_name (sg-12345678 in vpc-12345678)"
+                        }
+                    ],
+                    "count": 1,
+                    "next": null,
+                    "auth": {
+                        "authenticated": true,
+                        "user": "user@example.com"
+                    }
+                }
+
+            :statuscode 200: no error
+            :statuscode 400: malformed query
+            :statuscode 401: Authentication Error. Please Login.
+        """
+        self.reqparse.add_argument('accounts', type=list, default=None, location='json')
+        self.reqparse.add_argument('technologies', type=list, default=None, location='json')
+        self.reqparse.add_argument('regions', type=list, default=None, location='json')
+        self.reqparse.add_argument('where', type=list, default=[], location='json')
+        self.reqparse.add_argument('active', type=bool, default=True, location='json')
+        self.reqparse.add_argument('include_config', type=bool, default=False, location='json')
+        self.reqparse.add_argument('count', type=int, default=100, location='json')
+        self.reqparse.add_argument('after', type=int, default=None, location='json')
+        args = self.reqparse.parse_args()
+
+        query = Item.query.join((ItemRevision, Item.latest_revision_id == ItemRevision.id))
+        query = query.join((Account, Account.id == Item.account_id))
+        query = query.join((Technology, Technology.id == Item.tech_id))
+        if args['accounts']:
+            query = query.filter(Account.name.in_(args['accounts']))
+        if args['technologies']:
+            query = query.filter(Technology.name.in_(args['technologies']))
+        if args['regions']:
+            query = query.filter(Item.region.in_(args['regions']))
+        if args['active'] is not None:
+            query = query.filter(ItemRevision.active == args['active'])
+
+        try:
+            for predicate in args['where'] or []:
+                query = query.filter(predicate_clause(predicate))
+        except ValueError as e:
+            return {"Error": str(e)}, 400
+
+        if args['after'] is not None:
+            query = query.filter(Item.id > args['after'])
+
+        query = query.options(contains_eager(Item.account))
+        query = query.options(contains_eager(Item.technology))
+
+        count = max(1, min(args['count'] or 100, MAX_QUERY_COUNT))
+        items = query.order_by(Item.id).limit(count + 1).all()
+        more = len(items) > count
+        items = items[:count]
+
+        configs = {}
+        if args['include_config'] and items:
+            revisions = ItemRevision.query.filter(ItemRevision.id.in_([item.latest_revision_id for item in items]))
+            configs = {revision.item_id: revision.config for revision in revisions}
+
+        marshaled_items = []
+        for item in items:
+            item_marshaled = dict(marshal(item.__dict__, ITEM_FIELDS).items() +
+                                  {
+                                      'account': item.account.name,
+                                      'technology': item.technology.name
+                                  }.items())
+            if args['include_config']:
+                item_marshaled['config'] = configs.get(item.id)
+            marshaled_items.append(item_marshaled)
+
+        return {
+            'items': marshaled_items,
+            'count': len(marshaled_items),
+            'next': items[-1].id if more else None,
+            'auth': self.auth_dict
+        }, 200
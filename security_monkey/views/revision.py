@@ -21,6 +21,7 @@ from security_monkey.datastore import Item
 from security_monkey.datastore import Account
 from security_monkey.datastore import Technology
 from security_monkey.datastore import ItemRevision
+from security_monkey.common.pagination import keyset_page, offset_page, cached_total
 from security_monkey import rbac
 
 from flask_restful import marshal, reqparse
@@ -123,13 +124,15 @@ class RevisionList(AuthenticatedService):
         """
             .. http:get:: /api/1/revisions
 
-            Get a list of revisions
+            Get a list of revisions, newest first.  Pass the returned next cursor as after to get the
+            following page; next is null on the last page.  Passing page instead pages by number, which
+            gets slower the deeper the page.  The total is cached for a few minutes.
 
             **Example Request**:
 
             .. sourcecode:: http
 
-                GET /api/1/revisions?count=1 HTTP/1.1
+                GET /api/1/revisions?count=1&after=WyIyMDE0LTA2LTE5VDIwOjU0OjEzLjAwMDAwMCIsIDIyMzc1OF0= HTTP/1.1
                 Host: example.com
                 Accept: application/json
 
@@ -155,7 +158,7 @@ class RevisionList(AuthenticatedService):
                         }
                     ],
                     "total": 1,
-                    "page": 1,
+                    "next": "WyIyMDE0LTA2LTE5VDIwOjU0OjEyLjk2Mjk1MSIsIDIyMzc1N10=",
                     "auth": {
                         "authenticated": true,
                         "user": "user@example.com"
@@ -163,11 +166,13 @@ class RevisionList(AuthenticatedService):
                 }
 
             :statuscode 200: no error
+            :statuscode 400: invalid cursor
             :statuscode 401: Authentication Error. Please Login.
         """
 
         self.reqparse.add_argument('count', type=int, default=30, location='args')
-        self.reqparse.add_argument('page', type=int, default=1, location='args')
+        self.reqparse.add_argument('page', type=int, default=None, location='args')
+        self.reqparse.add_argument('after', type=str, default=None, location='args')
         self.reqparse.add_argument('active', type=str, default=None, location='args')
         self.reqparse.add_argument('regions', type=str, default=None, location='args')
         self.reqparse.add_argument('accounts', type=str, default=None, location='args')
@@ -179,6 +184,7 @@ class RevisionList(AuthenticatedService):
 
         page = args.pop('page', None)
         count = args.pop('count', None)
+        after = args.pop('after', None)
         for k, v in args.items():
             if not v:
                 del args[k]
@@ -207,17 +213,23 @@ class RevisionList(AuthenticatedService):
         if 'searchconfig' in args:
             searchconfig = args['searchconfig']
             query = query.filter(cast(ItemRevision.config, String).ilike('%{}%'.format(searchconfig)))
-        query = query.order_by(ItemRevision.date_created.desc())
-        revisions = query.paginate(page, count)
 
+        keys = [(ItemRevision.date_created, True), (ItemRevision.id, True)]
         marshaled_dict = {
-            'page': revisions.page,
-            'total': revisions.total,
+            'total': cached_total(query),
             'auth': self.auth_dict
         }
+        if page:
+            revisions = offset_page(query, keys, page, count)
+            marshaled_dict['page'] = page
+        else:
+            try:
+                revisions, marshaled_dict['next'] = keyset_page(query, keys, after, count)
+            except ValueError as e:
+                return {"Error": str(e)}, 400
 
         items_marshaled = []
-        for revision in revisions.items:
+        for revision in revisions:
             item_marshaled = marshal(revision.item.__dict__, ITEM_FIELDS)
             revision_marshaled = marshal(revision.__dict__, REVISION_FIELDS)
             account_marshaled = {'account': revision.item.account.name}
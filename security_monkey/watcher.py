@@ -15,6 +15,7 @@ from common.utils import sub_dict
 from security_monkey import app
 from security_monkey.datastore import Account, IgnoreListEntry, Technology, store_exception
 from security_monkey.common.jinja import get_jinja_env
+from security_monkey.exceptions import BotoConnectionIssue
 
 from boto.exception import BotoServerError
 import time
@@ -26,6 +27,24 @@ from dpath.exceptions import PathNotFound
 
 watcher_registry = {}
 
+
+def _lookup(response, path):
+    """
+    Follows a dotted path through dict keys or attributes.  Returns None when any part is missing.
+    boto2 response elements are dicts that also find nested keys as attributes.
+    """
+    for key in path.split('.'):
+        if isinstance(response, dict) and key in response:
+            response = response[key]
+        elif type(response) is dict:
+            return None
+        else:
+            response = getattr(response, key, None)
+        if response is None:
+            return None
+    return response
+
+
 class WatcherType(type):
     def __init__(cls, name, bases, attrs):
         super(WatcherType, cls).__init__(name, bases, attrs)
@@ -57,6 +76,8 @@ class Watcher(object):
         self.deleted_items = []
         self.changed_items = []
         self.ephemeral_items = []
+        # How many of the created, deleted, changed and ephemeral items save() has stored
+        self._saved = (0, 0, 0, 0)
         # TODO: grab these from DB, keyed on account
         self.rate_limit_delay = 0
         self.interval = 15
@@ -127,6 +148,64 @@ class Watcher(object):
                     raise e
                 increase_delay()
 
+    def iter_pages(self, awsfunc, *args, **nargs):
+        """
+        Yields each page of a paginated AWS call, as it is fetched.  Every page goes
+        through wrap_aws_rate_limited_call.
+
+        Understands the boto2 and boto3 pagination styles through these keywords:
+            token_param - the argument that carries the next page token: 'Marker' (the
+                default), 'NextToken', or boto2's 'marker' and 'next_token'.
+            next_token_key - where a page holds the next token, when it isn't under
+                token_param: 'NextMarker', 'next_marker', or a dotted path like
+                'ListTopicsResponse.ListTopicsResult.NextToken'.
+            truncated_key - where a page says more pages follow, for APIs that send a
+                token on the last page too: 'IsTruncated' or boto2's 'is_truncated'.
+            For APIs that resume from several values, like ListResourceRecordSets,
+            token_param is a dict of each argument => where a page holds its next value.
+
+        Paths are looked up as dict keys or attributes, so both boto3 responses and
+        boto2 response objects work.
+        """
+        token_param = nargs.pop('token_param', 'Marker')
+        next_token_key = nargs.pop('next_token_key', token_param)
+        truncated_key = nargs.pop('truncated_key', None)
+
+        while True:
+            page = self.wrap_aws_rate_limited_call(awsfunc, *args, **nargs)
+            yield page
+
+            if truncated_key and _lookup(page, truncated_key) not in (True, 'true', u'true'):
+                break
+            if isinstance(token_param, dict):
+                tokens = dict((param, _lookup(page, key)) for param, key in token_param.items())
+                if not any(tokens.values()):
+                    break
+                for param, token in tokens.items():
+                    if token:
+                        nargs[param] = token
+                    else:
+                        nargs.pop(param, None)
+                continue
+            token = _lookup(page, next_token_key)
+            if not token:
+                break
+            nargs[token_param] = token
+
+    def paginate(self, awsfunc, result_key, *args, **nargs):
+        """
+        Yields the results of a paginated AWS call one at a time, fetching each page
+        only when the previous one has been consumed.  Takes the keywords of iter_pages.
+
+        :param result_key: where a page holds its results, e.g. 'Keys' or
+            'ListTopicsResponse.ListTopicsResult.Topics'.  None when the page is
+            itself the list of results, as with boto2 ResultSets.
+        """
+        for page in self.iter_pages(awsfunc, *args, **nargs):
+            results = page if result_key is None else _lookup(page, result_key)
+            for result in results or []:
+                yield result
+
     def created(self):
         """
         Used by the Jinja templates
@@ -154,10 +233,121 @@ class Watcher(object):
     def slurp(self):
         """
         method to slurp configuration from AWS for whatever it is that I'm
-        interested in. This will be overridden for each technology.
+        interested in. This will be overridden for each technology, unless it
+        overrides slurp_partitions instead, whose partitions are collected here.
+        """
+        if self.slurp_partitions.__func__ is Watcher.slurp_partitions.__func__:
+            raise NotImplementedError()
+
+        item_list = []
+        exception_map = {}
+        for _, _, items, exceptions in self.slurp_partitions():
+            item_list.extend(items)
+            exception_map.update(exceptions)
+        return item_list, exception_map
+
+    def slurp_partitions(self):
+        """
+        Slurps one account and region at a time, so that callers can diff, audit and
+        store each partition before the next one is read:
+
+            for changed_items in watcher.find_changes_by_partition():
+                auditor.audit_these_objects(changed_items)
+            watcher.save()
+
+        Technologies that stream override this as a generator.  The region must be the
+        region of the items, or None for a partition covering the whole account, as when
+        the account's regions couldn't be listed.  For the other technologies, the
+        results of slurp() are grouped into partitions once it returns.
+
+        :yields: account, region, item_list, exception_map
+        """
+        item_list, exception_map = self.slurp()
+
+        partitions = {}
+        for location, exception in exception_map.items():
+            if len(location) < 2:
+                # A technology-wide exception covers every partition.
+                yield None, None, item_list, exception_map
+                return
+            partition = partitions.setdefault((location[1], location[2] if len(location) > 2 else None), ([], {}))
+            partition[1][location] = exception
+
+        for item in item_list:
+            partitions.setdefault((item.account, item.region), ([], {}))[0].append(item)
+
+        for (account, region), (items, exceptions) in partitions.items():
+            yield account, region, items, exceptions
+
+    def slurp_item(self, account, region, name, exception_map={}):
+        """
+        Fetches a single item by name.  Overridden by technologies that can look
+        up one resource without enumerating all of the others.
+        :returns: the ChangeItem, or None if the item no longer exists.
         """
         raise NotImplementedError()
 
+    def slurp_items(self, locations):
+        """
+        Slurps only the items at the given locations, for event driven refreshes and
+        re-checks of a single item.  Pass the same locations to find_changes so that
+        items elsewhere are not reported as deleted:
+
+            items, exception_map = watcher.slurp_items(locations)
+            watcher.find_changes(current=items, exception_map=exception_map, locations=locations)
+            watcher.save()
+
+        Locations are (index, account, region, name) tuples.  Shorter tuples, and
+        every location for technologies that don't override slurp_item, are served
+        by a full slurp of the accounts involved, filtered down to the locations.
+
+        :returns: item_list, exception_map - in the same form as slurp()
+        """
+        self.prep_for_slurp()
+
+        item_list = []
+        exception_map = {}
+        single_items = self.slurp_item.__func__ is not Watcher.slurp_item.__func__
+        wide_locations = []
+        for location in set(locations):
+            if len(location) < 4 or not single_items:
+                wide_locations.append(location)
+                continue
+
+            _, account, region, name = location
+            if self.check_ignore_list(name):
+                continue
+
+            app.logger.debug("Slurping {} ({}) from {}/{}".format(self.i_am_singular, name, account, region))
+            try:
+                item = self.slurp_item(account, region, name, exception_map=exception_map)
+            except Exception as e:
+                exc = BotoConnectionIssue(str(e), self.index, account, region)
+                self.slurp_exception(location, exc, exception_map, source="{}-watcher".format(self.index))
+                continue
+
+            if item:
+                item_list.append(item)
+
+        if wide_locations:
+            accounts = self.accounts
+            self.accounts = list(set([location[1] for location in wide_locations]))
+            try:
+                items, exceptions = self.slurp()
+            finally:
+                self.accounts = accounts
+
+            def _overlaps(location, other):
+                size = min(len(location), len(other))
+                return location[:size] == other[:size]
+
+            item_list.extend([item for item in items
+                              if any(_overlaps(item.location(), loc) for loc in wide_locations)])
+            exception_map.update({loc: exc for loc, exc in exceptions.items()
+                                  if any(_overlaps(loc, wide) for wide in wide_locations)})
+
+        return item_list, exception_map
+
     def slurp_exception(self, location=None, exception=None, exception_map={}, source="watcher"):
         """
         Logs any exceptions that happen in slurp and adds them to the exception_map
@@ -208,49 +398,43 @@ class Watcher(object):
 
         return False
 
-    def find_deleted(self, previous=[], current=[], exception_map={}):
+    def find_deleted(self, prev_map={}, curr_map={}, exception_map={}):
         """
         Find any items that have been deleted since the last run of the watcher.
         Add these items to the deleted_items list.
+        Both maps are of item location => item.
         """
-        prev_map = {item.location(): item for item in previous}
-        curr_map = {item.location(): item for item in current}
-
-        item_locations = list(set(prev_map).difference(set(curr_map)))
-        item_locations = [item_location for item_location in item_locations if not self.location_in_exception_map(item_location, exception_map)]
-        list_deleted_items = [prev_map[item] for item in item_locations]
+        item_locations = [item_location for item_location in prev_map
+                          if item_location not in curr_map
+                          and not self.location_in_exception_map(item_location, exception_map)]
 
-        for item in list_deleted_items:
+        for item_location in item_locations:
+            item = prev_map[item_location]
             deleted_change_item = ChangeItem.from_items(old_item=item, new_item=None)
             app.logger.debug("%s: %s/%s/%s deleted" % (self.i_am_singular, item.account, item.region, item.name))
             self.deleted_items.append(deleted_change_item)
 
-    def find_new(self, previous=[], current=[]):
+    def find_new(self, prev_map={}, curr_map={}):
         """
         Find any new objects that have been created since the last run of the watcher.
         Add these items to the created_items list.
         """
-        prev_map = {item.location(): item for item in previous}
-        curr_map = {item.location(): item for item in current}
-
-        item_locations = list(set(curr_map).difference(set(prev_map)))
-        list_new_items = [curr_map[item] for item in item_locations]
-
-        for item in list_new_items:
+        for item_location in curr_map:
+            if item_location in prev_map:
+                continue
+            item = curr_map[item_location]
             new_change_item = ChangeItem.from_items(old_item=None, new_item=item)
             self.created_items.append(new_change_item)
             app.logger.debug("%s: %s/%s/%s created" % (self.i_am_singular, item.account, item.region, item.name))
 
-    def find_modified(self, previous=[], current=[], exception_map={}):
+    def find_modified(self, prev_map={}, curr_map={}, exception_map={}):
         """
         Find any objects that have been changed since the last run of the watcher.
         Add these items to the changed_items list.
         """
-        prev_map = {item.location(): item for item in previous}
-        curr_map = {item.location(): item for item in current}
-
-        item_locations = list(set(curr_map).intersection(set(prev_map)))
-        item_locations = [item_location for item_location in item_locations if not self.location_in_exception_map(item_location, exception_map)]
+        item_locations = [item_location for item_location in curr_map
+                          if item_location in prev_map
+                          and not self.location_in_exception_map(item_location, exception_map)]
 
         for location in item_locations:
             prev_item = prev_map[location]
@@ -291,25 +475,86 @@ class Watcher(object):
                 self.changed_items.append(eph_change_item)
                 app.logger.debug("%s: changes in item %s/%s/%s" % (self.i_am_singular, eph_change_item.account, eph_change_item.region, eph_change_item.name))
 
-    def find_changes(self, current=[], exception_map={}):
+    def find_changes(self, current=[], exception_map={}, locations=None):
         """
         Identify changes between the configuration I have and what I had
         last time the watcher ran.
         This ignores any account/region which caused an exception during slurp.
-        """
-        prev = self.read_previous_items()
-        self.find_deleted(previous=prev, current=current, exception_map=exception_map)
-        self.find_new(previous=prev, current=current)
-        self.find_modified(previous=prev, current=current, exception_map=exception_map)
 
-    def read_previous_items(self):
+        When locations is given, only previous items at those locations are compared,
+        so items outside of them are never reported as deleted.
+
+        The items are compared one account and region at a time, with the maps of
+        each partition built once for the three comparisons.
+        """
+        partitions = {}
+        for item in self.read_previous_items(locations=locations):
+            partitions.setdefault((item.account, item.region), ({}, {}))[0][item.location()] = item
+        for item in current:
+            partitions.setdefault((item.account, item.region), ({}, {}))[1][item.location()] = item
+
+        for prev_map, curr_map in partitions.values():
+            self.find_deleted(prev_map=prev_map, curr_map=curr_map, exception_map=exception_map)
+            self.find_new(prev_map=prev_map, curr_map=curr_map)
+            self.find_modified(prev_map=prev_map, curr_map=curr_map, exception_map=exception_map)
+
+    def find_changes_by_partition(self):
+        """
+        Slurps, diffs and saves one partition at a time, so that only the current and
+        previous items of one account and region are held at once.  Previous items in
+        regions that yield no partition, because everything there was deleted, are
+        diffed last.
+
+        The changes of each partition are saved once the caller asks for the next one,
+        after auditing them.  Consume every partition; a later save() has nothing left to do.
+
+        :yields: the ChangeItems created or changed in each partition, to be audited.
+        """
+        exception_map = {}
+        covered = set()
+        for account, region, items, exceptions in self.slurp_partitions():
+            exception_map.update(exceptions)
+            if account is None:
+                location = None
+                covered.update(self.accounts)
+            elif region is None:
+                location = (self.index, account)
+                covered.add(account)
+            else:
+                location = (self.index, account, region)
+                covered.add((account, region))
+
+            created, changed = len(self.created_items), len(self.changed_items)
+            self.find_changes(current=items, exception_map=exception_map,
+                              locations=[location] if location else None)
+            yield self.created_items[created:] + self.changed_items[changed:]
+
+            # Audited by the caller; stored before the next partition is slurped.
+            self.save()
+
+        for account, region in self.datastore.get_item_partitions(self.index, self.accounts):
+            if account in covered or (account, region) in covered:
+                continue
+            self.find_changes(current=[], exception_map=exception_map, locations=[(self.index, account, region)])
+            self.save()
+
+    def read_previous_items(self, locations=None):
         """
         Pulls the last-recorded configuration from the database.
+        :param locations: Optional list of (index, account[, region[, name]]) tuples
+            to restrict the read to.  Defaults to every item in self.accounts.
         :return: List of all items for the given technology and the given account.
         """
-        prev_list = []
-        for account in self.accounts:
-            prev = self.datastore.get_all_ctype_filtered(tech=self.index, account=account, include_inactive=False)
+        if locations is None:
+            filters = [{'account': account} for account in self.accounts]
+        else:
+            filters = [{'account': location[1],
+                        'region': location[2] if len(location) > 2 else None,
+                        'name': location[3] if len(location) > 3 else None} for location in locations]
+
+        prev_map = {}
+        for item_filter in filters:
+            prev = self.datastore.get_all_ctype_filtered(tech=self.index, include_inactive=False, **item_filter)
             # Returns a map of {Item: ItemRevision}
             for item in prev:
                 item_revision = prev[item]
@@ -318,9 +563,9 @@ class Watcher(object):
                                       account=item.account.name,
                                       name=item.name,
                                       new_config=item_revision.config)
-                prev_list.append(new_item)
+                prev_map[new_item.location()] = new_item
 
-        return prev_list
+        return prev_map.values()
 
     def is_changed(self):
         """
@@ -355,28 +600,39 @@ class Watcher(object):
 
     def save(self):
         """
-        save new configs, if necessary
-        """
-        app.logger.info("{} deleted {} in {}".format(len(self.deleted_items), self.i_am_plural, self.accounts))
-        app.logger.info("{} created {} in {}".format(len(self.created_items), self.i_am_plural, self.accounts))
-        for item in self.created_items + self.deleted_items:
+        save new configs, if necessary.  Changes saved by an earlier call are skipped,
+        so this can run after each partition.
+        """
+        created, deleted, changed, ephemeral = self._saved
+        created_items = self.created_items[created:]
+        deleted_items = self.deleted_items[deleted:]
+        changed_items = self.changed_items[changed:]
+        ephemeral_items = self.ephemeral_items[ephemeral:]
+        self._saved = (len(self.created_items), len(self.deleted_items),
+                       len(self.changed_items), len(self.ephemeral_items))
+        if not (created_items or deleted_items or changed_items or ephemeral_items):
+            return
+
+        app.logger.info("{} deleted {} in {}".format(len(deleted_items), self.i_am_plural, self.accounts))
+        app.logger.info("{} created {} in {}".format(len(created_items), self.i_am_plural, self.accounts))
+        for item in created_items + deleted_items:
             item.save(self.datastore)
 
         if self.ephemerals_skipped():
-            changed_locations = [item.location() for item in self.changed_items]
+            changed_locations = [item.location() for item in changed_items]
 
-            new_item_revisions = [item for item in self.ephemeral_items if item.location() in changed_locations]
+            new_item_revisions = [item for item in ephemeral_items if item.location() in changed_locations]
             app.logger.info("{} changed {} in {}".format(len(new_item_revisions), self.i_am_plural, self.accounts))
             for item in new_item_revisions:
                 item.save(self.datastore)
 
-            edit_item_revisions = [item for item in self.ephemeral_items if item.location() not in changed_locations]
+            edit_item_revisions = [item for item in ephemeral_items if item.location() not in changed_locations]
             app.logger.info("{} ephemerally changed {} in {}".format(len(edit_item_revisions), self.i_am_plural, self.accounts))
             for item in edit_item_revisions:
                 item.save(self.datastore, ephemeral=True)
         else:
-            app.logger.info("{} changed {} in {}".format(len(self.changed_items), self.i_am_plural, self.accounts))
-            for item in self.changed_items:
+            app.logger.info("{} changed {} in {}".format(len(changed_items), self.i_am_plural, self.accounts))
+            for item in changed_items:
                 item.save(self.datastore)
 
     def plural_name(self):
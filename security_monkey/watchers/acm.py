@@ -20,11 +20,19 @@
 
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey import app
 
+from dateutil.parser import parse
 from dateutil.tz import tzutc
+from datetime import datetime, timedelta
+
+
+ACM_STATUSES = ['PENDING_VALIDATION', 'ISSUED', 'INACTIVE', 'EXPIRED', 'VALIDATION_TIMED_OUT', 'REVOKED', 'FAILED']
+
+# certificate arn => when this process last described it
+_described = {}
 
 
 class ACM(Watcher):
@@ -42,6 +50,67 @@ class ACM(Watcher):
     def __init__(self, accounts=None, debug=False):
         super(ACM, self).__init__(accounts=accounts, debug=debug)
 
+    def list_certificates(self, acm):
+        """
+        Lists the certificates one status at a time, as the summaries don't carry it.
+
+        :returns: list of (certificate summary, status)
+        """
+        cert_list = []
+        for status in ACM_STATUSES:
+            cert_list.extend([(cert, status) for cert in self.paginate(
+                acm.list_certificates,
+                'CertificateSummaryList',
+                token_param='NextToken',
+                CertificateStatuses=[status]
+            )])
+        return cert_list
+
+    def stored_configs(self, account, region):
+        """
+        :returns: dict of certificate arn => config of its latest stored revision
+        """
+        previous = self.datastore.get_all_ctype_filtered(tech=self.index, account=account, region=region)
+        return {revision.config.get('CertificateArn'): revision.config for revision in previous.values()}
+
+    def cached_config(self, stored_configs, arn, status):
+        """
+        The stored config of a certificate, when it may be used instead of describing
+        the certificate again: its status is unchanged, it isn't close enough to expiry
+        to be renewed, and it was described less than ACM_DETAIL_MAX_AGE_HOURS ago.
+        """
+        config = stored_configs.get(arn)
+        if not config or config.get('Status') != status:
+            return None
+
+        described = _described.get(arn)
+        max_age = timedelta(hours=app.config.get('ACM_DETAIL_MAX_AGE_HOURS', 24))
+        if not described or datetime.utcnow() - described >= max_age:
+            return None
+
+        # ACM renews certificates in the 60 days before they expire.
+        renewal_window = timedelta(days=app.config.get('ACM_RENEWAL_WINDOW_DAYS', 60))
+        if config.get('NotAfter') and parse(config['NotAfter']) - datetime.now(tzutc()) < renewal_window:
+            return None
+
+        return config
+
+    def describe_config(self, acm, arn):
+        config = self.describe_certificate(acm, arn).get('Certificate')
+        _described[arn] = datetime.utcnow()
+
+        # Convert the datetime objects into ISO formatted strings in UTC
+        if config.get('NotBefore'):
+            config.update({ 'NotBefore': config.get('NotBefore').astimezone(tzutc()).isoformat() })
+        if config.get('NotAfter'):
+            config.update({ 'NotAfter': config.get('NotAfter').astimezone(tzutc()).isoformat() })
+        if config.get('CreatedAt'):
+            config.update({ 'CreatedAt': config.get('CreatedAt').astimezone(tzutc()).isoformat() })
+        if config.get('IssuedAt'):
+            config.update({ 'IssuedAt': config.get('IssuedAt').astimezone(tzutc()).isoformat() })
+
+        return config
+
     def slurp(self):
         """
         :returns: item_list - list of ACM Certificates with details.
@@ -56,8 +125,7 @@ class ACM(Watcher):
         from security_monkey.common.sts_connect import connect
         for account in self.accounts:
             try:
-                ec2 = connect(account, 'ec2')
-                regions = ec2.get_all_regions()
+                regions = get_regions(account, 'acm')
             except Exception as e:  # EC2ResponseError
                 # Some Accounts don't subscribe to EC2 and will throw an exception here.
                 exc = BotoConnectionIssue(str(e), 'keypair', account, None)
@@ -69,32 +137,21 @@ class ACM(Watcher):
                 app.logger.debug("Checking {}/{}/{}".format(ACM.index, account, region.name))
                 try:
                     acm = connect(account, 'boto3.acm.client', region=region, debug=1000)
-                    response = self.wrap_aws_rate_limited_call(
-                        acm.list_certificates
-                    )
-                    cert_list = response.get('CertificateSummaryList')
+                    cert_list = self.list_certificates(acm)
+                    stored_configs = self.stored_configs(account, region.name)
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), 'acm', account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), 'acm', account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
                     continue
                 app.logger.debug("Found {} {}".format(len(cert_list), ACM.i_am_plural))
 
-                for cert in cert_list:
-                    app.logger.debug("Getting {} details for {}".format(ACM.i_am_singular, cert.get('DomainName')))
+                for cert, status in cert_list:
                     try:
-                        config = self.describe_certificate(acm, cert.get('CertificateArn')).get('Certificate')
-
-                        # Convert the datetime objects into ISO formatted strings in UTC
-                        if config.get('NotBefore'):
-                            config.update({ 'NotBefore': config.get('NotBefore').astimezone(tzutc()).isoformat() })
-                        if config.get('NotAfter'):
-                            config.update({ 'NotAfter': config.get('NotAfter').astimezone(tzutc()).isoformat() })
-                        if config.get('CreatedAt'):
-                            config.update({ 'CreatedAt': config.get('CreatedAt').astimezone(tzutc()).isoformat() })
-                        if config.get('IssuedAt'):
-                            config.update({ 'IssuedAt': config.get('IssuedAt').astimezone(tzutc()).isoformat() })
+                        config = self.cached_config(stored_configs, cert.get('CertificateArn'), status)
+                        if config is None:
+                            app.logger.debug("Getting {} details for {}".format(ACM.i_am_singular, cert.get('DomainName')))
+                            config = self.describe_config(acm, cert.get('CertificateArn'))
 
                         item = ACMCertificate(region=region.name, account=account, name=cert.get('DomainName'), arn=cert.get('CertificateArn'), config=dict(config))
                         item_list.append(item)
@@ -22,8 +22,9 @@
 
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import BotoConnectionIssue
+from security_monkey.common.ec2_inventory import get_ec2_inventory
 from security_monkey import app
 
 
@@ -49,8 +50,7 @@ class ElasticIP(Watcher):
         from security_monkey.common.sts_connect import connect
         for account in self.accounts:
             try:
-                ec2 = connect(account, 'ec2')
-                regions = ec2.get_all_regions()
+                regions = get_regions(account, 'ec2')
             except Exception as e:  # EC2ResponseError
                 # Some Accounts don't subscribe to EC2 and will throw an exception here.
                 exc = BotoConnectionIssue(str(e), self.index, account, None)
@@ -65,15 +65,12 @@ class ElasticIP(Watcher):
                     el_ips = self.wrap_aws_rate_limited_call(
                         rec2.get_all_addresses
                     )
-                    # Retrieve account tags to later match assigned EIP to instance
-                    tags = self.wrap_aws_rate_limited_call(
-                        rec2.get_all_tags
-                    )
+                    # Retrieve instance names to later match assigned EIP to instance
+                    instance_names = get_ec2_inventory(account, region.name).instance_names(self)
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), self.index, account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), self.index, account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
                     continue
 
                 app.logger.debug("Found {} {}".format(len(el_ips), self.i_am_plural))
@@ -82,12 +79,9 @@ class ElasticIP(Watcher):
                     if self.check_ignore_list(str(ip.public_ip)):
                         continue
 
-                    instance_name = None
-                    instance_tags = [x.value for x in tags if x.name == "Name" and x.res_id == ip.instance_id]
-                    if instance_tags:
-                        (instance_name,) = instance_tags
-                        if self.check_ignore_list(instance_name):
-                            continue
+                    instance_name = instance_names.get(ip.instance_id)
+                    if instance_name and self.check_ignore_list(instance_name):
+                        continue
 
                     item_config = {
                         "assigned_to": instance_name,
@@ -21,14 +21,12 @@
 """
 import json
 
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey.watcher import Watcher, ChangeItem
 from security_monkey.datastore import Account
 from security_monkey import app
 
-from boto.ec2 import regions
-
 
 class ElasticSearchService(Watcher):
     index = 'elasticsearchservice'
@@ -53,17 +51,21 @@ class ElasticSearchService(Watcher):
             account_db = Account.query.filter(Account.name == account).first()
             account_number = account_db.number
 
-            for region in regions():
-                try:
-                    if region.name in TROUBLE_REGIONS:
-                        continue
+            try:
+                regions = get_regions(account, 'es')
+            except Exception as e:
+                exc = BotoConnectionIssue(str(e), self.index, account, None)
+                self.slurp_exception((self.index, account), exc, exception_map,
+                                     source="{}-watcher".format(self.index))
+                continue
 
+            for region in regions:
+                try:
                     (client, domains) = self.get_all_es_domains_in_region(account, region)
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), self.index, account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), self.index, account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
                     continue
 
                 app.logger.debug("Found {} {}".format(len(domains), ElasticSearchService.i_am_plural))
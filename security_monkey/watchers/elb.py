@@ -21,12 +21,12 @@
 """
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey.datastore import Account
 from security_monkey import app
 
-from boto.ec2.elb import regions
+from boto.exception import BotoServerError
 
 
 def parse_policy(policy):
@@ -119,7 +119,15 @@ class ELB(Watcher):
             account_number = account_db.number
 
             self._setup_botocore(account)
-            for region in regions():
+            try:
+                regions = get_regions(account, 'elasticloadbalancing')
+            except Exception as e:
+                exc = BotoConnectionIssue(str(e), self.index, account, None)
+                self.slurp_exception((self.index, account), exc, exception_map,
+                                     source="{}-watcher".format(self.index))
+                continue
+
+            for region in regions:
                 app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
                 elb_conn = connect(account, 'ec2.elb', region=region.name)
 
@@ -127,29 +135,16 @@ class ELB(Watcher):
                 botocore_operation = botocore_client.describe_load_balancer_policies
 
                 try:
-                    all_elbs = []
-                    marker = None
-
-                    while True:
-                        response = self.wrap_aws_rate_limited_call(
-                            elb_conn.get_all_load_balancers,
-                            marker=marker
-                        )
-
-                        # build our elb list
-                        all_elbs.extend(response)
-
-                        # ensure that we get every elb
-                        if response.next_marker:
-                            marker = response.next_marker
-                        else:
-                            break
-
+                    all_elbs = list(self.paginate(
+                        elb_conn.get_all_load_balancers,
+                        None,
+                        token_param='marker',
+                        next_token_key='next_marker'
+                    ))
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), self.index, account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), self.index, account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
                     continue
 
                 app.logger.debug("Found {} {}".format(len(all_elbs), self.i_am_plural))
@@ -159,79 +154,7 @@ class ELB(Watcher):
                         continue
 
                     try:
-                        elb_map = {}
-                        elb_map['availability_zones'] = list(elb.availability_zones)
-                        elb_map['canonical_hosted_zone_name'] = elb.canonical_hosted_zone_name
-                        elb_map['canonical_hosted_zone_name_id'] = elb.canonical_hosted_zone_name_id
-                        elb_map['dns_name'] = elb.dns_name
-                        elb_map['health_check'] = {'target': elb.health_check.target, 'interval': elb.health_check.interval}
-                        elb_map['is_cross_zone_load_balancing'] = self.wrap_aws_rate_limited_call(
-                            elb.is_cross_zone_load_balancing
-                        )
-                        elb_map['scheme'] = elb.scheme
-                        elb_map['security_groups'] = list(elb.security_groups)
-                        elb_map['source_security_group'] = elb.source_security_group.name
-                        elb_map['subnets'] = list(elb.subnets)
-                        elb_map['vpc_id'] = elb.vpc_id
-                        elb_map['is_logging'] = self.wrap_aws_rate_limited_call(
-                            lambda: elb.get_attributes().access_log.enabled
-                        )
-
-                        backends = []
-                        for be in elb.backends:
-                            backend = {}
-                            backend['instance_port'] = be.instance_port
-                            policies = []
-                            for bepol in be.policies:
-                                policies.append(bepol.policy_name)
-                            backend['policies'] = policies
-                            backends.append(backend)
-                        elb_map['backends'] = backends
-
-                        elb_policies = self._get_listener_policies(botocore_operation, elb)
-                        listeners = []
-                        for li in elb.listeners:
-                            listener = {
-                                'load_balancer_port': li.load_balancer_port,
-                                'instance_port': li.instance_port,
-                                'protocol': li.protocol,
-                                'instance_protocol': li.instance_protocol,
-                                'ssl_certificate_id': li.ssl_certificate_id,
-                                'policies': [elb_policies.get(policy_name, {"name": policy_name}) for policy_name in li.policy_names]
-                            }
-                            listeners.append(listener)
-                        elb_map['listeners'] = listeners
-
-                        policies = {}
-                        app_cookie_stickiness_policies = []
-                        for policy in elb.policies.app_cookie_stickiness_policies:
-                            app_cookie_stickiness_policy = {}
-                            app_cookie_stickiness_policy['policy_name'] = policy.policy_name
-                            app_cookie_stickiness_policy['cookie_name'] = policy.cookie_name
-                            app_cookie_stickiness_policies.append(app_cookie_stickiness_policy)
-                        policies['app_cookie_stickiness_policies'] = app_cookie_stickiness_policies
-
-                        lb_cookie_stickiness_policies = []
-                        for policy in elb.policies.lb_cookie_stickiness_policies:
-                            lb_cookie_stickiness_policy = {}
-                            lb_cookie_stickiness_policy['policy_name'] = policy.policy_name
-                            lb_cookie_stickiness_policy['cookie_expiration_period'] = policy.cookie_expiration_period
-                            lb_cookie_stickiness_policies.append(lb_cookie_stickiness_policy)
-                        policies['lb_cookie_stickiness_policies'] = lb_cookie_stickiness_policies
-
-                        policies['other_policies'] = []
-                        for opol in elb.policies.other_policies:
-                            policies['other_policies'].append(opol.policy_name)
-                        elb_map['policies'] = policies
-
-                        arn = 'arn:aws:elasticloadbalancing:{region}:{account_number}:loadbalancer/{name}'.format(
-                            region=region.name,
-                            account_number=account_number,
-                            name=elb.name)
-
-                        elb_map['arn'] = arn
-
-                        item = ELBItem(region=region.name, account=account, name=elb.name, arn=arn, config=elb_map)
+                        item = self._build_item(elb, account, account_number, region.name, botocore_operation)
                         item_list.append(item)
                     except Exception as e:
                         self.slurp_exception((self.index, account, region.name, elb.name), e, exception_map,
@@ -240,6 +163,105 @@ class ELB(Watcher):
 
         return item_list, exception_map
 
+    def slurp_item(self, account, region, name, exception_map={}):
+        """
+        Fetches a single load balancer by name.
+        """
+        from security_monkey.common.sts_connect import connect
+        account_number = Account.query.filter(Account.name == account).first().number
+        elb_conn = connect(account, 'ec2.elb', region=region)
+        try:
+            elbs = self.wrap_aws_rate_limited_call(
+                elb_conn.get_all_load_balancers,
+                load_balancer_names=[name]
+            )
+        except BotoServerError as e:
+            if e.error_code == 'LoadBalancerNotFound':
+                return None
+            raise
+        if not elbs:
+            return None
+
+        self._setup_botocore(account)
+        botocore_client = self.botocore_session.create_client('elb', region_name=region)
+        return self._build_item(elbs[0], account, account_number, region,
+                                botocore_client.describe_load_balancer_policies)
+
+    def _build_item(self, elb, account, account_number, region_name, botocore_operation):
+        elb_map = {}
+        elb_map['availability_zones'] = list(elb.availability_zones)
+        elb_map['canonical_hosted_zone_name'] = elb.canonical_hosted_zone_name
+        elb_map['canonical_hosted_zone_name_id'] = elb.canonical_hosted_zone_name_id
+        elb_map['dns_name'] = elb.dns_name
+        elb_map['health_check'] = {'target': elb.health_check.target, 'interval': elb.health_check.interval}
+        elb_map['is_cross_zone_load_balancing'] = self.wrap_aws_rate_limited_call(
+            elb.is_cross_zone_load_balancing
+        )
+        elb_map['scheme'] = elb.scheme
+        elb_map['security_groups'] = list(elb.security_groups)
+        elb_map['source_security_group'] = elb.source_security_group.name
+        elb_map['subnets'] = list(elb.subnets)
+        elb_map['vpc_id'] = elb.vpc_id
+        elb_map['is_logging'] = self.wrap_aws_rate_limited_call(
+            lambda: elb.get_attributes().access_log.enabled
+        )
+
+        backends = []
+        for be in elb.backends:
+            backend = {}
+            backend['instance_port'] = be.instance_port
+            policies = []
+            for bepol in be.policies:
+                policies.append(bepol.policy_name)
+            backend['policies'] = policies
+            backends.append(backend)
+        elb_map['backends'] = backends
+
+        elb_policies = self._get_listener_policies(botocore_operation, elb)
+        listeners = []
+        for li in elb.listeners:
+            listener = {
+                'load_balancer_port': li.load_balancer_port,
+                'instance_port': li.instance_port,
+                'protocol': li.protocol,
+                'instance_protocol': li.instance_protocol,
+                'ssl_certificate_id': li.ssl_certificate_id,
+                'policies': [elb_policies.get(policy_name, {"name": policy_name}) for policy_name in li.policy_names]
+            }
+            listeners.append(listener)
+        elb_map['listeners'] = listeners
+
+        policies = {}
+        app_cookie_stickiness_policies = []
+        for policy in elb.policies.app_cookie_stickiness_policies:
+            app_cookie_stickiness_policy = {}
+            app_cookie_stickiness_policy['policy_name'] = policy.policy_name
+            app_cookie_stickiness_policy['cookie_name'] = policy.cookie_name
+            app_cookie_stickiness_policies.append(app_cookie_stickiness_policy)
+        policies['app_cookie_stickiness_policies'] = app_cookie_stickiness_policies
+
+        lb_cookie_stickiness_policies = []
+        for policy in elb.policies.lb_cookie_stickiness_policies:
+            lb_cookie_stickiness_policy = {}
+            lb_cookie_stickiness_policy['policy_name'] = policy.policy_name
+            lb_cookie_stickiness_policy['cookie_expiration_period'] = policy.cookie_expiration_period
+            lb_cookie_stickiness_policies.append(lb_cookie_stickiness_policy)
+        policies['lb_cookie_stickiness_policies'] = lb_cookie_stickiness_policies
+
+        policies['other_policies'] = []
+        for opol in elb.policies.other_policies:
+            policies['other_policies'].append(opol.policy_name)
+        elb_map['policies'] = policies
+
+        arn = 'arn:aws:elasticloadbalancing:{region}:{account_number}:loadbalancer/{name}'.format(
+            region=region_name,
+            account_number=account_number,
+            name=elb.name)
+
+        elb_map['arn'] = arn
+
+        return ELBItem(region=region_name, account=account, name=elb.name, arn=arn, config=elb_map)
+
 
 class ELBItem(ChangeItem):
     def __init__(self, region=None, account=None, name=None, arn=None, config={}):
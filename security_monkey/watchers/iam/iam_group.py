@@ -24,28 +24,26 @@ from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
 from security_monkey.exceptions import InvalidAWSJSON
 from security_monkey.exceptions import BotoConnectionIssue
+from security_monkey.common.authorization_details import get_authorization_details
 from security_monkey import app
 
+from boto.exception import BotoServerError
 import json
 import urllib
 
 
-def all_managed_policies(conn):
-    managed_policies = {}
-
-    for policy in conn.policies.all():
-        for attached_group in policy.attached_groups.all():
-            policy_dict = {
-                "name": policy.policy_name,
-                "arn": policy.arn,
-                "version": policy.default_version_id
-            }
-
-            if attached_group.arn not in managed_policies:
-                managed_policies[attached_group.arn] = [policy_dict]
-            else:
-                managed_policies[attached_group.arn].append(policy_dict)
-
+def managed_policies_for_group(conn, group):
+    """
+    Lists the managed policies attached to a single group.  Whole accounts are read
+    from their authorization details instead.
+    """
+    managed_policies = []
+    for policy in conn.Group(group.group_name).attached_policies.all():
+        managed_policies.append({
+            "name": policy.policy_name,
+            "arn": policy.arn,
+            "version": policy.default_version_id
+        })
     return managed_policies
 
 
@@ -58,60 +56,27 @@ class IAMGroup(Watcher):
         super(IAMGroup, self).__init__(accounts=accounts, debug=debug)
 
     def get_all_groups(self, conn):
-        all_groups = []
-        marker = None
-
-        while True:
-            groups_response = self.wrap_aws_rate_limited_call(
-                conn.get_all_groups,
-                marker=marker
-            )
-
-            all_groups.extend(groups_response.groups)
-            if hasattr(groups_response, 'marker'):
-                marker = groups_response.marker
-            else:
-                break
-
-        return all_groups
+        return list(self.paginate(
+            conn.get_all_groups,
+            'groups',
+            token_param='marker'
+        ))
 
     def get_all_group_policies(self, conn, group_name):
-        all_group_policies = []
-        marker = None
-
-        while True:
-            group_policies = self.wrap_aws_rate_limited_call(
-                conn.get_all_group_policies,
-                group_name,
-                marker=marker
-            )
-
-            all_group_policies.extend(group_policies.policy_names)
-            if hasattr(group_policies, 'marker'):
-                marker = group_policies.marker
-            else:
-                break
-
-        return all_group_policies
+        return list(self.paginate(
+            conn.get_all_group_policies,
+            'policy_names',
+            group_name,
+            token_param='marker'
+        ))
 
     def get_all_group_users(self, conn, group_name):
-        all_group_users = []
-        marker = None
-
-        while True:
-            group_users_response = self.wrap_aws_rate_limited_call(
-                conn.get_group,
-                group_name,
-                marker=marker
-            )
-
-            all_group_users.extend(group_users_response.users)
-            if hasattr(group_users_response, 'marker'):
-                marker = group_users_response.marker
-            else:
-                break
-
-        return all_group_users
+        return list(self.paginate(
+            conn.get_group,
+            'users',
+            group_name,
+            token_param='marker'
+        ))
 
     def slurp(self):
         """
@@ -127,9 +92,10 @@ class IAMGroup(Watcher):
         for account in self.accounts:
 
             try:
-                boto3_iam_resource = connect(account, 'boto3.iam.resource')
-                managed_policies = all_managed_policies(boto3_iam_resource)
+                details = get_authorization_details(self, account)
+                groups_details = details.groups_by_name()
 
+                boto3_iam_resource = connect(account, 'boto3.iam.resource')
                 iam = connect(account, 'iam')
                 groups = self.get_all_groups(iam)
             except Exception as e:
@@ -144,40 +110,80 @@ class IAMGroup(Watcher):
                 if self.check_ignore_list(group.group_name):
                     continue
 
-                item_config = {
-                    'group': dict(group),
-                    'grouppolicies': {},
-                    'users': {}
-                }
-
-                if group.arn in managed_policies:
-                    item_config['managed_policies'] = managed_policies.get(group.arn)
+                group_details = groups_details.get(group.group_name)
+                if group_details:
+                    group_policies = details.inline_policies(group_details, 'GroupPolicyList')
+                    group_users = {user['Arn']: user['UserName'] for user in details.group_users(group.group_name)}
+                    managed_policies = details.managed_policies(group.arn)
+                else:
+                    # Created since the authorization details were downloaded.
+                    group_policies = self.group_policies(iam, group, account, exception_map)
+                    group_users = self.group_users(iam, group)
+                    managed_policies = managed_policies_for_group(boto3_iam_resource, group)
+
+                item_list.append(IAMGroupItem(account=account, name=group.group_name,
+                                              config=self._build_config(group, group_policies, group_users,
+                                                                        managed_policies),
+                                              arn=group.arn))
 
-                ### GROUP POLICIES ###
-                group_policies = self.get_all_group_policies(iam, group.group_name)
+        return item_list, exception_map
 
-                for policy_name in group_policies:
-                    policy = self.wrap_aws_rate_limited_call(iam.get_group_policy, group.group_name, policy_name)
-                    policy = policy.policy_document
-                    policy = urllib.unquote(policy)
-                    try:
-                        policydict = json.loads(policy)
-                    except:
-                        exc = InvalidAWSJSON(policy)
-                        self.slurp_exception((self.index, account, 'universal', group.group_name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+    def slurp_item(self, account, region, name, exception_map={}):
+        """
+        Fetches a single group by name.  Only that group's managed policies are listed.
+        """
+        from security_monkey.common.sts_connect import connect
+        iam = connect(account, 'iam')
+        try:
+            group = self.wrap_aws_rate_limited_call(iam.get_group, name, max_items=1).group
+        except BotoServerError as e:
+            if e.status == 404:
+                return None
+            raise
+
+        boto3_iam_resource = connect(account, 'boto3.iam.resource')
+        managed_policies = managed_policies_for_group(boto3_iam_resource, group)
+        group_policies = self.group_policies(iam, group, account, exception_map)
+        group_users = self.group_users(iam, group)
+
+        return IAMGroupItem(account=account, name=group.group_name,
+                            config=self._build_config(group, group_policies, group_users, managed_policies),
+                            arn=group.arn)
+
+    def group_policies(self, conn, group, account, exception_map):
+        """
+        :returns: dict of inline policy name => policy document for a single group.
+        """
+        group_policies = {}
+        for policy_name in self.get_all_group_policies(conn, group.group_name):
+            policy = self.wrap_aws_rate_limited_call(conn.get_group_policy, group.group_name, policy_name)
+            policy = policy.policy_document
+            policy = urllib.unquote(policy)
+            try:
+                group_policies[policy_name] = dict(json.loads(policy))
+            except:
+                exc = InvalidAWSJSON(policy)
+                self.slurp_exception((self.index, account, 'universal', group.group_name), exc, exception_map,
+                                     source="{}-watcher".format(self.index))
+        return group_policies
 
-                    item_config['grouppolicies'][policy_name] = dict(policydict)
+    def group_users(self, conn, group):
+        """
+        :returns: dict of user arn => user name for the members of a single group.
+        """
+        return {user.arn: user.user_name for user in self.get_all_group_users(conn, group.group_name)}
 
-                ### GROUP USERS ###
-                group_users = self.get_all_group_users(iam, group['group_name'])
-                for user in group_users:
-                    item_config['users'][user.arn] = user.user_name
+    def _build_config(self, group, group_policies, group_users, managed_policies):
+        item_config = {
+            'group': dict(group),
+            'grouppolicies': group_policies,
+            'users': group_users
+        }
 
-                item = IAMGroupItem(account=account, name=group.group_name, config=item_config, arn=item_config.get('group', {}).get('arn'))
-                item_list.append(item)
+        if managed_policies:
+            item_config['managed_policies'] = managed_policies
 
-        return item_list, exception_map
+        return item_config
 
 
 class IAMGroupItem(ChangeItem):
@@ -19,11 +19,15 @@
 .. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
 
 """
-from joblib import Parallel, delayed
 from botor.aws.iam import get_role_inline_policies
 from botor.aws.iam import get_role_instance_profiles
 from botor.aws.iam import get_role_managed_policies
-from botor.aws.iam import list_roles
+from botor.aws.sts import sts_conn
+from botor.decorators import rate_limited
+from botocore.exceptions import ClientError
+from security_monkey.common.authorization_details import AuthorizationDetails
+from security_monkey.common.authorization_details import get_authorization_details
+from security_monkey.datastore import Account
 from security_monkey.decorators import record_exception, iter_account_region
 from security_monkey.watcher import ChangeItem
 from security_monkey.watcher import Watcher
@@ -43,6 +47,38 @@ def _basic_config(role):
     }
 
 
+def _details_config(role):
+    """
+    Builds the same config as process_role, from the role's authorization details.
+    """
+    config = _basic_config(role)
+
+    config.update(
+        {
+            'managed_policies': [{'name': p['PolicyName'], 'arn': p['PolicyArn']}
+                                 for p in role.get('AttachedManagedPolicies', [])],
+            'rolepolicies': AuthorizationDetails.inline_policies(role, 'RolePolicyList'),
+            'instance_profiles': [
+                {
+                    'path': ip['Path'],
+                    'instance_profile_name': ip['InstanceProfileName'],
+                    'create_date': ip['CreateDate'].strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    'instance_profile_id': ip['InstanceProfileId'],
+                    'arn': ip['Arn']
+                } for ip in role.get('InstanceProfileList', [])
+            ]
+        }
+    )
+
+    return config
+
+
+@sts_conn('iam', service_type='client')
+@rate_limited()
+def get_role(role_name, client=None, **kwargs):
+    return client.get_role(RoleName=role_name)['Role']
+
+
 @record_exception(source="iamrole-watcher")
 def process_role(role, **kwargs):
     app.logger.debug("Slurping {index} ({name}) from {account}".format(
@@ -72,35 +108,59 @@ class IAMRole(Watcher):
         super(IAMRole, self).__init__(accounts=accounts, debug=debug)
 
     @record_exception(source="iamrole-watcher")
-    def list_roles(self, **kwargs):
-        roles = list_roles(**kwargs)
-        return [role for role in roles if not self.check_ignore_list(role['RoleName'])]
+    def authorization_details(self, **kwargs):
+        return get_authorization_details(self, kwargs['account_name'])
 
-    def slurp(self):
+    def slurp_partitions(self):
         self.prep_for_slurp()
 
         @iter_account_region(index=self.index, accounts=self.accounts, regions=['us-east-1'],
-                             exception_record_region='universal')
+                             exception_record_region='universal', partitions=True)
         def slurp_items(**kwargs):
             item_list = []
-            roles = self.list_roles(**kwargs)
-
-            roles = zip(
-                [role['RoleName'] for role in roles],
-                Parallel(n_jobs=2, backend="threading")(
-                    delayed(process_role)
-                    (role, name=role['RoleName'], **kwargs)
-                    for role in roles
+            details = self.authorization_details(**kwargs)
+            if not details:
+                return item_list, kwargs.get('exception_map', {})
+
+            for role in details.roles:
+                if self.check_ignore_list(role['RoleName']):
+                    continue
+
+                app.logger.debug("Slurping {index} ({name}) from {account}".format(
+                    index=self.i_am_singular,
+                    name=role['RoleName'],
+                    account=kwargs['account_name'])
                 )
-            )
-            for role in roles:
-                item = IAMRoleItem(account=kwargs['account_name'], name=role[0], config=role[1],
-                                   arn=role[1].get('role', {}).get('arn'))
+                config = _details_config(role)
+                item = IAMRoleItem(account=kwargs['account_name'], name=role['RoleName'], config=config,
+                                   arn=config.get('role', {}).get('arn'))
                 item_list.append(item)
 
             return item_list, kwargs.get('exception_map', {})
         return slurp_items()
 
+    def slurp_item(self, account, region, name, exception_map={}):
+        """
+        Fetches a single role by name.
+        """
+        account_db = Account.query.filter(Account.name == account).first()
+        kwargs = dict(index=self.index, account_name=account_db.name, account_number=account_db.number,
+                      region='us-east-1', assume_role=account_db.role_name or 'SecurityMonkey',
+                      exception_map=exception_map, exception_record_region='universal')
+        try:
+            role = get_role(name, **kwargs)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchEntity':
+                return None
+            raise
+
+        config = process_role(role, name=name, **kwargs)
+        if not config:
+            # process_role recorded the exception.
+            return None
+
+        return IAMRoleItem(account=account, name=name, config=config, arn=config.get('role', {}).get('arn'))
+
 
 class IAMRoleItem(ChangeItem):
     def __init__(self, account=None, name=None, arn=None, config={}):
@@ -21,13 +21,25 @@
 """
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey import app
 
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 
+from collections import OrderedDict
+from copy import deepcopy
+import hashlib
+import threading
+
+
+# Characters stripped from issuer names.
+DELCHARS = ''.join(c for c in map(chr, range(256)) if not c.isalnum())
+
+# sha256 of certificate body => get_cert_info() result, least recently used first
+_cert_info_cache = OrderedDict()
+_cert_info_lock = threading.Lock()
+
 
 def cert_get_signing_algorithm(cert):
     return cert.signature_hash_algorithm.name
@@ -53,12 +65,9 @@ def cert_get_issuer(cert):
     :param cert:
     :return: Issuer
     """
-    delchars = ''.join(c for c in map(chr, range(256)) if not c.isalnum())
     try:
         issuer = str(cert.issuer.get_attributes_for_oid(x509.OID_ORGANIZATION_NAME)[0].value)
-        for c in delchars:
-            issuer = issuer.replace(c, "")
-        return issuer
+        return issuer.translate(None, DELCHARS)
     except Exception as e:
         app.logger.error("Unable to get issuer! {0}".format(e))
 
@@ -158,6 +167,27 @@ def cert_is_wildcard(cert):
 
 
 def get_cert_info(body):
+    """
+    Parses the certificate body, or returns the result of parsing it before.  At most
+    IAM_SSL_CERT_CACHE_SIZE (default: 1000) results are kept.
+    """
+    fingerprint = hashlib.sha256(str(body)).hexdigest()
+    with _cert_info_lock:
+        cert_info = _cert_info_cache.pop(fingerprint, None)
+        if cert_info is not None:
+            _cert_info_cache[fingerprint] = cert_info
+            return deepcopy(cert_info)
+
+    cert_info = parse_cert_info(body)
+
+    with _cert_info_lock:
+        _cert_info_cache[fingerprint] = cert_info
+        while len(_cert_info_cache) > app.config.get('IAM_SSL_CERT_CACHE_SIZE', 1000):
+            _cert_info_cache.popitem(last=False)
+    return deepcopy(cert_info)
+
+
+def parse_cert_info(body):
     cert = x509.load_pem_x509_certificate(str(body), default_backend())
     cert_info = {
         'signature_algorithm': cert_get_signing_algorithm(cert),
@@ -209,17 +239,12 @@ class IAMSSL(Watcher):
         app.logger.debug("Checking {}/{}/{}".format(self.index, account, region))
         try:
             iamconn = connect(account, 'iam', region=region)
-            marker = None
-            while True:
-                certs = self.wrap_aws_rate_limited_call(
-                    iamconn.list_server_certs,
-                    marker=marker
-                )
-                all_certs.extend(certs.server_certificate_metadata_list)
-                if certs.is_truncated == u'true':
-                    marker = certs.marker
-                else:
-                    break
+            all_certs = list(self.paginate(
+                iamconn.list_server_certs,
+                'server_certificate_metadata_list',
+                token_param='marker',
+                truncated_key='is_truncated'
+            ))
 
             for cert in all_certs:
                 iam_cert = self.wrap_aws_rate_limited_call(
@@ -237,10 +262,9 @@ class IAMSSL(Watcher):
 
         except Exception as e:
             app.logger.warn(traceback.format_exc())
-            if region not in TROUBLE_REGIONS:
-                exc = BotoConnectionIssue(str(e), self.index, account, 'universal')
-                self.slurp_exception((self.index, account, 'universal'), exc, exception_map,
-                                     source="{}-watcher".format(self.index))
+            exc = BotoConnectionIssue(str(e), self.index, account, 'universal')
+            self.slurp_exception((self.index, account, 'universal'), exc, exception_map,
+                                 source="{}-watcher".format(self.index))
         app.logger.info("Found {} {} from {}/{}".format(len(all_certs), self.i_am_plural, account, 'universal'))
         return all_certs
 
@@ -24,28 +24,26 @@ from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
 from security_monkey.exceptions import InvalidAWSJSON
 from security_monkey.exceptions import BotoConnectionIssue
+from security_monkey.common.authorization_details import get_authorization_details
 from security_monkey import app
 
+from boto.exception import BotoServerError
 import json
 import urllib
 
 
-def all_managed_policies(conn):
-    managed_policies = {}
-
-    for policy in conn.policies.all():
-        for attached_user in policy.attached_users.all():
-            policy_dict = {
-                "name": policy.policy_name,
-                "arn": policy.arn,
-                "version": policy.default_version_id
-            }
-
-            if attached_user.arn not in managed_policies:
-                managed_policies[attached_user.arn] = [policy_dict]
-            else:
-                managed_policies[attached_user.arn].append(policy_dict)
-
+def managed_policies_for_user(conn, user):
+    """
+    Lists the managed policies attached to a single user.  Whole accounts are read
+    from their authorization details instead.
+    """
+    managed_policies = []
+    for policy in conn.User(user.user_name).attached_policies.all():
+        managed_policies.append({
+            "name": policy.policy_name,
+            "arn": policy.arn,
+            "version": policy.default_version_id
+        })
     return managed_policies
 
 
@@ -65,20 +63,13 @@ class IAMUser(Watcher):
         ]
 
     def policy_names_for_user(self, conn, user):
-        all_policy_names = []
-        marker = None
-        while True:
-            response = self.wrap_aws_rate_limited_call(
-                conn.get_all_user_policies,
-                user.user_name,
-                marker=marker
-            )
-            all_policy_names.extend(response.policy_names)
-            if response.is_truncated == u'true':
-                marker = response.marker
-            else:
-                break
-        return all_policy_names
+        return list(self.paginate(
+            conn.get_all_user_policies,
+            'policy_names',
+            user.user_name,
+            token_param='marker',
+            truncated_key='is_truncated'
+        ))
 
     def access_keys_for_user(self, conn, user):
         """
@@ -92,20 +83,13 @@ class IAMUser(Watcher):
                 }
             ]
         """
-        all_access_keys = []
-        marker = None
-        while True:
-            response = self.wrap_aws_rate_limited_call(
-                conn.get_all_access_keys,
-                user_name=user.user_name,
-                marker=marker
-            )
-            all_access_keys.extend(response.access_key_metadata)
-            if response.is_truncated == u'true':
-                marker = response.marker
-            else:
-                break
-        return all_access_keys
+        return list(self.paginate(
+            conn.get_all_access_keys,
+            'access_key_metadata',
+            user_name=user.user_name,
+            token_param='marker',
+            truncated_key='is_truncated'
+        ))
 
     def access_key_last_used(self, conn, key):
         """
@@ -146,36 +130,22 @@ class IAMUser(Watcher):
         return key
 
     def mfas_for_user(self, conn, user):
-        all_mfas = []
-        marker = None
-        while True:
-            response = self.wrap_aws_rate_limited_call(
-                conn.get_all_mfa_devices,
-                user_name=user.user_name,
-                marker=marker
-            )
-            all_mfas.extend(response.mfa_devices)
-            if response.is_truncated == u'true':
-                marker = response.marker
-            else:
-                break
-        return all_mfas
+        return list(self.paginate(
+            conn.get_all_mfa_devices,
+            'mfa_devices',
+            user_name=user.user_name,
+            token_param='marker',
+            truncated_key='is_truncated'
+        ))
 
     def certificates_for_user(self, conn, user):
-        all_certificates = []
-        marker = None
-        while True:
-            response = self.wrap_aws_rate_limited_call(
-                conn.get_all_signing_certs,
-                user_name=user.user_name,
-                marker=marker
-            )
-            all_certificates.extend(response.certificates)
-            if response.is_truncated == u'true':
-                marker = response.marker
-            else:
-                break
-        return all_certificates
+        return list(self.paginate(
+            conn.get_all_signing_certs,
+            'certificates',
+            user_name=user.user_name,
+            token_param='marker',
+            truncated_key='is_truncated'
+        ))
 
     def slurp(self):
         """
@@ -192,27 +162,14 @@ class IAMUser(Watcher):
             all_users = []
 
             try:
-                boto3_iam_resource = connect(account, 'boto3.iam.resource')
-                managed_policies = all_managed_policies(boto3_iam_resource)
+                details = get_authorization_details(self, account)
+                users_details = details.users_by_name()
 
+                boto3_iam_resource = connect(account, 'boto3.iam.resource')
                 boto3_iam_client = connect(account, 'boto3.iam.client')
 
                 iam = connect(account, 'iam')
-                marker = None
-                while True:
-                    users_response = self.wrap_aws_rate_limited_call(
-                        iam.get_all_users,
-                        marker=marker
-                    )
-
-                    # build our iam user list
-                    all_users.extend(users_response.users)
-
-                    # ensure that we get every iam user
-                    if hasattr(users_response, 'marker'):
-                        marker = users_response.marker
-                    else:
-                        break
+                all_users = list(self.paginate(iam.get_all_users, 'users', token_param='marker'))
 
             except Exception as e:
                 exc = BotoConnectionIssue(str(e), 'iamuser', account, None)
@@ -225,78 +182,116 @@ class IAMUser(Watcher):
                 if self.check_ignore_list(user.user_name):
                     continue
 
-                item_config = {
-                    'user': {},
-                    'userpolicies': {},
-                    'accesskeys': {},
-                    'mfadevices': {},
-                    'signingcerts': {}
-                }
-                app.logger.debug("Slurping %s (%s) from %s" % (self.i_am_singular, user.user_name, account))
-                item_config['user'] = dict(user)
-
-                if user.arn in managed_policies:
-                    item_config['managed_policies'] = managed_policies.get(user.arn)
-
-                ### USER POLICIES ###
-                policy_names = self.policy_names_for_user(iam, user)
-
-                for policy_name in policy_names:
-                    policy_document = self.wrap_aws_rate_limited_call(
-                        iam.get_user_policy,
-                        user.user_name,
-                        policy_name
-                    )
-                    policy_document = policy_document.policy_document
-                    policy = urllib.unquote(policy_document)
-                    try:
-                        policydict = json.loads(policy)
-                    except:
-                        exc = InvalidAWSJSON(policy)
-                        self.slurp_exception((self.index, account, 'universal', user.user_name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
-
-                    item_config['userpolicies'][policy_name] = dict(policydict)
-
-                ### ACCESS KEYS ###
-                access_keys = self.access_keys_for_user(iam, user)
-
-                for key in access_keys:
-                    key = self.access_key_last_used(boto3_iam_client, key)
-                    item_config['accesskeys'][key.access_key_id] = dict(key)
-
-                ### Multi Factor Authentication Devices ###
-                mfas = self.mfas_for_user(iam, user)
-
-                for mfa in mfas:
-                    item_config['mfadevices'][mfa.serial_number] = dict(mfa)
-
-                ### LOGIN PROFILE ###
-                login_profile = 'undefined'
-                try:
-                    login_profile = self.wrap_aws_rate_limited_call(
-                        iam.get_login_profiles,
-                        user.user_name
-                    )
-                    login_profile = login_profile.login_profile
-                    item_config['loginprofile'] = dict(login_profile)
-                except:
-                    pass
-
-                ### SIGNING CERTIFICATES ###
-                certificates = self.certificates_for_user(iam, user)
-
-                for cert in certificates:
-                    _cert = dict(cert)
-                    del _cert['certificate_body']
-                    item_config['signingcerts'][cert.certificate_id] = dict(_cert)
+                user_details = users_details.get(user.user_name)
+                if user_details:
+                    user_policies = details.inline_policies(user_details, 'UserPolicyList')
+                    managed_policies = details.managed_policies(user.arn)
+                else:
+                    # Created since the authorization details were downloaded.
+                    user_policies = self.user_policies(iam, user, account, exception_map)
+                    managed_policies = managed_policies_for_user(boto3_iam_resource, user)
 
                 item_list.append(
-                    IAMUserItem(account=account, name=user.user_name, arn=item_config.get('user', {}).get('arn'), config=item_config)
+                    self._build_item(user, user_policies, managed_policies, account, iam, boto3_iam_client,
+                                     exception_map)
                 )
 
         return item_list, exception_map
 
+    def slurp_item(self, account, region, name, exception_map={}):
+        """
+        Fetches a single user by name.  Only that user's managed policies are listed.
+        """
+        from security_monkey.common.sts_connect import connect
+        iam = connect(account, 'iam')
+        try:
+            user = self.wrap_aws_rate_limited_call(iam.get_user, name).user
+        except BotoServerError as e:
+            if e.status == 404:
+                return None
+            raise
+
+        boto3_iam_resource = connect(account, 'boto3.iam.resource')
+        managed_policies = managed_policies_for_user(boto3_iam_resource, user)
+        boto3_iam_client = connect(account, 'boto3.iam.client')
+        user_policies = self.user_policies(iam, user, account, exception_map)
+
+        return self._build_item(user, user_policies, managed_policies, account, iam, boto3_iam_client,
+                                exception_map)
+
+    def user_policies(self, conn, user, account, exception_map):
+        """
+        :returns: dict of inline policy name => policy document for a single user.
+        """
+        user_policies = {}
+        for policy_name in self.policy_names_for_user(conn, user):
+            policy_document = self.wrap_aws_rate_limited_call(
+                conn.get_user_policy,
+                user.user_name,
+                policy_name
+            )
+            policy_document = policy_document.policy_document
+            policy = urllib.unquote(policy_document)
+            try:
+                user_policies[policy_name] = dict(json.loads(policy))
+            except:
+                exc = InvalidAWSJSON(policy)
+                self.slurp_exception((self.index, account, 'universal', user.user_name), exc, exception_map,
+                                     source="{}-watcher".format(self.index))
+        return user_policies
+
+    def _build_item(self, user, user_policies, managed_policies, account, iam, boto3_iam_client, exception_map):
+        item_config = {
+            'user': {},
+            'userpolicies': {},
+            'accesskeys': {},
+            'mfadevices': {},
+            'signingcerts': {}
+        }
+        app.logger.debug("Slurping %s (%s) from %s" % (self.i_am_singular, user.user_name, account))
+        item_config['user'] = dict(user)
+
+        if managed_policies:
+            item_config['managed_policies'] = managed_policies
+
+        item_config['userpolicies'] = user_policies
+
+        ### ACCESS KEYS ###
+        access_keys = self.access_keys_for_user(iam, user)
+
+        for key in access_keys:
+            key = self.access_key_last_used(boto3_iam_client, key)
+            item_config['accesskeys'][key.access_key_id] = dict(key)
+
+        ### Multi Factor Authentication Devices ###
+        mfas = self.mfas_for_user(iam, user)
+
+        for mfa in mfas:
+            item_config['mfadevices'][mfa.serial_number] = dict(mfa)
+
+        ### LOGIN PROFILE ###
+        login_profile = 'undefined'
+        try:
+            login_profile = self.wrap_aws_rate_limited_call(
+                iam.get_login_profiles,
+                user.user_name
+            )
+            login_profile = login_profile.login_profile
+            item_config['loginprofile'] = dict(login_profile)
+        except:
+            pass
+
+        ### SIGNING CERTIFICATES ###
+        certificates = self.certificates_for_user(iam, user)
+
+        for cert in certificates:
+            _cert = dict(cert)
+            del _cert['certificate_body']
+            item_config['signingcerts'][cert.certificate_id] = dict(_cert)
+
+        return IAMUserItem(account=account, name=user.user_name, arn=item_config.get('user', {}).get('arn'),
+                           config=item_config)
+
 
 class IAMUserItem(ChangeItem):
     def __init__(self, account=None, name=None, arn=None, config={}):
@@ -23,6 +23,8 @@
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
 from security_monkey.exceptions import BotoConnectionIssue
+from security_monkey.common.authorization_details import AuthorizationDetails, get_authorization_details, \
+    policy_document
 from security_monkey import app
 
 
@@ -46,42 +48,52 @@ class ManagedPolicy(Watcher):
 
         from security_monkey.common.sts_connect import connect
         for account in self.accounts:
-            all_policies = []
 
+            # GetAccountAuthorizationDetails only returns the AWS managed policies that
+            # are attached, so every policy is listed, and the download supplies the
+            # attachments and documents.
             try:
-                iam = connect(account, 'boto3.iam.resource')
-
-                for policy in iam.policies.all():
-                    all_policies.append(policy)
-
+                iam = connect(account, 'boto3.iam.client')
+                all_policies = list(self.paginate(iam.list_policies, 'Policies', truncated_key='IsTruncated'))
+                details = get_authorization_details(self, account)
             except Exception as e:
                 exc = BotoConnectionIssue(str(e), 'iamuser', account, None)
                 self.slurp_exception((self.index, account, 'universal'), exc, exception_map,
                                      source="{}-watcher".format(self.index))
                 continue
 
+            downloaded = details.policies_by_arn()
             for policy in all_policies:
 
-                if self.check_ignore_list(policy.policy_name):
+                if self.check_ignore_list(policy['PolicyName']):
+                    continue
+
+                if self.check_ignore_list(policy['Arn']):
                     continue
 
-                if self.check_ignore_list(policy.arn):
+                try:
+                    document = self._policy_document(iam, policy, downloaded.get(policy['Arn']))
+                except Exception as e:
+                    exc = BotoConnectionIssue(str(e), 'iamuser', account, None)
+                    self.slurp_exception((self.index, account, 'universal', policy['PolicyName']), exc,
+                                         exception_map, source="{}-watcher".format(self.index))
                     continue
 
+                attachments = details.policy_attachments(policy['Arn'])
                 item_config = {
-                    'name': policy.policy_name,
-                    'arn': policy.arn,
-                    'create_date': str(policy.create_date),
-                    'update_date': str(policy.update_date),
-                    'default_version_id': policy.default_version_id,
-                    'attachment_count': policy.attachment_count,
-                    'attached_users': [a.arn for a in policy.attached_users.all()],
-                    'attached_groups': [a.arn for a in policy.attached_groups.all()],
-                    'attached_roles': [a.arn for a in policy.attached_roles.all()],
-                    'policy': policy.default_version.document
+                    'name': policy['PolicyName'],
+                    'arn': policy['Arn'],
+                    'create_date': str(policy['CreateDate']),
+                    'update_date': str(policy['UpdateDate']),
+                    'default_version_id': policy['DefaultVersionId'],
+                    'attachment_count': policy['AttachmentCount'],
+                    'attached_users': attachments['users'],
+                    'attached_groups': attachments['groups'],
+                    'attached_roles': attachments['roles'],
+                    'policy': document
                 }
 
-                app.logger.debug("Slurping %s (%s) from %s" % (self.i_am_singular, policy.policy_name, account))
+                app.logger.debug("Slurping %s (%s) from %s" % (self.i_am_singular, policy['PolicyName'], account))
 
                 arn = item_config.get('arn')
                 # Don't set the ARN field on Amazon owned managed policies as this would violate the
@@ -91,11 +103,26 @@ class ManagedPolicy(Watcher):
                     arn = None
 
                 item_list.append(
-                    ManagedPolicyItem(account=account, name=policy.policy_name, arn=arn, config=item_config)
+                    ManagedPolicyItem(account=account, name=policy['PolicyName'], arn=arn, config=item_config)
                 )
 
         return item_list, exception_map
 
+    def _policy_document(self, iam, policy, downloaded):
+        """
+        The default version document from the authorization details download, or from
+        GetPolicyVersion for policies the download doesn't hold, like unattached AWS
+        managed policies.
+        """
+        if downloaded and downloaded['DefaultVersionId'] == policy['DefaultVersionId']:
+            document = AuthorizationDetails.default_version_document(downloaded)
+            if document is not None:
+                return document
+
+        response = self.wrap_aws_rate_limited_call(
+            iam.get_policy_version, PolicyArn=policy['Arn'], VersionId=policy['DefaultVersionId'])
+        return policy_document(response['PolicyVersion']['Document'])
+
 
 class ManagedPolicyItem(ChangeItem):
     def __init__(self, account=None, name=None, arn=None, config={}):
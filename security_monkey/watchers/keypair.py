@@ -22,7 +22,7 @@
 
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey.datastore import Account
 from security_monkey import app
@@ -52,8 +52,7 @@ class Keypair(Watcher):
             try:
                 account_db = Account.query.filter(Account.name == account).first()
                 account_number = account_db.number
-                ec2 = connect(account, 'ec2')
-                regions = ec2.get_all_regions()
+                regions = get_regions(account, 'ec2')
             except Exception as e:  # EC2ResponseError
                 # Some Accounts don't subscribe to EC2 and will throw an exception here.
                 exc = BotoConnectionIssue(str(e), 'keypair', account, None)
@@ -69,10 +68,9 @@ class Keypair(Watcher):
                         rec2.get_all_key_pairs
                     )
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), 'keypair', account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), 'keypair', account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
                     continue
 
                 app.logger.debug("Found {} {}".format(len(kps), Keypair.i_am_plural))
@@ -20,7 +20,7 @@
 
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey import app
 
@@ -33,42 +33,14 @@ class KMS(Watcher):
     i_am_singular = 'KMS Master Key'
     i_am_plural = 'KMS Master Keys'
 
-    def paged_wrap_aws_rate_limited_call(self, type, func, *args, **nargs):
-        marker = None
-        all_results = []
-        while True:
-            if marker is None:
-                response = self.wrap_aws_rate_limited_call(func, *args, **nargs)
-            else:
-                nargs["Marker"] = marker
-                response = self.wrap_aws_rate_limited_call(func, *args, **nargs)
-            all_results.extend(response.get(type))
-            marker = response.get("NextMarker")
-            if marker is None:
-                break
-        return all_results
-
     def list_keys(self, kms):
-        all_keys = self.paged_wrap_aws_rate_limited_call(
-            "Keys",
-            kms.list_keys
-        )
-        return all_keys
+        return list(self.paginate(kms.list_keys, "Keys", next_token_key="NextMarker"))
 
     def list_aliases(self, kms):
-        all_aliases = self.paged_wrap_aws_rate_limited_call(
-            "Aliases",
-            kms.list_aliases
-        )
-        return all_aliases
+        return list(self.paginate(kms.list_aliases, "Aliases", next_token_key="NextMarker"))
 
     def list_grants(self, kms, key_id):
-        all_grants = self.paged_wrap_aws_rate_limited_call(
-            "Grants",
-            kms.list_grants,
-            KeyId=key_id
-        )
-        return all_grants
+        return list(self.paginate(kms.list_grants, "Grants", next_token_key="NextMarker", KeyId=key_id))
 
     def describe_key(self, kms, key_id):
         response = self.wrap_aws_rate_limited_call(
@@ -80,11 +52,12 @@ class KMS(Watcher):
     def list_key_policies(self, kms, key_id):
         policy_names = []
         try:
-            policy_names = self.paged_wrap_aws_rate_limited_call(
-                "PolicyNames",
+            policy_names = list(self.paginate(
                 kms.list_key_policies,
+                "PolicyNames",
+                next_token_key="NextMarker",
                 KeyId=key_id
-            )
+            ))
         except Exception as e:
             if e.response.get("Error", {}).get("Code") == "AccessDeniedException":
                 # This is expected for the AWS owned ACM KMS key.
@@ -117,8 +90,7 @@ class KMS(Watcher):
         for account in self.accounts:
 
             try:
-                ec2 = connect(account, 'ec2')
-                regions = ec2.get_all_regions()
+                regions = get_regions(account, 'kms')
             except Exception as e:  # EC2ResponseError
                 # Some Accounts don't subscribe to EC2 and will throw an exception here.
                 exc = BotoConnectionIssue(str(e), self.index, account, None)
@@ -142,10 +114,9 @@ class KMS(Watcher):
                         aliases = self.list_aliases(kms)
 
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), self.index, account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), self.index, account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
                     continue
 
                 app.logger.debug("Found {} {} and {} Aliases.".format(len(keys), self.i_am_plural, len(aliases)))
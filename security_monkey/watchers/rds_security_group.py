@@ -22,11 +22,10 @@
 
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey.datastore import Account
 from security_monkey import app
-from boto.rds import regions
 
 
 class RDSSecurityGroup(Watcher):
@@ -53,31 +52,23 @@ class RDSSecurityGroup(Watcher):
             account_db = Account.query.filter(Account.name == account).first()
             account_number = account_db.number
 
-            for region in regions():
-                app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
+            try:
+                regions = get_regions(account, 'rds')
+            except Exception as e:
+                exc = BotoConnectionIssue(str(e), self.index, account, None)
+                self.slurp_exception((self.index, account), exc, exception_map,
+                                     source="{}-watcher".format(self.index))
+                continue
 
-                sgs = []
+            for region in regions:
+                app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
                 try:
                     rds = connect(account, 'rds', region=region)
-
-                    marker = None
-                    while True:
-                        response = self.wrap_aws_rate_limited_call(
-                            rds.get_all_dbsecurity_groups,
-                            marker=marker
-                        )
-
-                        sgs.extend(response)
-                        if response.marker:
-                            marker = response.marker
-                        else:
-                            break
-
+                    sgs = list(self.paginate(rds.get_all_dbsecurity_groups, None, token_param='marker'))
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), self.index, account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), self.index, account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
                     continue
 
                 app.logger.debug("Found {} {}".format(len(sgs), self.i_am_plural))
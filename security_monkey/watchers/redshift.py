@@ -22,13 +22,11 @@
 
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey.datastore import Account
 from security_monkey import app
 
-from boto.redshift import regions
-
 
 class Redshift(Watcher):
     index = 'redshift'
@@ -62,29 +60,29 @@ class Redshift(Watcher):
             account_db = Account.query.filter(Account.name == account).first()
             account_number = account_db.number
 
-            for region in regions():
+            try:
+                regions = get_regions(account, 'redshift')
+            except Exception as e:
+                exc = BotoConnectionIssue(str(e), self.index, account, None)
+                self.slurp_exception((self.index, account), exc, exception_map,
+                                     source="{}-watcher".format(self.index))
+                continue
+
+            for region in regions:
                 app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
                 try:
                     redshift = connect(account, 'redshift', region=region)
 
-                    all_clusters = []
-                    marker = None
-                    while True:
-                        response = self.wrap_aws_rate_limited_call(
-                            redshift.describe_clusters,
-                            marker=marker
-                        )
-                        all_clusters.extend(response['DescribeClustersResponse']['DescribeClustersResult']['Clusters'])
-                        if response['DescribeClustersResponse']['DescribeClustersResult']['Marker'] is not None:
-                            marker = response['DescribeClustersResponse']['DescribeClustersResult']['Marker']
-                        else:
-                            break
-
+                    all_clusters = list(self.paginate(
+                        redshift.describe_clusters,
+                        'DescribeClustersResponse.DescribeClustersResult.Clusters',
+                        token_param='marker',
+                        next_token_key='DescribeClustersResponse.DescribeClustersResult.Marker'
+                    ))
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), 'redshift', account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), 'redshift', account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
                     continue
                 app.logger.debug("Found {} {}".format(len(all_clusters), Redshift.i_am_plural))
                 for cluster in all_clusters:
@@ -25,7 +25,36 @@ from security_monkey.decorators import iter_account_region
 from security_monkey import app
 
 from botor.aws.route53 import list_hosted_zones
-from botor.aws.route53 import list_resource_record_sets
+from botor.aws.sts import sts_conn
+
+from datetime import datetime, timedelta
+
+
+# (account name, zone id) => (zone signature, time of the last successful listing).
+# Kept by the running process, so after a restart every zone is listed again.
+_zone_sweeps = {}
+
+# ListResourceRecordSets resumes from these arguments => where a page holds their next values.
+RECORD_SET_TOKENS = {
+    'StartRecordName': 'NextRecordName',
+    'StartRecordType': 'NextRecordType',
+    'StartRecordIdentifier': 'NextRecordIdentifier'
+}
+
+
+def zone_signature(zone):
+    """
+    The parts of a ListHostedZones entry that change when the zone's records are
+    added or removed, or the zone itself is changed.  Records edited in place leave
+    it as it was.
+    """
+    return (zone.get('Name'), zone.get('CallerReference'), zone.get('ResourceRecordSetCount'),
+            tuple(sorted(zone.get('Config', {}).items())))
+
+
+@sts_conn('route53', service_type='client')
+def route53_client(**kwargs):
+    return kwargs['client']
 
 
 class Route53(Watcher):
@@ -44,9 +73,22 @@ class Route53(Watcher):
         return [zone for zone in zones if not self.check_ignore_list(zone.get('Name', ''))]
 
     @record_exception(source="route53-watcher")
-    def list_resource_record_sets(self, **kwargs):
-        record_sets = list_resource_record_sets(**kwargs)
-        return [record for record in record_sets if not self.check_ignore_list(record.get('Name', ''))]
+    def list_zone_items(self, **kwargs):
+        """
+        Turns each page of the zone's record sets into items as it arrives.
+        """
+        zone = kwargs.pop('zone')
+        client = route53_client(**kwargs)
+        item_list = []
+        for page in self.iter_pages(client.list_resource_record_sets, HostedZoneId=zone['Id'],
+                                    token_param=RECORD_SET_TOKENS, truncated_key='IsTruncated'):
+            for record in page['ResourceRecordSets']:
+                if self.check_ignore_list(record.get('Name', '')):
+                    continue
+                item = self.process_item(name=record['Name'], record=record, zone=zone, **kwargs)
+                if item:
+                    item_list.append(item)
+        return item_list
 
     @record_exception(source="route53-watcher")
     def process_item(self, **kwargs):
@@ -68,16 +110,40 @@ class Route53(Watcher):
 
         return Route53Record(account=kwargs['account_name'], name=record_name, config=dict(config))
 
-    def slurp(self):
+    def zone_unchanged(self, account, zone):
+        """
+        With ROUTE53_SKIP_UNCHANGED_ZONES set, a zone whose metadata is the same as at its
+        last successful listing, less than ROUTE53_FULL_SWEEP_MINUTES (default: 60) ago,
+        isn't listed again.  Records edited in place don't change the metadata, so such
+        an edit can go unseen for that long.  Off by default.
+        """
+        if not app.config.get('ROUTE53_SKIP_UNCHANGED_ZONES', False):
+            return False
+        last_sweep = _zone_sweeps.get((account, zone['Id']))
+        if not last_sweep:
+            return False
+        signature, swept = last_sweep
+        max_age = timedelta(minutes=app.config.get('ROUTE53_FULL_SWEEP_MINUTES', 60))
+        return signature == zone_signature(zone) and datetime.utcnow() - swept < max_age
+
+    def previous_zone_items(self, account, zone_ids):
+        """
+        :returns: the items last stored for the records of these zones.
+        """
+        previous = self.datastore.get_all_ctype_filtered(tech=self.index, account=account, include_inactive=False)
+        return [Route53Record(account=account, name=item.name, config=revision.config)
+                for item, revision in previous.items() if revision.config.get('zoneid') in zone_ids]
+
+    def slurp_partitions(self):
         """
-        :returns: item_list - list of Route53 zones.
-        :returns: exception_map - A dict where the keys are a tuple containing the
-            location of the exception and the value is the actual exception
+        :yields: account, region, item_list, exception_map - the Route53 records of
+            each account, as it is slurped.
 
         """
         self.prep_for_slurp()
 
-        @iter_account_region(index=self.index, accounts=self.accounts, exception_record_region='universal')
+        @iter_account_region(index=self.index, accounts=self.accounts, exception_record_region='universal',
+                             partitions=True)
         def slurp_items(**kwargs):
             app.logger.debug("Checking {}/{}".format(self.index, kwargs['account_name']))
             item_list = []
@@ -91,17 +157,27 @@ class Route53(Watcher):
                 plural=self.i_am_plural,
                 account=kwargs['account_name']))
 
+            unchanged_zone_ids = set()
             for zone in zones:
-                record_sets = self.list_resource_record_sets(Id=zone['Id'], **kwargs)
-                if not record_sets:
+                if self.zone_unchanged(kwargs['account_name'], zone):
+                    unchanged_zone_ids.add(zone['Id'])
+                    continue
+
+                listed = datetime.utcnow()
+                zone_items = self.list_zone_items(zone=zone, **kwargs)
+                if zone_items is None:
                     continue
 
                 app.logger.debug("Slurped %s %s within %s %s (%s) from %s" %
-                    (len(record_sets), self.i_have_plural, self.i_am_singular, zone['Name'], zone['Id'], kwargs['account_name']))
+                    (len(zone_items), self.i_have_plural, self.i_am_singular, zone['Name'], zone['Id'], kwargs['account_name']))
 
-                for record in record_sets:
-                    item = self.process_item(name=record['Name'], record=record, zone=zone, **kwargs)
-                    item_list.append(item)
+                item_list.extend(zone_items)
+                _zone_sweeps[(kwargs['account_name'], zone['Id'])] = (zone_signature(zone), listed)
+
+            if unchanged_zone_ids:
+                app.logger.debug("Skipped listing {} unchanged {} from {}".format(
+                    len(unchanged_zone_ids), self.i_am_plural, kwargs['account_name']))
+                item_list.extend(self.previous_zone_items(kwargs['account_name'], unchanged_zone_ids))
 
             return item_list, kwargs['exception_map']
 
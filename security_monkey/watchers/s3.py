@@ -187,6 +187,32 @@ class S3(Watcher):
 
         return item_list, exception_map
 
+    def slurp_item(self, account, region, name, exception_map={}):
+        """
+        Fetches a single bucket.  The region is looked up again, as it may not be known
+        to the caller.
+        """
+        from security_monkey.common.sts_connect import connect
+        s3conn = connect(account, 's3', calling_format=OrdinaryCallingFormat())
+        bucket = self.wrap_aws_rate_limited_call(s3conn.get_bucket, name, validate=False)
+        try:
+            loc = self.wrap_aws_rate_limited_call(bucket.get_location)
+        except boto.exception.S3ResponseError as e:
+            if e.error_code == 'NoSuchBucket':
+                return None
+            raise
+
+        region = self.translate_location_to_region(loc)
+        if not region:
+            bhandle = bucket
+            region = 'us-east-1'
+        else:
+            s3regionconn = connect(account, 's3', region=region, calling_format=OrdinaryCallingFormat())
+            bhandle = self.wrap_aws_rate_limited_call(s3regionconn.get_bucket, name, validate=False)
+
+        bucket_dict = self.conv_bucket_to_dict(bhandle, account, region, name, exception_map)
+        return S3Item(account=account, region=region, name=name, config=bucket_dict)
+
     def translate_location_to_region(self, location):
         if location in self.region_mappings:
             return self.region_mappings[location]
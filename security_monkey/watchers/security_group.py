@@ -22,11 +22,15 @@
 
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import BotoConnectionIssue
+from security_monkey.common.ec2_inventory import get_ec2_inventory, index_tags
 from security_monkey.datastore import Account
 from security_monkey import app
 
+from boto.exception import EC2ResponseError
+import re
+
 
 class SecurityGroup(Watcher):
     index = 'securitygroup'
@@ -47,33 +51,34 @@ class SecurityGroup(Watcher):
         else:
             return 'NONE'
 
-    def slurp(self):
+    def slurp_partitions(self):
         """
-        :returns: item_list - list of Security Groups.
-        :returns: exception_map - A dict where the keys are a tuple containing the
-            location of the exception and the value is the actual exception
+        :yields: account, region, item_list, exception_map - the Security Groups of
+            each region, as it is slurped.  The exception_map is a dict where the keys are a
+            tuple containing the location of the exception and the value is the actual exception
 
         """
         self.prep_for_slurp()
 
-        item_list = []
-        exception_map = {}
         from security_monkey.common.sts_connect import connect
         for account in self.accounts:
+            exception_map = {}
             account_db = Account.query.filter(Account.name == account).first()
             account_number = account_db.number
 
             try:
-                ec2 = connect(account, 'ec2')
-                regions = ec2.get_all_regions()
+                regions = get_regions(account, 'ec2')
             except Exception as e:  # EC2ResponseError
                 # Some Accounts don't subscribe to EC2 and will throw an exception here.
                 exc = BotoConnectionIssue(str(e), self.index, account, None)
                 self.slurp_exception((self.index, account), exc, exception_map, source="{}-watcher".format(self.index))
+                yield account, None, [], exception_map
                 continue
 
             for region in regions:
                 app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
+                item_list = []
+                exception_map = {}
 
                 try:
                     rec2 = connect(account, 'ec2', region=region)
@@ -82,126 +87,164 @@ class SecurityGroup(Watcher):
                         rec2.get_all_security_groups
                     )
 
+                    instance_tags = {}
                     if self.get_detail_level() != 'NONE':
-                        # We fetch tags here to later correlate instances
-                        tags = self.wrap_aws_rate_limited_call(
-                            rec2.get_all_tags
-                        )
+                        # Instances and their tags are shared with the other EC2 watchers.
+                        inventory = get_ec2_inventory(account, region.name)
+                        # We fetch tags here to later correlate instances, indexed by resource id
+                        instance_tags = inventory.tag_index(self)
                         # Retrieve all instances
-                        instances = self.wrap_aws_rate_limited_call(
-                            rec2.get_only_instances
-                        )
+                        instances = inventory.instances(self)
                         app.logger.info("Number of instances found in region {}: {}".format(region.name, len(instances)))
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), self.index, account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), self.index, account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
+                    yield account, region.name, item_list, exception_map
                     continue
 
                 app.logger.debug("Found {} {}".format(len(sgs), self.i_am_plural))
 
+                sg_instances = {}
                 if self.get_detail_level() != 'NONE':
-                    app.logger.info("Creating mapping of sg_id's to instances")
-                    # map sgid => instance
-                    sg_instances = {}
-                    for instance in instances:
-                        for group in instance.groups:
-                            if group.id not in sg_instances:
-                                sg_instances[group.id] = [instance]
-                            else:
-                                sg_instances[group.id].append(instance)
-
-                    app.logger.info("Creating mapping of instance_id's to tags")
-                    # map instanceid => tags
-                    instance_tags = {}
-                    for tag in tags:
-                        if tag.res_id not in instance_tags:
-                            instance_tags[tag.res_id] = [tag]
-                        else:
-                            instance_tags[tag.res_id].append(tag)
-                    app.logger.info("Done creating mappings")
+                    sg_instances = self._map_instances(instances)
 
                 for sg in sgs:
 
                     if self.check_ignore_list(sg.name):
                         continue
 
-                    arn = 'arn:aws:ec2:{region}:{account_number}:security-group/{security_group_id}'.format(
-                        region=region.name,
-                        account_number=account_number,
-                        security_group_id=sg.id)
-
-                    item_config = {
-                        "id": sg.id,
-                        "name": sg.name,
-                        "description": sg.description,
-                        "vpc_id": sg.vpc_id,
-                        "owner_id": sg.owner_id,
-                        "region": sg.region.name,
-                        "rules": [],
-                        "assigned_to": None,
-                        "arn": arn
-                    }
-
-                    for rule in sg.rules:
-                        for grant in rule.grants:
-                            rule_config = {
-                                "ip_protocol": rule.ip_protocol,
-                                "rule_type": "ingress",
-                                "from_port": rule.from_port,
-                                "to_port": rule.to_port,
-                                "cidr_ip": grant.cidr_ip,
-                                "group_id": grant.group_id,
-                                "name": grant.name,
-                                "owner_id": grant.owner_id
-                            }
-                            item_config['rules'].append(rule_config)
-
-                    for rule in sg.rules_egress:
-                        for grant in rule.grants:
-                            rule_config = {
-                                "ip_protocol": rule.ip_protocol,
-                                "rule_type": "egress",
-                                "from_port": rule.from_port,
-                                "to_port": rule.to_port,
-                                "cidr_ip": grant.cidr_ip,
-                                "group_id": grant.group_id,
-                                "name": grant.name,
-                                "owner_id": grant.owner_id
-                            }
-                            item_config['rules'].append(rule_config)
-                    item_config['rules'] = sorted(item_config['rules'])
-
-                    if self.get_detail_level() == 'SUMMARY':
-                        if sg.id in sg_instances:
-                            item_config["assigned_to"] = "{} instances".format(len(sg_instances[sg.id]))
-                        else:
-                            item_config["assigned_to"] = "0 instances"
-
-                    elif self.get_detail_level() == 'FULL':
-                        assigned_to = []
-                        if sg.id in sg_instances:
-                            for instance in sg_instances[sg.id]:
-                                if instance.id in instance_tags:
-                                    tagdict = {tag.name: tag.value for tag in instance_tags[instance.id]}
-                                    tagdict["instance_id"] = instance.id
-                                else:
-                                    tagdict = {"instance_id": instance.id}
-                                assigned_to.append(tagdict)
-                        item_config["assigned_to"] = assigned_to
-
-                    # Issue 40: Security Groups can have a name collision between EC2 and
-                    # VPC or between different VPCs within a given region.
-                    if sg.vpc_id:
-                        sg_name = "{0} ({1} in {2})".format(sg.name, sg.id, sg.vpc_id)
+                    item_list.append(self._build_item(sg, account, account_number, region.name,
+                                                      sg_instances, instance_tags))
+
+                yield account, region.name, item_list, exception_map
+
+    def slurp_item(self, account, region, name, exception_map={}):
+        """
+        Fetches a single security group by the id found in its item name.
+        """
+        match = re.search(r'\((sg-[0-9a-f]+)', name)
+        if not match:
+            return None
+        group_id = match.group(1)
+
+        from security_monkey.common.sts_connect import connect
+        account_number = Account.query.filter(Account.name == account).first().number
+        rec2 = connect(account, 'ec2', region=region)
+        try:
+            sgs = self.wrap_aws_rate_limited_call(rec2.get_all_security_groups, group_ids=[group_id])
+        except EC2ResponseError as e:
+            if e.error_code == 'InvalidGroup.NotFound':
+                return None
+            raise
+        if not sgs:
+            return None
+
+        sg_instances, instance_tags = {}, {}
+        if self.get_detail_level() != 'NONE':
+            instances = self.wrap_aws_rate_limited_call(
+                rec2.get_only_instances,
+                filters={'instance.group-id': group_id}
+            )
+            tags = []
+            if instances:
+                tags = self.wrap_aws_rate_limited_call(
+                    rec2.get_all_tags,
+                    filters={'resource-id': [instance.id for instance in instances]}
+                )
+            sg_instances = self._map_instances(instances)
+            instance_tags = index_tags(tags)
+
+        return self._build_item(sgs[0], account, account_number, region, sg_instances, instance_tags)
+
+    def _map_instances(self, instances):
+        """
+        :returns: sg_instances - map of sg_id => instances
+        """
+        app.logger.info("Creating mapping of sg_id's to instances")
+        sg_instances = {}
+        for instance in instances:
+            for group in instance.groups:
+                if group.id not in sg_instances:
+                    sg_instances[group.id] = [instance]
+                else:
+                    sg_instances[group.id].append(instance)
+        app.logger.info("Done creating mappings")
+        return sg_instances
+
+    def _build_item(self, sg, account, account_number, region_name, sg_instances, instance_tags):
+        arn = 'arn:aws:ec2:{region}:{account_number}:security-group/{security_group_id}'.format(
+            region=region_name,
+            account_number=account_number,
+            security_group_id=sg.id)
+
+        item_config = {
+            "id": sg.id,
+            "name": sg.name,
+            "description": sg.description,
+            "vpc_id": sg.vpc_id,
+            "owner_id": sg.owner_id,
+            "region": sg.region.name,
+            "rules": [],
+            "assigned_to": None,
+            "arn": arn
+        }
+
+        for rule in sg.rules:
+            for grant in rule.grants:
+                rule_config = {
+                    "ip_protocol": rule.ip_protocol,
+                    "rule_type": "ingress",
+                    "from_port": rule.from_port,
+                    "to_port": rule.to_port,
+                    "cidr_ip": grant.cidr_ip,
+                    "group_id": grant.group_id,
+                    "name": grant.name,
+                    "owner_id": grant.owner_id
+                }
+                item_config['rules'].append(rule_config)
+
+        for rule in sg.rules_egress:
+            for grant in rule.grants:
+                rule_config = {
+                    "ip_protocol": rule.ip_protocol,
+                    "rule_type": "egress",
+                    "from_port": rule.from_port,
+                    "to_port": rule.to_port,
+                    "cidr_ip": grant.cidr_ip,
+                    "group_id": grant.group_id,
+                    "name": grant.name,
+                    "owner_id": grant.owner_id
+                }
+                item_config['rules'].append(rule_config)
+        item_config['rules'] = sorted(item_config['rules'])
+
+        if self.get_detail_level() == 'SUMMARY':
+            if sg.id in sg_instances:
+                item_config["assigned_to"] = "{} instances".format(len(sg_instances[sg.id]))
+            else:
+                item_config["assigned_to"] = "0 instances"
+
+        elif self.get_detail_level() == 'FULL':
+            assigned_to = []
+            if sg.id in sg_instances:
+                for instance in sg_instances[sg.id]:
+                    if instance.id in instance_tags:
+                        tagdict = {tag.name: tag.value for tag in instance_tags[instance.id]}
+                        tagdict["instance_id"] = instance.id
                     else:
-                        sg_name = "{0} ({1})".format(sg.name, sg.id)
+                        tagdict = {"instance_id": instance.id}
+                    assigned_to.append(tagdict)
+            item_config["assigned_to"] = assigned_to
 
-                    item = SecurityGroupItem(region=region.name, account=account, name=sg_name, arn=arn, config=item_config)
-                    item_list.append(item)
+        # Issue 40: Security Groups can have a name collision between EC2 and
+        # VPC or between different VPCs within a given region.
+        if sg.vpc_id:
+            sg_name = "{0} ({1} in {2})".format(sg.name, sg.id, sg.vpc_id)
+        else:
+            sg_name = "{0} ({1})".format(sg.name, sg.id)
 
-        return item_list, exception_map
+        return SecurityGroupItem(region=region_name, account=account, name=sg_name, arn=arn, config=item_config)
 
 
 class SecurityGroupItem(ChangeItem):
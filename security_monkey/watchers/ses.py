@@ -22,11 +22,14 @@
 
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey import app
 
-from boto.ses import regions
+from joblib import Parallel, delayed
+
+# GetIdentityVerificationAttributes takes up to 100 identities per request.
+VERIFICATION_BATCH_SIZE = 100
 
 
 class SES(Watcher):
@@ -49,7 +52,15 @@ class SES(Watcher):
         item_list = []
         exception_map = {}
         for account in self.accounts:
-            for region in regions():
+            try:
+                regions = get_regions(account, 'ses')
+            except Exception as e:
+                exc = BotoConnectionIssue(str(e), self.index, account, None)
+                self.slurp_exception((self.index, account), exc, exception_map,
+                                     source="{}-watcher".format(self.index))
+                continue
+
+            for region in regions:
 
                 if region.name == 'eu-central-1':
                     # as of boto 2.34.0, boto cannot connect to ses in eu-central-1
@@ -58,11 +69,10 @@ class SES(Watcher):
 
                 app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
                 try:
-                    ses = connect(account, 'ses', region=region.name)
-                    response = self.wrap_aws_rate_limited_call(
-                        ses.list_identities
-                    )
-                    identities = response.Identities
+                    # boto3 clients are thread-safe, so the verification threads share this
+                    # one instead of each opening a connection of its own.
+                    ses = connect(account, 'boto3.ses.client', region=region.name)
+                    identities = list(self.paginate(ses.list_identities, 'Identities', token_param='NextToken'))
 
                     domains = []
                     verified_domains = []
@@ -71,26 +81,22 @@ class SES(Watcher):
                             domains.append(identity)
 
                     if len(domains) > 0:
-                        response = self.wrap_aws_rate_limited_call(
-                            ses.get_identity_verification_attributes,
-                            domains
-                        )
-
-                        results = response.GetIdentityVerificationAttributesResponse.GetIdentityVerificationAttributesResult.VerificationAttributes
-                        for result in results:
-                            if result.value.VerificationStatus == 'Success':
-                                verified_domains.append(result.key)
+                        batches = [domains[i:i + VERIFICATION_BATCH_SIZE]
+                                   for i in range(0, len(domains), VERIFICATION_BATCH_SIZE)]
+                        threads = app.config.get('SES_VERIFICATION_THREADS', 4)
+                        for verified_batch in Parallel(n_jobs=threads, backend="threading")(
+                                delayed(self.verified_domains)(ses, batch) for batch in batches):
+                            verified_domains.extend(verified_batch)
 
                     response = self.wrap_aws_rate_limited_call(
                         ses.list_verified_email_addresses
                     )
-                    verified_identities = response.VerifiedEmailAddresses
-                    verified_identities += verified_domains
+                    verified_identities = set(response.get('VerifiedEmailAddresses', []))
+                    verified_identities.update(verified_domains)
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), self.index, account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), self.index, account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
                     continue
                 app.logger.debug("Found {} {}. {} are verified.".format(len(identities), self.i_am_plural,
                                                                         len(verified_identities)))
@@ -108,6 +114,21 @@ class SES(Watcher):
 
         return item_list, exception_map
 
+    def verified_domains(self, ses, domains):
+        """
+        Runs in a worker thread, on the boto3 client the region was listed with.
+
+        :param domains: at most VERIFICATION_BATCH_SIZE domains, the most the API accepts per request.
+        :returns: the domains whose verification succeeded.
+        """
+        response = self.wrap_aws_rate_limited_call(
+            ses.get_identity_verification_attributes,
+            Identities=domains
+        )
+
+        results = response.get('VerificationAttributes', {})
+        return [domain for domain, result in results.items() if result.get('VerificationStatus') == 'Success']
+
 
 class SESItem(ChangeItem):
     def __init__(self, region=None, account=None, name=None, config={}):
@@ -22,15 +22,18 @@
 
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import InvalidARN
 from security_monkey.exceptions import InvalidAWSJSON
 from security_monkey.exceptions import BotoConnectionIssue
-from security_monkey import app
+from security_monkey.datastore import Account
+from security_monkey import app, db
 
+from botocore.exceptions import ClientError
+from joblib import Parallel, delayed
 import json
 import re
-from boto.sns import regions
+import threading
 
 
 class SNS(Watcher):
@@ -53,72 +56,92 @@ class SNS(Watcher):
         item_list = []
         exception_map = {}
         for account in self.accounts:
-            for region in regions():
+            try:
+                regions = get_regions(account, 'sns')
+            except Exception as e:
+                exc = BotoConnectionIssue(str(e), self.index, account, None)
+                self.slurp_exception((self.index, account), exc, exception_map,
+                                     source="{}-watcher".format(self.index))
+                continue
+
+            for region in regions:
                 try:
                     (sns, topics) = self.get_all_topics_in_region(account, region)
+
+                    # One ListSubscriptions stream for the region instead of a
+                    # ListSubscriptionsByTopic call per topic.
+                    topic_subscriptions = None
+                    if app.config.get('SNS_LIST_ALL_SUBSCRIPTIONS', True):
+                        topic_subscriptions = self.get_all_subscriptions_in_region(sns)
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), 'sns', account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), 'sns', account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
                     continue
 
                 app.logger.debug("Found {} {}".format(len(topics), SNS.i_am_plural))
-                for topic in topics:
-                    arn = topic['TopicArn']
-
-                    if self.check_ignore_list(arn.split(':')[5]):
-                        continue
-
-                    item = self.build_item(arn=arn,
-                                           conn=sns,
-                                           region=region.name,
-                                           account=account,
-                                           exception_map=exception_map)
-                    if item:
-                        item_list.append(item)
+                arns = [topic['TopicArn'] for topic in topics
+                        if not self.check_ignore_list(topic['TopicArn'].split(':')[5])]
+
+                # The boto3 client is thread-safe, so the threads share it, each with a
+                # share of the topics.
+                threads = max(app.config.get('SNS_ATTRIBUTE_THREADS', 8), 1)
+                shares = [arns[i::threads] for i in range(threads) if arns[i::threads]]
+                caller = threading.current_thread()
+                items = sum(Parallel(n_jobs=threads, backend="threading")(
+                    delayed(self.build_items)(sns, account, region.name, share, exception_map, topic_subscriptions,
+                                              caller=caller)
+                    for share in shares
+                ), [])
+                item_list.extend([item for item in items if item])
         return item_list, exception_map
 
+    def slurp_item(self, account, region, name, exception_map={}):
+        """
+        Fetches a single topic by name.  The ARN is built from the account number,
+        so no topics have to be listed.
+        """
+        from security_monkey.common.sts_connect import connect
+        account_number = Account.query.filter(Account.name == account).first().number
+        arn = 'arn:aws:sns:{region}:{account_number}:{name}'.format(
+            region=region,
+            account_number=account_number,
+            name=name)
+
+        sns = connect(account, 'boto3.sns.client', region=region)
+        try:
+            self.wrap_aws_rate_limited_call(sns.get_topic_attributes, TopicArn=arn)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NotFound':
+                return None
+            raise
+
+        return self.build_item(arn=arn, conn=sns, region=region, account=account, exception_map=exception_map)
+
     def get_all_topics_in_region(self, account, region):
         from security_monkey.common.sts_connect import connect
-        sns = connect(account, 'sns', region=region)
+        sns = connect(account, 'boto3.sns.client', region=region)
         app.logger.debug("Checking {}/{}/{}".format(SNS.index, account, region.name))
-        topics = []
-        marker = None
-        while True:
-            topics_response = self.wrap_aws_rate_limited_call(
-                sns.get_all_topics,
-                next_token=marker
-            )
-            current_page_topics = topics_response['ListTopicsResponse']['ListTopicsResult']['Topics']
-            topics.extend(current_page_topics)
-            if topics_response[u'ListTopicsResponse'][u'ListTopicsResult'][u'NextToken']:
-                marker = topics_response[u'ListTopicsResponse'][u'ListTopicsResult'][u'NextToken']
-            else:
-                break
+        topics = list(self.paginate(sns.list_topics, 'Topics', token_param='NextToken'))
         return sns, topics
 
+    def get_all_subscriptions_in_region(self, sns):
+        """
+        :returns: dict of topic arn => subscriptions, from every page of ListSubscriptions.
+        """
+        topic_subscriptions = {}
+        for subscription in self.paginate(sns.list_subscriptions, 'Subscriptions', token_param='NextToken'):
+            topic_subscriptions.setdefault(subscription['TopicArn'], []).append(subscription)
+        return topic_subscriptions
+
     def _get_topic_subscriptions(self, sns, arn):
         # paginate over each topic subscription
-        token = None
-        all_subscriptions = []
-        while True:
-            subscriptions = self.wrap_aws_rate_limited_call(
-                sns.get_all_subscriptions_by_topic,
-                arn,
-                next_token=token
-            )
-            all_subscriptions.extend(
-                subscriptions['ListSubscriptionsByTopicResponse']['ListSubscriptionsByTopicResult']['Subscriptions']
-            )
-            token = subscriptions['ListSubscriptionsByTopicResponse']['ListSubscriptionsByTopicResult']['NextToken']
-            if token is None:
-                break
-        return all_subscriptions
+        return list(self.paginate(sns.list_subscriptions_by_topic, 'Subscriptions', token_param='NextToken',
+                                  TopicArn=arn))
 
     def _get_sns_policy(self, attrs, account, region, arn, exception_map):
         try:
-            json_str = attrs['GetTopicAttributesResponse']['GetTopicAttributesResult']['Attributes']['Policy']
+            json_str = attrs['Attributes']['Policy']
             return json.loads(json_str)
         except:
             self.slurp_exception((self.index, account, region, arn), InvalidAWSJSON(json_str), exception_map,
@@ -133,7 +156,28 @@ class SNS(Watcher):
                                  source="{}-watcher".format(self.index))
             raise
 
-    def build_item(self, arn=None, conn=None, region=None, account=None, exception_map={}):
+    def build_items(self, sns, account, region, arns, exception_map, topic_subscriptions=None, caller=None):
+        """
+        Builds the items of a worker thread's share of the topics.
+
+        :param topic_subscriptions: topic arn => subscriptions, if already listed.
+        :param caller: the thread that started the workers.
+        """
+        try:
+            return [self.build_item(arn=arn, conn=sns, region=region, account=account, exception_map=exception_map,
+                                    subscriptions=topic_subscriptions.get(arn, [])
+                                    if topic_subscriptions is not None else None)
+                    for arn in arns]
+        finally:
+            # Exceptions are stored through the worker's own scoped session, which would
+            # otherwise keep its pooled connection.
+            if caller is not None and threading.current_thread() is not caller:
+                db.session.remove()
+
+    def build_item(self, arn=None, conn=None, region=None, account=None, exception_map={}, subscriptions=None):
+        """
+        :param subscriptions: the topic's subscriptions, if already listed.  Otherwise they are fetched.
+        """
         config = {
             'arn': arn
         }
@@ -141,10 +185,14 @@ class SNS(Watcher):
         try:
             attrs = self.wrap_aws_rate_limited_call(
                 conn.get_topic_attributes,
-                arn
+                TopicArn=arn
             )
 
-            config['subscriptions'] = self._get_topic_subscriptions(conn, arn)
+            if subscriptions is None:
+                subscriptions = self._get_topic_subscriptions(conn, arn)
+            # In a stable order, so the order of ListSubscriptions pages doesn't look like a change.
+            config['subscriptions'] = sorted(subscriptions, key=lambda subscription: (
+                subscription.get('Protocol'), subscription.get('Endpoint'), subscription.get('SubscriptionArn')))
             config['policy'] = self._get_sns_policy(attrs, account, region, arn, exception_map)
             config['name'] = self._get_sns_name(arn, account, region, exception_map)
         except:
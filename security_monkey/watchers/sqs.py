@@ -22,15 +22,18 @@
 
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import InvalidAWSJSON
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey.datastore import Account
 from security_monkey import app
 
+from botocore.exceptions import ClientError
+from joblib import Parallel, delayed
 import json
-import boto
-from boto.sqs import regions
+
+# The most queue urls ListQueues returns per page.
+QUEUE_PAGE_SIZE = 1000
 
 
 class SQS(Watcher):
@@ -56,53 +59,94 @@ class SQS(Watcher):
         for account in self.accounts:
             account_db = Account.query.filter(Account.name == account).first()
             account_number = account_db.number
-            for region in regions():
+            try:
+                regions = get_regions(account, 'sqs')
+            except Exception as e:
+                exc = BotoConnectionIssue(str(e), self.index, account, None)
+                self.slurp_exception((self.index, account), exc, exception_map,
+                                     source="{}-watcher".format(self.index))
+                continue
+
+            for region in regions:
                 app.logger.debug("Checking {}/{}/{}".format(SQS.index, account, region.name))
                 try:
-                    sqs = connect(account, 'sqs', region=region)
-                    all_queues = self.wrap_aws_rate_limited_call(
-                        sqs.get_all_queues
-                    )
+                    sqs = connect(account, 'boto3.sqs.client', region=region)
+                    queue_count = 0
+                    for queue_urls in self._list_queue_urls(sqs):
+                        queue_count += len(queue_urls)
+                        queue_urls = [url for url in queue_urls if not self.check_ignore_list(_queue_name(url))]
+
+                        items = Parallel(n_jobs=app.config.get('SQS_ATTRIBUTE_THREADS', 8), backend="threading")(
+                            delayed(self._build_item)(sqs, url, account, account_number, region.name, exception_map)
+                            for url in queue_urls
+                        )
+                        item_list.extend([item for item in items if item])
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), 'sqs', account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), 'sqs', account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
                     continue
-                app.logger.debug("Found {} {}".format(len(all_queues), SQS.i_am_plural))
-                for q in all_queues:
-
-                    if self.check_ignore_list(q.name):
-                        continue
-
-                    try:
-                        policy = self.wrap_aws_rate_limited_call(
-                            q.get_attributes,
-                            attributes='Policy'
-                        )
-                        if 'Policy' in policy:
-                            try:
-                                arn = 'arn:aws:sqs:{region}:{account_number}:{name}'.format(
-                                    region=region.name,
-                                    account_number=account_number,
-                                    name=q.name)
-
-                                json_str = policy['Policy']
-                                policy = json.loads(json_str)
-                                policy['arn'] = arn
-
-                                item = SQSItem(region=region.name, account=account, name=q.name, arn=arn,
-                                               config=policy)
-                                item_list.append(item)
-                            except:
-                                self.slurp_exception((self.index, account, region, q.name), InvalidAWSJSON(json_str),
-                                                     exception_map, source="{}-watcher".format(self.index))
-                    except boto.exception.SQSError:
-                        # A number of Queues are so ephemeral that they may be gone by the time
-                        # the code reaches here.  Just ignore them and move on.
-                        pass
+                app.logger.debug("Found {} {}".format(queue_count, SQS.i_am_plural))
         return item_list, exception_map
 
+    def slurp_item(self, account, region, name, exception_map={}):
+        """
+        Fetches the policy of a single queue by name.
+        """
+        from security_monkey.common.sts_connect import connect
+        account_number = Account.query.filter(Account.name == account).first().number
+        sqs = connect(account, 'boto3.sqs.client', region=region)
+        try:
+            response = self.wrap_aws_rate_limited_call(sqs.get_queue_url, QueueName=name)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'AWS.SimpleQueueService.NonExistentQueue':
+                return None
+            raise
+        return self._build_item(sqs, response['QueueUrl'], account, account_number, region, exception_map)
+
+    def _list_queue_urls(self, sqs):
+        """
+        Yields the queue urls of the region a page at a time, so that a page is
+        processed before the next one is requested.
+        """
+        for page in self.iter_pages(sqs.list_queues, token_param='NextToken', MaxResults=QUEUE_PAGE_SIZE):
+            yield page.get('QueueUrls', [])
+
+    def _build_item(self, sqs, queue_url, account, account_number, region_name, exception_map):
+        name = _queue_name(queue_url)
+        try:
+            attributes = self.wrap_aws_rate_limited_call(
+                sqs.get_queue_attributes,
+                QueueUrl=queue_url,
+                AttributeNames=['Policy']
+            ).get('Attributes', {})
+        except ClientError:
+            # A number of Queues are so ephemeral that they may be gone by the time
+            # the code reaches here.  Just ignore them and move on.
+            return None
+
+        if 'Policy' not in attributes:
+            return None
+
+        try:
+            arn = 'arn:aws:sqs:{region}:{account_number}:{name}'.format(
+                region=region_name,
+                account_number=account_number,
+                name=name)
+
+            json_str = attributes['Policy']
+            policy = json.loads(json_str)
+            policy['arn'] = arn
+
+            return SQSItem(region=region_name, account=account, name=name, arn=arn, config=policy)
+        except:
+            self.slurp_exception((self.index, account, region_name, name), InvalidAWSJSON(json_str),
+                                 exception_map, source="{}-watcher".format(self.index))
+
+
+def _queue_name(queue_url):
+    return queue_url.rstrip('/').rsplit('/', 1)[-1]
+
 
 class SQSItem(ChangeItem):
     def __init__(self, region=None, account=None, name=None, arn=None, config={}):
@@ -22,12 +22,12 @@
 
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
-from security_monkey.constants import TROUBLE_REGIONS
+from security_monkey.common.region_catalog import get_regions
 from security_monkey.exceptions import BotoConnectionIssue
+from security_monkey.common.ec2_inventory import get_ec2_inventory
 from security_monkey.datastore import Account
 from security_monkey import app
 
-from boto.vpc import regions
 import json
 
 
@@ -71,13 +71,20 @@ class VPC(Watcher):
             account_db = Account.query.filter(Account.name == account).first()
             account_number = account_db.number
 
-            for region in regions():
+            try:
+                regions = get_regions(account, 'ec2')
+            except Exception as e:
+                exc = BotoConnectionIssue(str(e), self.index, account, None)
+                self.slurp_exception((self.index, account), exc, exception_map,
+                                     source="{}-watcher".format(self.index))
+                continue
+
+            for region in regions:
                 app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
                 try:
+                    all_vpcs = get_ec2_inventory(account, region.name).vpcs(self)
+
                     conn = connect(account, 'vpc', region=region)
-                    all_vpcs = self.wrap_aws_rate_limited_call(
-                        conn.get_all_vpcs
-                    )
 
                     all_dhcp_options = self.wrap_aws_rate_limited_call(
                         conn.get_all_dhcp_options
@@ -87,10 +94,9 @@ class VPC(Watcher):
                         conn.get_all_internet_gateways
                     )
                 except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), 'vpc', account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map,
-                                             source="{}-watcher".format(self.index))
+                    exc = BotoConnectionIssue(str(e), 'vpc', account, region.name)
+                    self.slurp_exception((self.index, account, region.name), exc, exception_map,
+                                         source="{}-watcher".format(self.index))
                     continue
                 app.logger.debug("Found {} {}".format(len(all_vpcs), self.i_am_plural))
 
@@ -45,8 +45,8 @@ setup(
         'Sphinx==1.2.2',
         'gunicorn==18.0',
         'cryptography==1.3.2',
-        'boto3>=1.3.1',
-        'botocore>=1.4.35',
+        'boto3>=1.14.8',
+        'botocore>=1.17.8',
         'dpath==1.3.2',
         'pyyaml==3.11',
         'jira==0.32',